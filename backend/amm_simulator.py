@@ -0,0 +1,786 @@
+"""Simulateur local de pool à produit constant (Uniswap V2 / QuickSwap).
+
+- ConstantProductPool : réserves et frais de 0,3 %, formules getAmountOut /
+  getAmountIn de UniswapV2Library (entiers, mêmes arrondis que le contrat),
+- AmmSimulator : balances ERC20 (tokens à taxe de transfert compris), pools et
+  fonctions du router utilisées par le bot (getAmountsOut,
+  swapExactTokensForTokensSupportingFeeOnTransferTokens), impact de prix,
+- SimulatedNetwork : nœud JSON-RPC minimal au-dessus du simulateur (eth_call,
+  eth_sendRawTransaction, reçus avec événements Transfer / Sync / Swap, eth_getLogs...),
+- PaperChain : accès blockchain (chain.py) branché en mémoire sur le réseau
+  simulé, sans HTTP ni limite de débit.
+
+Trading papier : un endpoint `paper://<nom>` (POLYGON_RPC_URL ou `rpc_endpoint`
+du bot) remplace Polygon. Le bot garde ses contrats, ses signatures et son
+décodage des reçus ; seuls les swaps sont exécutés contre le pool simulé. Les
+bots d'un même processus qui utilisent le même nom partagent le même pool.
+
+Usage (impact de prix selon le montant) :
+    python amm_simulator.py --sizes 1,10,100,1000 --side buy
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import rlp
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+from web3 import AsyncWeb3
+from web3.providers.async_base import AsyncJSONBaseProvider
+
+from chain import BaseChain, KNO, KNO_WPOL_PAIR, POLYGON_CHAIN_ID, ROUTER, WPOL
+from multicall import MULTICALL3
+from rpc_limiter import TokenBucket
+
+# Réserves initiales du pool KNO/WPOL simulé (en tokens)
+PAPER_WPOL_RESERVE = float(os.getenv("PAPER_WPOL_RESERVE", "50000"))
+PAPER_KNO_RESERVE = float(os.getenv("PAPER_KNO_RESERVE", "10000000"))
+# Taxe prélevée par le token KNO à chaque transfert (points de base, 100 = 1 %)
+PAPER_KNO_TRANSFER_FEE_BPS = int(os.getenv("PAPER_KNO_TRANSFER_FEE_BPS", "0"))
+# Balance créditée à un wallet à sa première lecture (POL natif et chaque token)
+PAPER_INITIAL_BALANCE = float(os.getenv("PAPER_INITIAL_BALANCE", "1000"))
+# Secondes par bloc (0 : chaque transaction est minée immédiatement dans son propre bloc)
+PAPER_BLOCK_TIME = float(os.getenv("PAPER_BLOCK_TIME", "2"))
+
+PAPER_SCHEME = "paper://"
+
+POOL_FEE_BPS = 30
+BPS = 10_000
+MAX_UINT256 = 2**256 - 1
+GAS_PRICE = 30 * 10**9
+BASE_FEE = GAS_PRICE // 2
+GAS_USED = 150_000
+# Destinataire des taxes de transfert
+FEE_COLLECTOR = "0x000000000000000000000000000000000000dead"
+# Compte fictif des swaps simulés sans effet (simulate_swap, price_impact)
+QUOTE_ACCOUNT = "0x0000000000000000000000000000000000000001"
+
+_WPOL, _KNO, _ROUTER, _PAIR, _MULTICALL3 = (address.lower() for address in (WPOL, KNO, ROUTER, KNO_WPOL_PAIR, MULTICALL3))
+
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+SWAP_TOPIC = "0x" + keccak(text="Swap(address,uint256,uint256,uint256,uint256,address)").hex()
+SYNC_TOPIC = "0x" + keccak(text="Sync(uint112,uint112)").hex()
+
+
+class SwapReverted(Exception):
+    """Transaction annulée par le contrat (message de revert du router ou de la paire)"""
+
+
+def to_wei(amount: float) -> int:
+    return int(round(amount * 10**18))
+
+
+def topic_address(address: str) -> str:
+    return "0x" + "00" * 12 + address.lower()[2:]
+
+
+def transfer_log(token: str, sender: str, recipient: str, amount: int) -> dict:
+    return {"address": token, "topics": [TRANSFER_TOPIC, topic_address(sender), topic_address(recipient)],
+            "data": "0x" + encode(["uint256"], [amount]).hex()}
+
+
+class ConstantProductPool:
+    def __init__(self, address: str, token_a: str, token_b: str, reserve_a: int, reserve_b: int,
+                 fee_bps: int = POOL_FEE_BPS):
+        """
+        Paire Uniswap V2 (x * y = k)
+
+        Args:
+            address: Adresse de la paire
+            token_a, token_b: Tokens de la paire (token0 = adresse la plus basse, comme le contrat)
+            reserve_a, reserve_b: Réserves initiales (wei)
+            fee_bps: Frais prélevés sur le montant entrant (30 = 0,3 %)
+        """
+        self.address = address.lower()
+        token_a, token_b = token_a.lower(), token_b.lower()
+        if token_a > token_b:
+            token_a, token_b, reserve_a, reserve_b = token_b, token_a, reserve_b, reserve_a
+        self.token0, self.token1 = token_a, token_b
+        self.reserve0, self.reserve1 = reserve_a, reserve_b
+        self.fee_bps = fee_bps
+
+    def reserves(self, token_in: str) -> Tuple[int, int]:
+        """(réserve du token entrant, réserve du token sortant)"""
+        if token_in.lower() == self.token0:
+            return self.reserve0, self.reserve1
+        return self.reserve1, self.reserve0
+
+    def get_amount_out(self, amount_in: int, token_in: str) -> int:
+        """UniswapV2Library.getAmountOut"""
+        if amount_in <= 0:
+            raise SwapReverted("UniswapV2Library: INSUFFICIENT_INPUT_AMOUNT")
+        reserve_in, reserve_out = self.reserves(token_in)
+        if reserve_in <= 0 or reserve_out <= 0:
+            raise SwapReverted("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+        amount_in_with_fee = amount_in * (BPS - self.fee_bps)
+        return amount_in_with_fee * reserve_out // (reserve_in * BPS + amount_in_with_fee)
+
+    def get_amount_in(self, amount_out: int, token_in: str) -> int:
+        """UniswapV2Library.getAmountIn : montant entrant pour recevoir `amount_out`"""
+        reserve_in, reserve_out = self.reserves(token_in)
+        if amount_out <= 0:
+            raise SwapReverted("UniswapV2Library: INSUFFICIENT_OUTPUT_AMOUNT")
+        if amount_out >= reserve_out:
+            raise SwapReverted("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+        return reserve_in * amount_out * BPS // ((reserve_out - amount_out) * (BPS - self.fee_bps)) + 1
+
+    def mid_price(self, token_in: str) -> float:
+        """Tokens sortants par token entrant, sans frais ni impact"""
+        reserve_in, reserve_out = self.reserves(token_in)
+        return reserve_out / reserve_in
+
+    def other(self, token: str) -> str:
+        return self.token1 if token.lower() == self.token0 else self.token0
+
+
+@dataclass
+class SwapResult:
+    amount_in: int              # débité au wallet (taxe de transfert comprise)
+    amount_out: int             # reçu par le destinataire (taxes déduites)
+    amounts: List[int]          # montant entrant de chaque saut, puis montant sorti du dernier
+    logs: List[dict] = field(default_factory=list)
+
+
+class AmmSimulator:
+    def __init__(self, initial_balance: int = 0, transfer_fees: Optional[Dict[str, int]] = None):
+        """
+        Balances ERC20, pools et router Uniswap V2 en mémoire
+
+        Args:
+            initial_balance: Balance créditée à un wallet à sa première lecture, par token (wei)
+            transfer_fees: Taxe de transfert par token (points de base)
+        """
+        self.initial_balance = initial_balance
+        self.transfer_fees = {token.lower(): bps for token, bps in (transfer_fees or {}).items()}
+        self.balances: Dict[Tuple[str, str], int] = {}                # (token, owner) -> wei
+        self.allowances: Dict[Tuple[str, str, str], int] = {}         # (token, owner, spender) -> wei
+        self.pools: Dict[frozenset, ConstantProductPool] = {}
+        self.pairs: Dict[str, ConstantProductPool] = {}               # adresse -> paire
+        # Comptes sans crédit initial (paires, router, collecteur de taxes)
+        self.contracts = {_ROUTER, FEE_COLLECTOR, QUOTE_ACCOUNT}
+        self._journal: Optional[list] = None
+
+    # --- ÉTAT (journalisé pour annuler une transaction) ---
+    def _set(self, table: dict, key, value):
+        if self._journal is not None:
+            self._journal.append((table, key, table.get(key)))
+        table[key] = value
+
+    def _sync(self, pool: ConstantProductPool, logs: list):
+        """Réserves = balances de la paire (UniswapV2Pair._update)"""
+        if self._journal is not None:
+            self._journal.append((pool, None, (pool.reserve0, pool.reserve1)))
+        pool.reserve0 = self.balance_of(pool.token0, pool.address)
+        pool.reserve1 = self.balance_of(pool.token1, pool.address)
+        logs.append({"address": pool.address, "topics": [SYNC_TOPIC],
+                     "data": "0x" + encode(["uint112", "uint112"], [pool.reserve0, pool.reserve1]).hex()})
+
+    @contextmanager
+    def atomic(self, commit: bool = True):
+        """
+        Changements d'état annulés si une SwapReverted est levée (ou toujours, commit=False)
+        """
+        if self._journal is not None:
+            # Déjà dans une transaction : elle décide pour l'ensemble
+            yield
+            return
+        self._journal = journal = []
+        try:
+            yield
+        except BaseException:
+            self._rollback(journal)
+            raise
+        else:
+            if not commit:
+                self._rollback(journal)
+        finally:
+            self._journal = None
+
+    @staticmethod
+    def _rollback(journal: list):
+        for table, key, previous in reversed(journal):
+            if isinstance(table, ConstantProductPool):
+                table.reserve0, table.reserve1 = previous
+            elif previous is None:
+                table.pop(key, None)
+            else:
+                table[key] = previous
+
+    # --- POOLS ---
+    def add_pool(self, address: str, token_a: str, token_b: str, reserve_a: int, reserve_b: int,
+                 fee_bps: int = POOL_FEE_BPS) -> ConstantProductPool:
+        """Crée une paire et lui attribue ses réserves"""
+        pool = ConstantProductPool(address, token_a, token_b, reserve_a, reserve_b, fee_bps)
+        self.pools[frozenset((pool.token0, pool.token1))] = pool
+        self.pairs[pool.address] = pool
+        self.contracts.add(pool.address)
+        self.balances[(pool.token0, pool.address)] = pool.reserve0
+        self.balances[(pool.token1, pool.address)] = pool.reserve1
+        return pool
+
+    def pool(self, token_a: str, token_b: str) -> ConstantProductPool:
+        pool = self.pools.get(frozenset((token_a.lower(), token_b.lower())))
+        if pool is None:
+            raise SwapReverted("UniswapV2Library: pair inexistante")
+        return pool
+
+    # --- ERC20 ---
+    def balance_of(self, token: str, owner: str) -> int:
+        key = (token.lower(), owner.lower())
+        if key not in self.balances:
+            return 0 if owner.lower() in self.contracts else self.initial_balance
+        return self.balances[key]
+
+    def allowance(self, token: str, owner: str, spender: str) -> int:
+        return self.allowances.get((token.lower(), owner.lower(), spender.lower()), 0)
+
+    def approve(self, token: str, owner: str, spender: str, amount: int):
+        self._set(self.allowances, (token.lower(), owner.lower(), spender.lower()), amount)
+
+    def mint(self, token: str, owner: str, amount: int):
+        self._set(self.balances, (token.lower(), owner.lower()), self.balance_of(token, owner) + amount)
+
+    def burn(self, token: str, owner: str, amount: int):
+        balance = self.balance_of(token, owner)
+        if balance < amount:
+            raise SwapReverted("ERC20: burn amount exceeds balance")
+        self._set(self.balances, (token.lower(), owner.lower()), balance - amount)
+
+    def transfer(self, token: str, sender: str, recipient: str, amount: int, logs: list) -> int:
+        """
+        Transfert ERC20, taxe de transfert du token prélevée au passage
+
+        Returns:
+            Montant reçu par le destinataire
+        """
+        token, sender, recipient = token.lower(), sender.lower(), recipient.lower()
+        balance = self.balance_of(token, sender)
+        if balance < amount:
+            raise SwapReverted("TransferHelper: TRANSFER_FROM_FAILED")
+        fee = amount * self.transfer_fees.get(token, 0) // BPS
+        received = amount - fee
+        self._set(self.balances, (token, sender), balance - amount)
+        self._set(self.balances, (token, recipient), self.balance_of(token, recipient) + received)
+        logs.append(transfer_log(token, sender, recipient, received))
+        if fee:
+            self._set(self.balances, (token, FEE_COLLECTOR), self.balance_of(token, FEE_COLLECTOR) + fee)
+            logs.append(transfer_log(token, sender, FEE_COLLECTOR, fee))
+        return received
+
+    def transfer_from(self, token: str, spender: str, sender: str, recipient: str, amount: int, logs: list) -> int:
+        allowance = self.allowance(token, sender, spender)
+        if allowance < amount:
+            raise SwapReverted("TransferHelper: TRANSFER_FROM_FAILED")
+        if allowance != MAX_UINT256:
+            self.approve(token, sender, spender, allowance - amount)
+        return self.transfer(token, sender, recipient, amount, logs)
+
+    # --- ROUTER ---
+    def get_amounts_out(self, amount_in: int, path: List[str]) -> List[int]:
+        """
+        Router.getAmountsOut : comme le contrat, ignore les taxes de transfert
+        (d'où un amountOutMin trop optimiste pour un token taxé)
+        """
+        amounts = [amount_in]
+        for token_in, token_out in zip(path, path[1:]):
+            amounts.append(self.pool(token_in, token_out).get_amount_out(amounts[-1], token_in))
+        return amounts
+
+    def swap_exact_tokens_for_tokens_supporting_fee_on_transfer_tokens(
+            self, sender: str, amount_in: int, amount_out_min: int, path: List[str], to: str,
+            deadline: Optional[float] = None, now: Optional[float] = None) -> SwapResult:
+        """
+        Router.swapExactTokensForTokensSupportingFeeOnTransferTokens
+
+        Chaque paire mesure ce qu'elle a réellement reçu (balance - réserve), taxes déduites ;
+        le minimum est vérifié sur la balance du destinataire. Aucun changement d'état en cas
+        de revert.
+
+        Args:
+            sender: Wallet qui signe (allowance donnée au router sur path[0])
+            amount_in: Montant débité au wallet (wei)
+            amount_out_min: Minimum reçu par `to`, sinon revert
+            path: Tokens traversés
+            to: Destinataire du dernier token
+            deadline: Horodatage limite (secondes), ignoré si None
+            now: Horodatage du bloc (time.time() par défaut)
+
+        Returns:
+            SwapResult (montants et événements émis)
+
+        Raises:
+            SwapReverted: Message de revert du contrat
+        """
+        if deadline is not None and deadline < (time.time() if now is None else now):
+            raise SwapReverted("UniswapV2Router: EXPIRED")
+        path = [token.lower() for token in path]
+        sender, to = sender.lower(), to.lower()
+        logs = []
+        with self.atomic():
+            pools = [self.pool(token_in, token_out) for token_in, token_out in zip(path, path[1:])]
+            self.transfer_from(path[0], _ROUTER, sender, pools[0].address, amount_in, logs)
+            balance_before = self.balance_of(path[-1], to)
+            amounts = []
+            for hop, (pool, token_in) in enumerate(zip(pools, path)):
+                token_out = pool.other(token_in)
+                reserve_in, _ = pool.reserves(token_in)
+                amount_input = self.balance_of(token_in, pool.address) - reserve_in
+                amount_output = pool.get_amount_out(amount_input, token_in)
+                amounts.append(amount_input)
+                recipient = pools[hop + 1].address if hop + 1 < len(pools) else to
+                self.transfer(token_out, pool.address, recipient, amount_output, logs)
+                self._sync(pool, logs)
+                ins = [amount_input, 0] if token_in == pool.token0 else [0, amount_input]
+                outs = [0, amount_output] if token_in == pool.token0 else [amount_output, 0]
+                logs.append({"address": pool.address,
+                             "topics": [SWAP_TOPIC, topic_address(_ROUTER), topic_address(recipient)],
+                             "data": "0x" + encode(["uint256"] * 4, ins + outs).hex()})
+            amount_out = self.balance_of(path[-1], to) - balance_before
+            amounts.append(amount_out)
+            if amount_out < amount_out_min:
+                raise SwapReverted("UniswapV2Router: INSUFFICIENT_OUTPUT_AMOUNT")
+        return SwapResult(amount_in, amount_out, amounts, logs)
+
+    def simulate_swap(self, amount_in: int, path: List[str], sender: str = QUOTE_ACCOUNT) -> SwapResult:
+        """Résultat d'un swap sans modifier l'état (balance et allowance du wallet ignorées)"""
+        with self.atomic(commit=False):
+            self.mint(path[0], sender, amount_in)
+            self.approve(path[0], sender, _ROUTER, MAX_UINT256)
+            return self.swap_exact_tokens_for_tokens_supporting_fee_on_transfer_tokens(
+                sender, amount_in, 0, path, sender)
+
+    def mid_price(self, path: List[str]) -> float:
+        """Tokens sortants par token entrant au prix moyen des réserves"""
+        price = 1.0
+        for token_in, token_out in zip(path, path[1:]):
+            price *= self.pool(token_in, token_out).mid_price(token_in)
+        return price
+
+    def price_impact(self, amount_in: int, path: List[str]) -> float:
+        """
+        Écart entre le prix obtenu et le prix moyen, frais du pool et taxes comprises
+
+        Args:
+            amount_in: Montant vendu (wei)
+            path: Tokens traversés
+
+        Returns:
+            Fraction perdue (0.01 pour 1 %)
+        """
+        result = self.simulate_swap(amount_in, path)
+        return 1 - result.amount_out / (amount_in * self.mid_price(path))
+
+
+def create_simulator(wpol_reserve: float = PAPER_WPOL_RESERVE, kno_reserve: float = PAPER_KNO_RESERVE,
+                     kno_transfer_fee_bps: int = PAPER_KNO_TRANSFER_FEE_BPS,
+                     initial_balance: float = PAPER_INITIAL_BALANCE) -> AmmSimulator:
+    """Simulateur avec la paire KNO/WPOL de QuickSwap (montants en tokens)"""
+    simulator = AmmSimulator(to_wei(initial_balance), {_KNO: kno_transfer_fee_bps})
+    simulator.add_pool(_PAIR, _WPOL, _KNO, to_wei(wpol_reserve), to_wei(kno_reserve))
+    return simulator
+
+
+def selector(signature: str) -> str:
+    return "0x" + keccak(text=signature)[:4].hex()
+
+
+SELECTORS = {
+    selector("balanceOf(address)"): "balanceOf",
+    selector("allowance(address,address)"): "allowance",
+    selector("decimals()"): "decimals",
+    selector("approve(address,uint256)"): "approve",
+    selector("deposit()"): "deposit",
+    selector("withdraw(uint256)"): "withdraw",
+    selector("getAmountsOut(uint256,address[])"): "getAmountsOut",
+    selector("getReserves()"): "getReserves",
+    selector("token0()"): "token0",
+    selector("token1()"): "token1",
+    selector("aggregate3((address,bool,bytes)[])"): "aggregate3",
+    selector("swapExactTokensForTokensSupportingFeeOnTransferTokens(uint256,uint256,address[],address,uint256)"): "swap",
+}
+
+
+def to_hex(value: int) -> str:
+    return hex(value)
+
+
+def decode_raw_transaction(raw: bytes, sender: Optional[str] = None) -> dict:
+    """
+    Décode une transaction signée (legacy ou EIP-1559)
+
+    Args:
+        raw: Transaction signée
+        sender: Expéditeur déjà connu (sinon retrouvé depuis la signature, ~10 ms en Python pur)
+    """
+    sender = (sender or Account.recover_transaction(raw)).lower()
+    if raw[0] == 2:
+        fields = rlp.decode(raw[1:])
+        nonce, gas, to, value, data = fields[1], fields[4], fields[5], fields[6], fields[7]
+        # Prix effectif EIP-1559 : base fee + pourboire, plafonné par maxFeePerGas
+        tip, max_fee = int.from_bytes(fields[2], "big"), int.from_bytes(fields[3], "big")
+        gas_price = min(max_fee, BASE_FEE + tip)
+    else:
+        fields = rlp.decode(raw)
+        nonce, gas_price_raw, gas, to, value, data = fields[:6]
+        gas_price = int.from_bytes(gas_price_raw, "big")
+    return {
+        "type": raw[0] if raw[0] == 2 else 0,
+        "from": sender,
+        "nonce": int.from_bytes(nonce, "big"),
+        "gas": int.from_bytes(gas, "big"),
+        "gas_price": gas_price,
+        "to": "0x" + to.hex() if to else None,
+        "value": int.from_bytes(value, "big"),
+        "data": data,
+    }
+
+
+def _block_tag(tag, latest: int) -> int:
+    if tag in (None, "latest", "pending", "safe", "finalized"):
+        return latest
+    if tag == "earliest":
+        return 0
+    return int(tag, 16) if isinstance(tag, str) else int(tag)
+
+
+class SimulatedNetwork:
+    def __init__(self, block_time: float = PAPER_BLOCK_TIME, simulator: Optional[AmmSimulator] = None,
+                 chain_id: int = POLYGON_CHAIN_ID):
+        """
+        Nœud JSON-RPC Polygon simulé (sous-ensemble utilisé par trading_bot.py / chain.py)
+
+        Args:
+            block_time: Secondes par bloc (0 : un bloc miné par transaction, reçu immédiat)
+            simulator: Pools et balances (create_simulator() par défaut)
+            chain_id: Identifiant de chaîne annoncé
+        """
+        self.block_time = block_time
+        self.simulator = simulator or create_simulator()
+        self.chain_id = chain_id
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.native: Dict[str, int] = {}    # owner -> POL (wei)
+        self.nonces: Dict[str, int] = {}    # owner -> nonce confirmé
+        self.transactions = {}              # hash -> (tx, bloc)
+        self.senders: Dict[str, str] = {}   # hash -> expéditeur des transactions signées dans le processus
+        self._mined = 0
+
+    @property
+    def block_number(self) -> int:
+        if self.block_time <= 0:
+            return 1_000_000 + self._mined
+        return 1_000_000 + int((time.monotonic() - self.started) / self.block_time)
+
+    def native_balance(self, owner: str) -> int:
+        return self.native.get(owner.lower(), self.simulator.initial_balance)
+
+    # --- eth_call ---
+    def call(self, to: str, data: bytes) -> bytes:
+        simulator = self.simulator
+        name = SELECTORS.get("0x" + data[:4].hex())
+        args = data[4:]
+        if name == "balanceOf":
+            (owner,) = decode(["address"], args)
+            return encode(["uint256"], [simulator.balance_of(to, owner)])
+        if name == "allowance":
+            owner, spender = decode(["address", "address"], args)
+            return encode(["uint256"], [simulator.allowance(to, owner, spender)])
+        if name == "decimals":
+            return encode(["uint8"], [18])
+        if name == "aggregate3" and to == _MULTICALL3:
+            (calls,) = decode(["(address,bool,bytes)[]"], args)
+            results = []
+            for target, allow_failure, call_data in calls:
+                try:
+                    results.append((True, self.call(target.lower(), call_data)))
+                except (ValueError, SwapReverted):
+                    if not allow_failure:
+                        raise
+                    results.append((False, b""))
+            return encode(["(bool,bytes)[]"], [results])
+        if name == "getAmountsOut":
+            amount_in, path = decode(["uint256", "address[]"], args)
+            try:
+                return encode(["uint256[]"], [simulator.get_amounts_out(amount_in, list(path))])
+            except SwapReverted as e:
+                raise ValueError(f"execution reverted: {e}")
+        if name in ("getReserves", "token0", "token1") and to in simulator.pairs:
+            pool = simulator.pairs[to]
+            if name == "getReserves":
+                return encode(["uint112", "uint112", "uint32"], [pool.reserve0, pool.reserve1, int(time.time()) % 2**32])
+            return encode(["address"], [pool.token0 if name == "token0" else pool.token1])
+        raise ValueError(f"eth_call non supporté: {data[:4].hex()}")
+
+    # --- eth_sendRawTransaction ---
+    def apply(self, tx: dict) -> int:
+        """Applique les effets d'une transaction, retourne le statut du reçu"""
+        simulator = self.simulator
+        sender, to, data = tx["from"], tx["to"], tx["data"]
+        name = SELECTORS.get("0x" + data[:4].hex()) if len(data) >= 4 else None
+        args = data[4:]
+        try:
+            if name == "approve":
+                spender, amount = decode(["address", "uint256"], args)
+                simulator.approve(to, sender, spender, amount)
+            elif name == "deposit" and to == _WPOL:
+                if self.native_balance(sender) < tx["value"]:
+                    return 0
+                simulator.mint(to, sender, tx["value"])
+                self.native[sender] = self.native_balance(sender) - tx["value"]
+            elif name == "withdraw" and to == _WPOL:
+                (amount,) = decode(["uint256"], args)
+                simulator.burn(to, sender, amount)
+                self.native[sender] = self.native_balance(sender) + amount
+            elif name == "swap" and to == _ROUTER:
+                amount_in, amount_out_min, path, recipient, deadline = decode(
+                    ["uint256", "uint256", "address[]", "address", "uint256"], args)
+                result = simulator.swap_exact_tokens_for_tokens_supporting_fee_on_transfer_tokens(
+                    sender, amount_in, amount_out_min, list(path), recipient, deadline)
+                tx["logs"] = result.logs
+        except SwapReverted:
+            return 0
+        return 1
+
+    def send_raw_transaction(self, raw_hex: str) -> str:
+        raw = bytes.fromhex(raw_hex[2:])
+        tx_hash = "0x" + keccak(raw).hex()
+        tx = decode_raw_transaction(raw, self.senders.pop(tx_hash, None))
+        if tx_hash in self.transactions:
+            # Même transaction reçue par un autre endpoint (diffusion du pool)
+            raise ValueError("already known")
+        expected = self.nonces.get(tx["from"], 0)
+        if tx["nonce"] < expected:
+            raise ValueError("nonce too low")
+        if tx["nonce"] > expected:
+            raise ValueError("nonce too high (gap)")
+        self.nonces[tx["from"]] = expected + 1
+        tx["status"] = self.apply(tx)
+        tx["logs"] = tx.get("logs", []) if tx["status"] else []
+        tx["gas_used"] = min(tx["gas"], GAS_USED)
+        self.native[tx["from"]] = self.native_balance(tx["from"]) - tx["gas_used"] * tx["gas_price"]
+        self.transactions[tx_hash] = (tx, self.block_number)
+        if self.block_time <= 0:
+            self._mined += 1
+        return tx_hash
+
+    def receipt(self, tx_hash: str):
+        entry = self.transactions.get(tx_hash.lower())
+        if entry is None:
+            return None
+        tx, block = entry
+        # Inclus dans le bloc suivant la soumission
+        if self.block_number <= block:
+            return None
+        block_hash = "0x" + keccak(text=str(block + 1)).hex()
+        return {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": block_hash,
+            "blockNumber": to_hex(block + 1),
+            "from": to_checksum_address(tx["from"]),
+            "to": to_checksum_address(tx["to"]) if tx["to"] else None,
+            "cumulativeGasUsed": to_hex(tx["gas_used"]),
+            "gasUsed": to_hex(tx["gas_used"]),
+            "effectiveGasPrice": to_hex(tx["gas_price"]),
+            "contractAddress": None,
+            "logs": [
+                {**log, "logIndex": to_hex(index), "transactionHash": tx_hash, "transactionIndex": "0x0",
+                 "blockHash": block_hash, "blockNumber": to_hex(block + 1), "removed": False}
+                for index, log in enumerate(tx["logs"])
+            ],
+            "logsBloom": "0x" + "00" * 256,
+            "status": to_hex(tx["status"]),
+            "type": to_hex(tx["type"]),
+        }
+
+    def logs(self, query: dict) -> list:
+        """eth_getLogs sur les transactions minées (filtre d'adresse et de premier topic)"""
+        latest = self.block_number
+        first = _block_tag(query.get("fromBlock"), latest)
+        last = min(_block_tag(query.get("toBlock"), latest), latest)
+        addresses = query.get("address")
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {address.lower() for address in addresses} if addresses else None
+        topics = (query.get("topics") or [None])[0]
+        topics = {topics} if isinstance(topics, str) else set(topics or [])
+        logs = []
+        for tx_hash, (tx, block) in self.transactions.items():
+            receipt = self.receipt(tx_hash) if first <= block + 1 <= last else None
+            for log in (receipt or {}).get("logs", []):
+                if addresses and log["address"].lower() not in addresses:
+                    continue
+                if topics and log["topics"][0] not in topics:
+                    continue
+                logs.append(log)
+        return logs
+
+    def block(self, number: int) -> dict:
+        return {
+            "number": to_hex(number),
+            "hash": "0x" + keccak(text=str(number)).hex(),
+            "parentHash": "0x" + keccak(text=str(number - 1)).hex(),
+            "timestamp": to_hex(int(time.time())),
+            "gasLimit": to_hex(30_000_000),
+            "gasUsed": to_hex(15_000_000),
+            "baseFeePerGas": to_hex(BASE_FEE),
+            "miner": "0x" + "00" * 20,
+            "transactions": [],
+        }
+
+    # --- DISPATCH ---
+    def handle(self, method: str, params: list):
+        with self.lock:
+            if method == "eth_chainId":
+                return to_hex(self.chain_id)
+            if method == "net_version":
+                return str(self.chain_id)
+            if method == "web3_clientVersion":
+                return "amm-simulator/1.0"
+            if method == "eth_blockNumber":
+                return to_hex(self.block_number)
+            if method == "eth_gasPrice":
+                return to_hex(GAS_PRICE)
+            if method == "eth_maxPriorityFeePerGas":
+                return to_hex(GAS_PRICE // 2)
+            if method == "eth_feeHistory":
+                count, percentiles = int(params[0], 16) if isinstance(params[0], str) else params[0], params[2]
+                oldest = self.block_number - count + 1
+                # Pourboires croissants avec le percentile (25 → 25 gwei, 90 → 90 gwei...)
+                rewards = [[to_hex(int(p) * 10**9) for p in percentiles] for _ in range(count)]
+                return {"oldestBlock": to_hex(oldest), "baseFeePerGas": [to_hex(BASE_FEE)] * (count + 1),
+                        "gasUsedRatio": [0.5] * count, "reward": rewards}
+            if method == "eth_getBalance":
+                return to_hex(self.native_balance(params[0]))
+            if method == "eth_estimateGas":
+                return to_hex(GAS_USED)
+            if method == "eth_getTransactionCount":
+                return to_hex(self.nonces.get(params[0].lower(), 0))
+            if method == "eth_getBlockByNumber":
+                tag = params[0]
+                number = self.block_number if tag in ("latest", "pending") else int(tag, 16)
+                return self.block(number)
+            if method == "eth_call":
+                call = params[0]
+                return "0x" + self.call(call["to"].lower(), bytes.fromhex(call["data"][2:])).hex()
+            if method == "eth_sendRawTransaction":
+                return self.send_raw_transaction(params[0])
+            if method == "eth_getTransactionReceipt":
+                return self.receipt(params[0])
+            if method == "eth_getLogs":
+                return self.logs(params[0])
+            if method == "eth_getTransactionByHash":
+                entry = self.transactions.get(params[0].lower())
+                return None if entry is None else {"hash": params[0], "nonce": to_hex(entry[0]["nonce"])}
+        raise NotImplementedError(method)
+
+    def answer(self, request: dict) -> dict:
+        """Réponse JSON-RPC à une requête décodée"""
+        try:
+            result = self.handle(request["method"], request.get("params", []))
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        except NotImplementedError as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": f"method not found: {e}"}}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+
+class SimulatorProvider(AsyncJSONBaseProvider):
+    def __init__(self, network: SimulatedNetwork):
+        """Provider web3 asynchrone qui répond depuis le réseau simulé, sans sérialisation HTTP"""
+        super().__init__()
+        self.network = network
+
+    def _request(self, method, params) -> dict:
+        # Passage par JSON : mêmes formats que sur le réseau (HexBytes, adresses, entiers)
+        return self.network.answer(json.loads(self.encode_rpc_request(method, params)))
+
+    async def make_request(self, method, params):
+        return self._request(method, params)
+
+    async def make_batch_request(self, requests):
+        return [self._request(method, params) for method, params in requests]
+
+
+# Réseaux simulés du processus, par nom (paper://<nom>)
+_networks: Dict[str, SimulatedNetwork] = {}
+
+
+def get_network(name: str = "default") -> SimulatedNetwork:
+    """Réseau simulé partagé par les bots du processus qui utilisent le même nom"""
+    if name not in _networks:
+        _networks[name] = SimulatedNetwork()
+    return _networks[name]
+
+
+class PaperChain(BaseChain):
+    def __init__(self, rpc_url: str = PAPER_SCHEME + "default", network: Optional[SimulatedNetwork] = None):
+        """
+        Accès blockchain de trading papier
+
+        Args:
+            rpc_url: paper://<nom> (réseau simulé partagé par nom dans le processus)
+            network: Réseau simulé explicite (get_network(nom) par défaut)
+        """
+        rpc_url = rpc_url.strip()
+        self.network = network or get_network(rpc_url[len(PAPER_SCHEME):].strip("/") or "default")
+        # Pas de limite de débit : aucune requête ne quitte le processus
+        limiter = TokenBucket(rpc_url, rate=1e9, burst=1e9, shared=False)
+        super().__init__(AsyncWeb3(SimulatorProvider(self.network)), rpc_url, limiter)
+
+    async def _run(self, fn, *args):
+        result = fn(*args)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    def sign_transaction(self, tx: dict, private_key: str):
+        signed = super().sign_transaction(tx, private_key)
+        if tx.get("from"):
+            # eth_account a vérifié que `from` correspond à la clé : pas de recouvrement côté réseau
+            with self.network.lock:
+                self.network.senders["0x" + bytes(signed.hash).hex()] = tx["from"]
+        return signed
+
+    async def is_connected(self) -> bool:
+        return await self.w3.is_connected()
+
+    def status(self) -> list:
+        pool = self.network.simulator.pairs.get(_PAIR)
+        reserves = {"reserve0": str(pool.reserve0), "reserve1": str(pool.reserve1)} if pool else {}
+        return [{"endpoint": self.rpc_url, "state": "paper", "limiter": self.limiter.snapshot(), **reserves}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impact de prix sur le pool KNO/WPOL simulé")
+    parser.add_argument("--sizes", default="1,10,100,1000", help="Montants vendus (tokens), séparés par des virgules")
+    parser.add_argument("--side", choices=("buy", "sell"), default="buy", help="buy : WPOL → KNO, sell : KNO → WPOL")
+    parser.add_argument("--wpol-reserve", type=float, default=PAPER_WPOL_RESERVE)
+    parser.add_argument("--kno-reserve", type=float, default=PAPER_KNO_RESERVE)
+    parser.add_argument("--kno-fee-bps", type=int, default=PAPER_KNO_TRANSFER_FEE_BPS)
+    args = parser.parse_args()
+
+    simulator = create_simulator(args.wpol_reserve, args.kno_reserve, args.kno_fee_bps)
+    path = [_WPOL, _KNO] if args.side == "buy" else [_KNO, _WPOL]
+    for size in (float(value) for value in args.sizes.split(",")):
+        amount_in = to_wei(size)
+        quoted = simulator.get_amounts_out(amount_in, path)[-1]
+        result = simulator.simulate_swap(amount_in, path)
+        print(json.dumps({
+            "amount_in": size,
+            "quoted_out": quoted / 10**18,
+            "received": result.amount_out / 10**18,
+            "price_impact_percent": round(simulator.price_impact(amount_in, path) * 100, 4),
+        }))
+
+
+if __name__ == "__main__":
+    main()
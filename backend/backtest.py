@@ -0,0 +1,240 @@
+"""Backtest vectorisé de la stratégie de bande (strategy.py).
+
+Rejoue une série de prix historique (tableau NumPy, fichier .npy en mmap ou
+fichier binaire float64) avec les règles du bot :
+- signal `band_signal` autour du prix de référence, remis au prix du trade
+  après chaque achat ou vente réussi,
+- `trade_cooldown` secondes minimum entre deux trades,
+- achat de `buy_amount` WPOL de KNO si la balance WPOL suffit, vente de
+  `min(sell_amount, balance)` KNO si la balance atteint `min_swap_amount`,
+- frais du pool, slippage et gas (une transaction par achat, deux par vente :
+  swap puis unwrap).
+
+La référence ne change qu'aux trades : entre deux trades, le prochain tick
+déclencheur est cherché par blocs NumPy au lieu d'une boucle Python par tick.
+
+Usage :
+    python backtest.py prix.npy --volatility 5 --buy-amount 10 --sell-amount 10
+"""
+
+import argparse
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+from strategy import BUY, SELL, band_limits
+
+# Taille du premier bloc de recherche (doublée tant qu'aucun signal n'est trouvé)
+SEARCH_BLOCK = 4096
+SEARCH_BLOCK_MAX = 1 << 20
+
+FILL_DTYPE = np.dtype([
+    ("tick", np.int64),
+    ("ts", np.float64),
+    ("side", np.int8),          # BUY (1) ou SELL (-1)
+    ("price", np.float64),      # prix du signal
+    ("fill_price", np.float64), # prix effectif (frais et slippage compris)
+    ("kno", np.float64),        # KNO achetés ou vendus
+    ("quote", np.float64),      # WPOL dépensés ou reçus
+    ("gas", np.float64),
+])
+
+
+@dataclass
+class BacktestConfig:
+    volatility_percent: float = 50
+    buy_amount: float = 0.05
+    sell_amount: float = 0.05
+    min_swap_amount: float = 0.01
+    trade_cooldown: float = 300
+    reference_price: Optional[float] = None   # premier prix de la série par défaut
+    initial_quote: float = 100.0              # WPOL
+    initial_kno: float = 0.0
+    fee_percent: float = 0.3                  # frais du pool QuickSwap
+    slippage_percent: float = 0.5
+    gas_cost: float = 0.01                    # POL par transaction
+
+
+@dataclass
+class BacktestResult:
+    fills: np.ndarray
+    equity: np.ndarray      # WPOL + KNO au prix du tick - gas cumulé
+    pnl: np.ndarray
+    drawdown: np.ndarray    # écart au plus haut précédent (<= 0)
+    reference_price: float  # référence en fin de série
+
+    def summary(self) -> dict:
+        buys = int(np.count_nonzero(self.fills["side"] == BUY))
+        return {
+            "ticks": int(len(self.equity)),
+            "buys": buys,
+            "sells": int(len(self.fills)) - buys,
+            "pnl": float(self.pnl[-1]) if len(self.pnl) else 0.0,
+            "max_drawdown": float(self.drawdown.min()) if len(self.drawdown) else 0.0,
+            "gas": float(self.fills["gas"].sum()),
+            "reference_price": self.reference_price,
+        }
+
+
+def load_series(path: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Charge une série de prix sans la copier en mémoire
+
+    Args:
+        path: .npy de forme (N,) (prix) ou (N, 2) (timestamp, prix), ou fichier float64 brut
+
+    Returns:
+        (prix, timestamps ou None)
+    """
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+    else:
+        data = np.memmap(path, dtype=np.float64, mode="r")
+    if data.ndim == 2:
+        return data[:, 1], data[:, 0]
+    return data, None
+
+
+def _next_signal(prices: np.ndarray, start: int, low: float, high: float,
+                 can_buy: bool, can_sell: bool) -> int:
+    """Premier tick >= start hors de la bande (côtés possibles seulement), -1 sinon"""
+    n = len(prices)
+    block = SEARCH_BLOCK
+    while start < n:
+        window = prices[start:start + block]
+        if can_buy and can_sell:
+            mask = (window <= low) | (window >= high)
+        elif can_buy:
+            mask = window <= low
+        else:
+            mask = window >= high
+        index = int(mask.argmax())
+        if mask[index]:
+            return start + index
+        start += len(window)
+        block = min(block * 2, SEARCH_BLOCK_MAX)
+    return -1
+
+
+def run_backtest(prices: np.ndarray, config: BacktestConfig, timestamps: Optional[np.ndarray] = None,
+                 tick_seconds: float = 60, curve: bool = True) -> BacktestResult:
+    """
+    Rejoue la stratégie sur une série de prix
+
+    Args:
+        prices: Prix du KNO en WPOL, un par tick
+        config: Paramètres du bot et coûts
+        timestamps: Horodatage de chaque tick (secondes), sinon ticks réguliers
+        tick_seconds: Intervalle entre ticks sans timestamps
+        curve: Calculer les courbes par tick (sinon seulement aux trades)
+
+    Returns:
+        Trades, courbes de PnL et drawdown
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n = len(prices)
+    volatility = float(config.volatility_percent) / 100
+    cost = (config.fee_percent + config.slippage_percent) / 100
+    reference = float(config.reference_price or (prices[0] if n else 0.0))
+    quote, kno, gas = config.initial_quote, config.initial_kno, 0.0
+
+    fills = []
+    tick = 0
+    while tick < n:
+        can_buy = quote >= config.buy_amount
+        can_sell = kno >= config.min_swap_amount
+        if not (can_buy or can_sell):
+            break
+        low, high = band_limits(reference, volatility)
+        tick = _next_signal(prices, tick, low, high, can_buy, can_sell)
+        if tick < 0:
+            break
+        price = float(prices[tick])
+        if can_buy and price <= low:
+            fill_price = price / (1 - cost)
+            bought = config.buy_amount / fill_price
+            quote -= config.buy_amount
+            kno += bought
+            gas += config.gas_cost
+            fills.append((tick, 0, BUY, price, fill_price, bought, config.buy_amount, config.gas_cost))
+        else:
+            amount = min(config.sell_amount, kno)
+            fill_price = price * (1 - cost)
+            received = amount * fill_price
+            kno -= amount
+            quote += received
+            gas += 2 * config.gas_cost
+            fills.append((tick, 0, SELL, price, fill_price, amount, received, 2 * config.gas_cost))
+        reference = price
+
+        # Cooldown : prochain tick autorisé
+        if timestamps is not None:
+            ts = float(timestamps[tick])
+            tick = max(tick + 1, int(np.searchsorted(timestamps, ts + config.trade_cooldown, "left")))
+        else:
+            tick += max(1, int(np.ceil(config.trade_cooldown / tick_seconds)))
+
+    fills = np.array(fills, dtype=FILL_DTYPE)
+    if timestamps is not None and len(fills):
+        fills["ts"] = np.asarray(timestamps)[fills["tick"]]
+    elif len(fills):
+        fills["ts"] = fills["tick"] * tick_seconds
+
+    if curve:
+        equity = _equity(prices, fills, config)
+    else:
+        # Valeur au moment de chaque trade seulement
+        equity = _equity(prices[fills["tick"]], fills, config, np.arange(len(fills)))
+    pnl = equity - (config.initial_quote + config.initial_kno * (prices[0] if n else 0.0))
+    drawdown = equity - np.maximum.accumulate(equity) if len(equity) else equity
+    return BacktestResult(fills, equity, pnl, drawdown, reference)
+
+
+def _equity(prices: np.ndarray, fills: np.ndarray, config: BacktestConfig,
+            ticks: Optional[np.ndarray] = None) -> np.ndarray:
+    """Valeur du portefeuille à chaque tick (balances constantes entre deux trades)"""
+    n = len(prices)
+    ticks = fills["tick"] if ticks is None else ticks
+    signed = np.where(fills["side"] == BUY, 1.0, -1.0)
+    quote_steps = np.concatenate(([config.initial_quote], config.initial_quote + np.cumsum(-signed * fills["quote"])))
+    kno_steps = np.concatenate(([config.initial_kno], config.initial_kno + np.cumsum(signed * fills["kno"])))
+    gas_steps = np.concatenate(([0.0], np.cumsum(fills["gas"])))
+    # Longueur de chaque segment : avant le premier trade, puis entre trades
+    bounds = np.concatenate(([0], ticks, [n]))
+    lengths = np.diff(bounds)
+    quote = np.repeat(quote_steps, lengths)
+    kno = np.repeat(kno_steps, lengths)
+    gas = np.repeat(gas_steps, lengths)
+    return quote + kno * prices - gas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest de la stratégie de bande")
+    parser.add_argument("series", help=".npy (prix ou timestamp,prix) ou fichier float64 brut")
+    parser.add_argument("--volatility", type=float, default=BacktestConfig.volatility_percent)
+    parser.add_argument("--buy-amount", type=float, default=BacktestConfig.buy_amount)
+    parser.add_argument("--sell-amount", type=float, default=BacktestConfig.sell_amount)
+    parser.add_argument("--min-swap-amount", type=float, default=BacktestConfig.min_swap_amount)
+    parser.add_argument("--cooldown", type=float, default=BacktestConfig.trade_cooldown)
+    parser.add_argument("--reference", type=float)
+    parser.add_argument("--quote", type=float, default=BacktestConfig.initial_quote)
+    parser.add_argument("--kno", type=float, default=BacktestConfig.initial_kno)
+    parser.add_argument("--slippage", type=float, default=BacktestConfig.slippage_percent)
+    parser.add_argument("--gas", type=float, default=BacktestConfig.gas_cost)
+    parser.add_argument("--tick-seconds", type=float, default=60)
+    args = parser.parse_args()
+
+    prices, timestamps = load_series(args.series)
+    config = BacktestConfig(
+        volatility_percent=args.volatility, buy_amount=args.buy_amount, sell_amount=args.sell_amount,
+        min_swap_amount=args.min_swap_amount, trade_cooldown=args.cooldown, reference_price=args.reference,
+        initial_quote=args.quote, initial_kno=args.kno, slippage_percent=args.slippage, gas_cost=args.gas,
+    )
+    result = run_backtest(prices, config, timestamps, args.tick_seconds)
+    print(json.dumps(result.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
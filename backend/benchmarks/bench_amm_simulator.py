@@ -0,0 +1,111 @@
+"""Benchmark : swaps sur le pool simulé (amm_simulator.py).
+
+Mesure :
+- le débit du router simulé appelé directement (swaps/s),
+- un cycle de trade complet du bot (lectures Multicall, signature, envoi, reçu,
+  décodage du fill) sur `paper://` en mémoire et sur le serveur HTTP simulé,
+- l'impact de prix selon le montant acheté (buy_amount) sur les réserves par défaut.
+
+Usage :
+    python benchmarks/bench_amm_simulator.py [--swaps 20000] [--trades 200]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from eth_account import Account
+
+from amm_simulator import MAX_UINT256, PaperChain, SimulatedNetwork, create_simulator, to_wei
+from chain import KNO, POLYGON_CHAIN_ID, ROUTER, WPOL, AsyncChain
+from fills import decode_fill
+from multicall import ReadBatch
+from stub_rpc_server import serve
+
+RPC_PORT = 8613
+
+
+def bench_router(swaps: int) -> float:
+    simulator = create_simulator()
+    wallet = Account.create().address
+    for token in (WPOL, KNO):
+        simulator.approve(token, wallet, ROUTER, MAX_UINT256)
+        simulator.mint(token, wallet, to_wei(10**9))
+    amount = to_wei(1)
+    start = time.perf_counter()
+    for i in range(swaps):
+        path = [WPOL, KNO] if i % 2 == 0 else [KNO, WPOL]
+        simulator.swap_exact_tokens_for_tokens_supporting_fee_on_transfer_tokens(
+            wallet, amount if i % 2 == 0 else amount * 200, 0, path, wallet)
+    return swaps / (time.perf_counter() - start)
+
+
+async def trade_cycles(chain, trades: int) -> float:
+    """Achat puis vente en alternance, comme buy_kno / sell_kno"""
+    account = Account.create()
+    nonce = 0
+    for token in (chain.wpol, chain.kno):
+        tx = await chain.build_transaction(token.functions.approve(ROUTER, MAX_UINT256), {
+            "from": account.address, "nonce": nonce, "chainId": POLYGON_CHAIN_ID, "gas": 100_000,
+            "maxFeePerGas": 100 * 10**9, "maxPriorityFeePerGas": 30 * 10**9})
+        await chain.send_raw_transaction(chain.sign_transaction(tx, account.key).raw_transaction)
+        nonce += 1
+
+    start = time.perf_counter()
+    for i in range(trades):
+        token_in, token_out = (WPOL, KNO) if i % 2 == 0 else (KNO, WPOL)
+        amount = to_wei(1 if i % 2 == 0 else 150)
+        reads = ReadBatch(chain)
+        reads.add((chain.wpol if token_in == WPOL else chain.kno).functions.balanceOf(account.address))
+        reads.add(chain.router.functions.getAmountsOut(amount, [token_in, token_out]))
+        _, amounts = await reads.execute()
+        fn = chain.router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
+            amount, int(amounts[-1] * 0.97), [token_in, token_out], account.address, int(time.time()) + 600)
+        tx = await chain.build_transaction(fn, {
+            "from": account.address, "nonce": nonce, "chainId": POLYGON_CHAIN_ID, "gas": 300_000,
+            "maxFeePerGas": 100 * 10**9, "maxPriorityFeePerGas": 30 * 10**9})
+        tx_hash = await chain.send_raw_transaction(chain.sign_transaction(tx, account.key).raw_transaction)
+        nonce += 1
+        receipt = await chain.get_transaction_receipt(tx_hash)
+        fill = decode_fill(receipt, account.address, token_in, token_out)
+        assert receipt.status == 1 and fill.amount_out > 0
+    elapsed = time.perf_counter() - start
+    await chain.close()
+    return trades / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pool simulé")
+    parser.add_argument("--swaps", type=int, default=20000)
+    parser.add_argument("--trades", type=int, default=200)
+    parser.add_argument("--sizes", default="1,10,100,1000,5000", help="buy_amount testés (WPOL)")
+    args = parser.parse_args()
+
+    print(f"Router simulé : {bench_router(args.swaps):,.0f} swaps/s")
+
+    # Blocs minés à chaque transaction : le reçu est disponible immédiatement
+    paper = PaperChain("paper://bench", SimulatedNetwork(block_time=0))
+    print(f"Cycle de trade paper://   : {asyncio.run(trade_cycles(paper, args.trades)):,.0f} trades/s")
+    server = serve(RPC_PORT, chain=SimulatedNetwork(block_time=0))
+    try:
+        http = AsyncChain(f"http://127.0.0.1:{RPC_PORT}")
+        http.limiter.rate = http.limiter.burst = 1e9
+        print(f"Cycle de trade HTTP local : {asyncio.run(trade_cycles(http, args.trades)):,.0f} trades/s")
+    finally:
+        server.shutdown()
+
+    simulator = create_simulator()
+    print("\nImpact de prix (achat WPOL → KNO, frais du pool compris) :")
+    for size in (float(value) for value in args.sizes.split(",")):
+        impact = simulator.price_impact(to_wei(size), [WPOL, KNO])
+        print(f"  buy_amount {size:>8g} WPOL : {impact * 100:6.3f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark : débit du backtest vectorisé (backtest.py) face à une boucle par tick.
+
+Les deux rejouent la même marche aléatoire avec `band_signal` et doivent produire
+les mêmes trades.
+
+Usage :
+    python benchmarks/bench_backtest.py [--ticks 10000000] [--volatility 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestConfig, run_backtest
+from strategy import BUY, SELL, band_signal
+
+
+def loop_backtest(prices, config: BacktestConfig, tick_seconds: float = 60):
+    """Version naïve : une évaluation de la stratégie par tick"""
+    volatility = config.volatility_percent / 100
+    cost = (config.fee_percent + config.slippage_percent) / 100
+    reference, quote, kno, last = prices[0], config.initial_quote, config.initial_kno, None
+    fills = []
+    for tick, price in enumerate(prices.tolist()):
+        if last is not None and tick * tick_seconds - last < config.trade_cooldown:
+            continue
+        signal = band_signal(price, reference, volatility)
+        if signal == BUY and quote >= config.buy_amount:
+            quote -= config.buy_amount
+            kno += config.buy_amount * (1 - cost) / price
+        elif signal == SELL and kno >= config.min_swap_amount:
+            amount = min(config.sell_amount, kno)
+            kno -= amount
+            quote += amount * price * (1 - cost)
+        else:
+            continue
+        fills.append((tick, signal))
+        reference, last = price, tick * tick_seconds
+    return fills
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=10_000_000)
+    parser.add_argument("--loop-ticks", type=int, default=500_000)
+    parser.add_argument("--volatility", type=float, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    prices = np.exp(np.cumsum(rng.normal(0, 0.002, args.ticks)))
+    config = BacktestConfig(volatility_percent=args.volatility, buy_amount=5, sell_amount=5,
+                            initial_quote=100, initial_kno=50)
+
+    start = time.perf_counter()
+    result = run_backtest(prices, config)
+    elapsed = time.perf_counter() - start
+    summary = result.summary()
+    print(f"vectorisé : {args.ticks / elapsed / 1e6:.1f} M ticks/s ({summary['buys']} achats, "
+          f"{summary['sells']} ventes, PnL {summary['pnl']:.2f}, drawdown max {summary['max_drawdown']:.2f})")
+
+    sample = prices[:args.loop_ticks]
+    start = time.perf_counter()
+    fills = loop_backtest(sample, config)
+    elapsed = time.perf_counter() - start
+    expected = run_backtest(sample, config).fills
+    same = fills == [(int(tick), int(side)) for tick, side in zip(expected["tick"], expected["side"])]
+    print(f"boucle    : {len(sample) / elapsed / 1e6:.2f} M ticks/s, trades identiques : {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Benchmark : un processus par bot ou bots regroupés dans un worker (bot_runner.py).
+
+Démarre N bots contre un dashboard et un RPC simulés, puis mesure :
+- la latence de démarrage (commande → statut "active" reçu par le dashboard),
+- la mémoire résidente totale des processus de bots (/proc, Linux).
+
+Usage :
+    python benchmarks/bench_bot_runner.py [--bots 10] [--mode both|subprocess|worker]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from eth_account import Account
+
+from stub_rpc_server import serve
+
+API_PORT = 8611
+RPC_PORT = 8612
+
+# Configuration renvoyée par /kno-config
+BOT_CONFIG = {
+    "volatility_percent": 50, "buy_amount": 0.01, "sell_amount": 0.01,
+    "reference_price": 1.0, "rpc_endpoint": f"http://127.0.0.1:{RPC_PORT}",
+}
+
+# Horodatage du statut "active" reçu, par bot
+active_at = {}
+
+
+class FakeDashboard(BaseHTTPRequestHandler):
+    """Routes du dashboard utilisées par trading_bot.py"""
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip("/").split("/")
+        if url.path == "/kno/price":
+            return self._json({"price_eur": 1.0, "source": "bench"})
+        bot_id = int(parts[1])
+        if parts[-1] == "kno-config":
+            if self.headers.get("If-None-Match"):
+                # Long-poll sans changement
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+                time.sleep(min(wait, 2))
+                self.send_response(304)
+                self.end_headers()
+                return
+            return self._json(BOT_CONFIG, headers={"ETag": '"1"'})
+        if parts[-1] == "wallet-config":
+            # Même forme que get_bot_wallet_config (main.py) : un dict, clé dans wallet_private_key
+            account = Account.from_key(bytes([bot_id % 250 + 1]) * 32)
+            return self._json({
+                **BOT_CONFIG,
+                "wallet_address": account.address,
+                "wallet_private_key": account.key.hex(),
+                "wpol_address": None, "kno_address": None, "router_address": None,
+                "slippage_tolerance": 1, "gas_limit": 500000, "gas_price": 40, "min_swap_amount": 0.01,
+            })
+        return self._json({})
+
+    def do_PUT(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        parts = self.path.strip("/").split("/")
+        if parts[-1] == "status" and body.get("status") == "active":
+            active_at.setdefault(int(parts[1]), time.perf_counter())
+        return self._json({})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        return self._json({}, status=201)
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def wait_active(bot_ids, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and not all(bot_id in active_at for bot_id in bot_ids):
+        time.sleep(0.01)
+
+
+def run_subprocess(bot_ids, api_url):
+    started, processes = {}, []
+    for bot_id in bot_ids:
+        env = dict(os.environ, BOT_ID=str(bot_id), API_URL=api_url)
+        started[bot_id] = time.perf_counter()
+        processes.append(subprocess.Popen([sys.executable, "trading_bot.py"], cwd=BACKEND, env=env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    wait_active(bot_ids)
+    rss = sum(rss_mb(p.pid) for p in processes)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+    return started, rss
+
+
+def run_worker(bot_ids, api_url):
+    from bot_runner import WorkerPool
+
+    pool = WorkerPool(api_url, size=1)
+    # Worker lancé et chargé une fois (comme après le premier bot)
+    warmup = max(bot_ids) + 1
+    pool.start_bot(warmup)
+    wait_active([warmup])
+
+    started = {}
+    for bot_id in bot_ids:
+        started[bot_id] = time.perf_counter()
+        pool.start_bot(bot_id)
+    wait_active(bot_ids)
+    rss = sum(rss_mb(worker.pid) for worker in pool.workers if worker)
+    pool.close()
+    return started, rss
+
+
+def report(name, started, rss, count):
+    latencies = [active_at[bot_id] - started[bot_id] for bot_id in started if bot_id in active_at]
+    print(f"{name:>10} : {len(latencies)}/{count} bots actifs, démarrage médian "
+          f"{statistics.median(latencies) * 1000:.0f} ms, max {max(latencies) * 1000:.0f} ms, "
+          f"RSS total {rss:.0f} Mo ({rss / count:.1f} Mo/bot)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bots", type=int, default=10)
+    parser.add_argument("--mode", choices=["both", "subprocess", "worker"], default="both")
+    args = parser.parse_args()
+
+    os.environ["CONFIG_LONG_POLL"] = "2"
+    # Mesurer le runner et non le limiteur de débit RPC (8 requêtes/s par défaut)
+    os.environ.setdefault("RPC_RATE", "1000")
+    os.environ.setdefault("RPC_BURST", "1000")
+    os.environ.setdefault("RPC_LIMITER_DIR", os.path.join(tempfile.gettempdir(), "kno_bench_limiter"))
+    api = ThreadingHTTPServer(("127.0.0.1", API_PORT), FakeDashboard)
+    api.daemon_threads = True
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+    rpc = serve(RPC_PORT, block_time=0.5)
+    api_url = f"http://127.0.0.1:{API_PORT}"
+
+    if args.mode in ("both", "subprocess"):
+        bot_ids = list(range(1, args.bots + 1))
+        report("subprocess", *run_subprocess(bot_ids, api_url), args.bots)
+    if args.mode in ("both", "worker"):
+        bot_ids = list(range(1001, 1001 + args.bots))
+        report("worker", *run_worker(bot_ids, api_url), args.bots)
+
+    rpc.shutdown()
+    api.shutdown()
+
+
+if __name__ == "__main__":
+    main()
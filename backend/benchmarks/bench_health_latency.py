@@ -0,0 +1,94 @@
+"""Benchmark : latence p99 de /health pendant des récupérations de prix lentes.
+
+Compare deux amonts GeckoTerminal simulés avec la même latence :
+- "bloquant" : appel synchrone (comportement de l'ancien `requests.get`),
+- "async"    : client httpx partagé (http_client.AsyncHTTPClient).
+
+Usage :
+    python benchmarks/bench_health_latency.py [--upstream-delay 1.0] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/bench_trading_bots.db")
+
+import logging
+
+import httpx
+
+import main
+from http_client import AsyncHTTPClient
+from price_service import price_service
+
+logging.disable(logging.INFO)
+
+GECKO_PAYLOAD = {"data": {"attributes": {"base_token_price_usd": "0.0115"}}}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(name, fetcher, upstream_delay, duration, health_rate):
+    price_service.fetcher = fetcher
+    price_service.ttl = 0  # chaque appel /kno/price est un cache miss
+    transport = httpx.ASGITransport(app=main.app)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop_at = time.perf_counter() + duration
+
+        async def price_load():
+            while time.perf_counter() < stop_at:
+                await client.get("/kno/price")
+
+        async def health_probe():
+            # Charge en boucle ouverte : la latence est mesurée depuis l'instant
+            # prévu de la requête, pour compter le temps où la boucle était bloquée
+            planned = time.perf_counter()
+            while planned < stop_at:
+                await asyncio.sleep(max(0.0, planned - time.perf_counter()))
+                response = await client.get("/health")
+                latencies.append((time.perf_counter() - planned) * 1000)
+                assert response.status_code == 200
+                planned += 1 / health_rate
+
+        await asyncio.gather(price_load(), price_load(), health_probe())
+
+    print(f"{name:<9} upstream={upstream_delay:.2f}s  /health n={len(latencies):<5} "
+          f"p50={statistics.median(latencies):8.2f} ms  p99={percentile(latencies, 99):8.2f} ms  "
+          f"max={max(latencies):8.2f} ms")
+
+
+async def main_async(args):
+    async def blocking_fetcher():
+        time.sleep(args.upstream_delay)
+        return {"price_eur": 0.01, "price_usd": 0.0115, "source": "bench"}
+
+    async def slow_upstream(request):
+        await asyncio.sleep(args.upstream_delay)
+        return httpx.Response(200, json=GECKO_PAYLOAD)
+
+    price_service.http_client = AsyncHTTPClient(transport=httpx.MockTransport(slow_upstream))
+
+    await run_scenario("idle", lambda: asyncio.sleep(0, {"price_eur": 0.01}), 0, args.duration / 2, args.health_rate)
+    await run_scenario("bloquant", blocking_fetcher, args.upstream_delay, args.duration, args.health_rate)
+    await run_scenario("async", price_service._fetch_default, args.upstream_delay, args.duration, args.health_rate)
+    await price_service.http_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upstream-delay", type=float, default=1.0, help="Latence simulée de GeckoTerminal (s)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Durée de chaque scénario (s)")
+    parser.add_argument("--health-rate", type=float, default=50.0, help="Requêtes /health par seconde")
+    asyncio.run(main_async(parser.parse_args()))
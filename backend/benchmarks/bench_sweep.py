@@ -0,0 +1,57 @@
+"""Benchmark : recherche de paramètres (sweep.py) sur un an de prix à la minute.
+
+Tire N combinaisons aléatoires de volatility_percent, buy_amount, sell_amount,
+min_swap_amount et trade_cooldown, les backteste sur le pool de processus et
+affiche le débit ainsi que le temps estimé pour 10 000 combinaisons.
+
+Usage :
+    python benchmarks/bench_sweep.py [--combinations 2000] [--workers N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import BacktestConfig
+from sweep import SWEEP_WORKERS, random_combinations, run_sweep
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+
+SPACE = {
+    "volatility_percent": {"min": 0.5, "max": 15},
+    "buy_amount": {"min": 1, "max": 20},
+    "sell_amount": {"min": 1, "max": 20},
+    "min_swap_amount": [0.01, 0.1, 1],
+    "trade_cooldown": [60, 300, 900, 3600],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--combinations", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    prices = np.exp(np.cumsum(rng.normal(0, 0.001, MINUTES_PER_YEAR)))
+    combinations = random_combinations(SPACE, args.combinations, seed=7)
+    base = BacktestConfig(initial_quote=500, initial_kno=500)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_sweep(prices, base, combinations, workers=args.workers))
+    elapsed = time.perf_counter() - start
+    rate = len(results) / elapsed
+    print(f"{len(results)} combinaisons × {MINUTES_PER_YEAR} ticks en {elapsed:.1f}s avec {args.workers} processus "
+          f"({rate:.0f} combinaisons/s, 10 000 combinaisons ≈ {10000 / rate / 60:.1f} min)")
+    best = results[0]
+    print(f"meilleure : {best['params']} → PnL {best['pnl']:.2f}, drawdown max {best['max_drawdown']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Micro-benchmark : débit de /bots/{id}/kno-config et /wallet-config.
+
+Compare, sur les mêmes bots (wallet chiffré) :
+- "avant" : dérivation PBKDF2 (100 000 itérations) à chaque déchiffrement,
+- "après" : clé dérivée une fois par processus + cache des clés déchiffrées.
+
+Les requêtes passent par l'application FastAPI complète (transport ASGI httpx,
+sans réseau), comme les appels load_config() des bots à chaque cycle.
+
+    python benchmarks/bench_wallet_config.py --bots 20 --requests 400
+"""
+
+import argparse
+import asyncio
+import base64
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/bench_wallet_config.db")
+
+import httpx
+from cryptography.fernet import Fernet
+
+import main
+from database import Base, SessionLocal, engine
+from models import Bot, User
+from wallet_security import WalletSecurity
+
+logging.disable(logging.ERROR)
+
+PRIVATE_KEY = "0x" + "ab" * 32
+WALLET_ADDRESS = "0x" + "12" * 20
+
+
+class LegacyWalletSecurity(WalletSecurity):
+    """Comportement d'origine : PBKDF2 à chaque appel, pas de cache"""
+
+    def decrypt_bot_private_key(self, bot_id, encrypted_private_key):
+        if not encrypted_private_key:
+            return ""
+        fernet = Fernet(self._get_encryption_key())
+        return fernet.decrypt(base64.urlsafe_b64decode(encrypted_private_key.encode())).decode()
+
+
+def setup_bots(count, security):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = db.query(User).first()
+        if not user:
+            user = User(email="bench@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+        encrypted = security.encrypt_private_key(PRIVATE_KEY)
+        bots = db.query(Bot).filter(Bot.name.like("bench-wallet-%")).all()
+        for i in range(len(bots), count):
+            bots.append(Bot(name=f"bench-wallet-{i}", user_id=user.id, wallet_address=WALLET_ADDRESS))
+            db.add(bots[-1])
+        for bot in bots:
+            bot.wallet_private_key_encrypted = encrypted
+        db.commit()
+        return [bot.id for bot in bots[:count]]
+    finally:
+        db.close()
+
+
+async def run(bot_ids, requests, concurrency):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(i):
+            bot_id = bot_ids[i % len(bot_ids)]
+            path = "kno-config" if i % 2 == 0 else "wallet-config"
+            async with semaphore:
+                response = await client.get(f"/bots/{bot_id}/{path}")
+            assert response.status_code == 200 and response.json()["wallet_private_key"] == PRIVATE_KEY
+
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(i) for i in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bots", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    security = WalletSecurity()
+    bot_ids = setup_bots(args.bots, security)
+
+    results = {}
+    for label, candidate in (("avant", LegacyWalletSecurity()), ("après", security)):
+        main.wallet_security = candidate
+        asyncio.run(run(bot_ids, min(args.requests, 20), args.concurrency))  # échauffement
+        results[label] = asyncio.run(run(bot_ids, args.requests, args.concurrency))
+        print(f"{label:6s} {results[label]:10.1f} requêtes/s")
+
+    print(f"gain   {results['après'] / results['avant']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main_bench()
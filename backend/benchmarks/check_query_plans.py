@@ -0,0 +1,129 @@
+"""Contrôle de non-régression des plans d'exécution sur la table transactions.
+
+Appelle les endpoints qui lisent les transactions, capture le SQL réellement
+émis puis l'analyse avec EXPLAIN. Le script échoue (code de sortie 1) si une
+requête parcourt toute la table transactions au lieu d'utiliser un index.
+
+Usage :
+    python benchmarks/check_query_plans.py            # SQLite temporaire
+    DATABASE_URL=mysql+pymysql://... python benchmarks/check_query_plans.py
+"""
+
+import logging
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if "DATABASE_URL" not in os.environ:
+    db_path = os.path.join(tempfile.mkdtemp(), "query_plans.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from database import SessionLocal, async_engine, engine
+from models import Bot, Transaction, User
+
+logging.disable(logging.INFO)
+
+TRANSACTIONS_PER_BOT = 2000
+
+
+def seed():
+    db = SessionLocal()
+    try:
+        user = db.query(User).first()
+        if not user:
+            user = User(email="plans@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+        bots = [Bot(name=f"plan-{i}", user_id=user.id) for i in range(3)]
+        db.add_all(bots)
+        db.commit()
+        now = datetime.utcnow()
+        for bot in bots:
+            db.bulk_save_objects([
+                Transaction(
+                    bot_id=bot.id,
+                    type="buy" if i % 2 else "sell",
+                    amount=1.0,
+                    price=0.01,
+                    profit=0.1,
+                    timestamp=now - timedelta(minutes=i),
+                )
+                for i in range(TRANSACTIONS_PER_BOT)
+            ])
+        db.commit()
+        return bots[0].id
+    finally:
+        db.close()
+
+
+def capture_queries(bot_id):
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "transactions" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        with TestClient(main.app) as client:
+            for path in (
+                f"/bots/{bot_id}/transactions",
+                "/transactions",
+                f"/bots/{bot_id}/dashboard-stats",
+                "/stats",
+            ):
+                response = client.get(path)
+                assert response.status_code == 200, f"{path}: {response.status_code}"
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return captured
+
+
+def full_scans(conn, statement, parameters):
+    """Retourne les lignes du plan qui parcourent toute la table transactions"""
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        details = [row[-1] for row in rows]
+        return [d for d in details if d.startswith("SCAN transactions") and "INDEX" not in d]
+    if dialect == "mysql":
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().fetchall()
+        return [str(dict(row)) for row in rows if row["table"] == "transactions" and row["type"] == "ALL"]
+    if dialect == "postgresql":
+        # Sur une petite table le planificateur préfère le seq scan : on l'interdit
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).fetchall()
+        return [row[0] for row in rows if "Seq Scan on transactions" in row[0]]
+    raise SystemExit(f"Dialecte non supporté: {dialect}")
+
+
+def main_check():
+    main.Base.metadata.create_all(bind=engine)
+    bot_id = seed()
+    queries = capture_queries(bot_id)
+    failures = 0
+
+    with engine.connect() as conn:
+        for statement, parameters in queries:
+            scans = full_scans(conn, statement, parameters)
+            summary = " ".join(statement.split())[:110]
+            if scans:
+                failures += 1
+                print(f"❌ {summary}")
+                for line in scans:
+                    print(f"     {line}")
+            else:
+                print(f"✅ {summary}")
+
+    print(f"{len(queries)} requêtes analysées, {failures} parcours complet(s) de transactions")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_check())
@@ -0,0 +1,76 @@
+"""Serveur JSON-RPC local simulant Polygon pour tester les bots sans réseau.
+
+Expose en HTTP le réseau simulé d'amm_simulator.py (sous-ensemble utilisé par
+trading_bot.py / chain.py : eth_call, eth_sendRawTransaction, reçus, feeHistory...).
+Les requêtes groupées (batch) sont acceptées.
+
+Les balances ERC20 sont créditées à la première lecture (PAPER_INITIAL_BALANCE) et
+les swaps suivent le pool à produit constant du simulateur (frais 0,3 %). Sans
+latence réseau à mesurer, `paper://` fait la même chose dans le processus du bot.
+
+    python benchmarks/stub_rpc_server.py --port 8545 --latency 0.05
+    POLYGON_RPC_URL=http://127.0.0.1:8545 WEB3_MODE=async python trading_bot.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amm_simulator import SimulatedNetwork as StubChain
+
+
+def make_handler(chain: StubChain, latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if latency:
+                time.sleep(latency)
+            if isinstance(body, list):
+                payload = [chain.answer(request) for request in body]
+            else:
+                payload = chain.answer(body)
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def serve(port: int = 8545, latency: float = 0.0, block_time: float = 2.0,
+          chain: "StubChain" = None) -> ThreadingHTTPServer:
+    """
+    Démarre le serveur dans un thread et le retourne (server.shutdown() pour l'arrêter)
+
+    Passer le même `chain` à plusieurs serveurs simule plusieurs endpoints d'un même réseau.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(chain or StubChain(block_time), latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur JSON-RPC Polygon simulé")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence ajoutée à chaque requête (secondes)")
+    parser.add_argument("--block-time", type=float, default=2.0)
+    args = parser.parse_args()
+    chain = StubChain(args.block_time)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(chain, args.latency))
+    print(f"✅ RPC simulé sur http://127.0.0.1:{args.port} (chainId {chain.chain_id})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -208,6 +208,15 @@ import logging
 import threading
 import sys
 from utils import get_current_price
+from bot_runner import WorkerPool
+from supervisor import Supervisor
+from log_pipeline import LOG_DIR
+
+
+# Exécution des bots : "subprocess" (un interpréteur par bot), "worker"
+# (bots regroupés comme tâches asyncio dans BOT_RUNNER_WORKERS processus, voir bot_runner.py)
+# ou "supervisor" (workers détachés, un par CPU, qui survivent à l'API, voir supervisor.py)
+BOT_RUNNER = os.getenv("BOT_RUNNER", "subprocess")
 
 
 logging.basicConfig(level=logging.INFO)
@@ -218,17 +227,42 @@ class BotManager:
         self.running_bots: Dict[int, subprocess.Popen] = {}
         self.bot_configs_dir = "bot_configs"
         self.bot_info: Dict[int, dict] = {}
+        self.mode = BOT_RUNNER
+        self.api_url = os.getenv("API_URL_LOCAL") or "http://127.0.0.1:3000"
+        self.workers = WorkerPool(self.api_url) if self.mode == "worker" else None
+        self.supervisor = Supervisor(self.api_url) if self.mode == "supervisor" else None
         
         os.makedirs(self.bot_configs_dir, exist_ok=True)
+
+    async def start(self):
+        """Démarrage de l'API : rattachement aux workers du superviseur"""
+        if self.supervisor is not None:
+            await self.supervisor.start()
+
+    async def close(self):
+        """Arrêt de l'API"""
+        if self.supervisor is not None:
+            # Les workers et leurs bots continuent jusqu'au prochain démarrage
+            await self.supervisor.detach()
+        elif self.workers is not None:
+            # Les workers arrêtent proprement leurs bots (BOT_RUNNER=worker)
+            await asyncio.to_thread(self.workers.close)
+
+    def _is_running(self, bot_id: int) -> bool:
+        if self.supervisor is not None:
+            return self.supervisor.is_running(bot_id)
+        if self.workers is not None:
+            return self.workers.is_running(bot_id)
+        return bot_id in self.running_bots
     
     async def start_bot(self, bot: Bot):
         """Démarre un bot de trading"""
-        if bot.id in self.running_bots:
+        if self._is_running(bot.id):
             logger.info(f"Bot {bot.id} déjà en cours d'exécution")
             return
 
         # ⚡ Ici tu peux récupérer le prix actuel
-        current_price = get_current_price(bot.token_pair)
+        current_price = await get_current_price(bot.token_pair)
         logger.info(f"Prix actuel de {bot.token_pair}: {current_price}")
 
         self.bot_info[bot.id] = {
@@ -240,57 +274,50 @@ class BotManager:
 
         # Créer le fichier de configuration pour le bot
         config_file = self._create_bot_config(bot)
+
+        if self.supervisor is not None:
+            worker = await self.supervisor.start_bot(bot.id)
+            if worker is None:
+                del self.bot_info[bot.id]
+                raise RuntimeError(f"Aucun worker disponible pour le bot {bot.id}")
+            self.bot_info[bot.id]['pid'] = worker.pid
+            logger.info(f"Bot {bot.id} ({bot.name}) démarré dans le worker {worker.index} (PID {worker.pid}, CPU {worker.cpu})")
+            return
+
+        if self.workers is not None:
+            # Tâche asyncio dans un worker déjà lancé : pas de nouvel interpréteur
+            worker = self.workers.start_bot(bot.id)
+            self.bot_info[bot.id]['pid'] = worker.pid
+            logger.info(f"Bot {bot.id} ({bot.name}) démarré dans le worker {worker.index} (PID {worker.pid})")
+            return
         
         command = [sys.executable, "trading_bot.py"]
         
         try:
             env = os.environ.copy()
-            api_url = os.getenv("API_URL_LOCAL") or "http://127.0.0.1:3000"
             env.update({
                 'BOT_ID': str(bot.id),
-                'API_URL': api_url
+                'API_URL': self.api_url
             })
             
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=os.path.dirname(os.path.abspath(__file__)),
-                env=env,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            # Logs structurés via le collecteur de l'API (log_pipeline.py) : la sortie
+            # console du bot (print, erreurs fatales) va dans un fichier, sans thread de lecture
+            os.makedirs(LOG_DIR, exist_ok=True)
+            with open(os.path.join(LOG_DIR, f"bot_{bot.id}.out"), "a") as output:
+                process = subprocess.Popen(
+                    command,
+                    stdin=subprocess.DEVNULL,
+                    stdout=output,
+                    stderr=subprocess.STDOUT,
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                    env=env,
+                )
             
             self.running_bots[bot.id] = process
             self.bot_info[bot.id]['pid'] = process.pid
             
             logger.info(f"Bot {bot.id} ({bot.name}) démarré avec PID {process.pid}")
             
-            def log_output(pipe, logger_func, bot_id):
-                try:
-                    for line in iter(pipe.readline, ''):
-                        if line:
-                            # Utiliser le niveau INFO au lieu de ERROR pour les logs normaux
-                            if "ERROR" in line:
-                                logger_func(f"BOT_{bot_id}: {line.strip()}")
-                            else:
-                                logging.info(f"BOT_{bot_id}: {line.strip()}")
-                except Exception as e:
-                    logger.error(f"Erreur lecture sortie bot {bot_id}: {e}")
-            
-            threading.Thread(
-                target=log_output, 
-                args=(process.stdout, logger.info, bot.id),
-                daemon=True
-            ).start()
-            
-            threading.Thread(
-                target=log_output, 
-                args=(process.stderr, logger.error, bot.id),
-                daemon=True
-            ).start()
-            
         except Exception as e:
             logger.error(f"Erreur lors du démarrage du bot {bot.id}: {str(e)}")
             if bot.id in self.bot_info:
@@ -299,6 +326,20 @@ class BotManager:
     
     async def stop_bot(self, bot_id: int):
         """Arrête un bot de trading"""
+        if self.supervisor is not None or self.workers is not None:
+            bot_name = self.bot_info.get(bot_id, {}).get('name', 'Unknown')
+            logger.info(f"Arrêt du bot {bot_id} ({bot_name})")
+            if self.supervisor is not None:
+                stopped = await self.supervisor.stop_bot(bot_id)
+            else:
+                stopped = await asyncio.to_thread(self.workers.stop_bot, bot_id)
+            if stopped:
+                logger.info(f"Bot {bot_id} arrêté proprement")
+            else:
+                logger.warning(f"Bot {bot_id} : pas de confirmation d'arrêt du worker")
+            self.bot_info.pop(bot_id, None)
+            return
+
         if bot_id not in self.running_bots:
             logger.info(f"Bot {bot_id} non trouvé dans les processus en cours")
             return
@@ -374,6 +415,12 @@ class BotManager:
     
     def get_bot_status(self, bot_id: int) -> str:
         """Retourne le statut d'un bot"""
+        if self.supervisor is not None or self.workers is not None:
+            if self._is_running(bot_id):
+                return "running"
+            self.bot_info.pop(bot_id, None)
+            return "stopped"
+
         if bot_id not in self.running_bots:
             return "stopped"
         
@@ -388,6 +435,15 @@ class BotManager:
     
     def stop_all_bots(self):
         """Arrête tous les bots en cours d'exécution"""
+        if self.supervisor is not None:
+            # Workers détachés : arrêt explicite avec `python supervisor.py stop`
+            logger.info("Bots conservés dans les workers du superviseur")
+            return
+        if self.workers is not None:
+            # Chaque worker arrête ses bots à la fermeture de son entrée standard
+            self.workers.close()
+            self.bot_info.clear()
+            return
         for bot_id in list(self.running_bots.keys()):
             try:
                 asyncio.run(self.stop_bot(bot_id))
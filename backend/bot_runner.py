@@ -0,0 +1,372 @@
+"""Runner en processus : plusieurs bots dans un même processus worker.
+
+Au lieu d'un interpréteur Python par bot (web3 réimporté, connexions RPC propres,
+deux threads de lecture des logs), un worker héberge les `KNOTradingBot` comme
+tâches asyncio :
+
+- accès blockchain partagés par endpoint (`chain.get_shared_chain` : sessions,
+  santé du pool RPC et oracle de gas communs), prix KNO mis en cache pour le processus,
+- une erreur dans un bot arrête ce bot seulement,
+- démarrage d'un bot = création d'une tâche (quelques millisecondes).
+
+Le BotManager de l'API pilote BOT_RUNNER_WORKERS workers (BOT_RUNNER=worker) :
+commandes JSON sur l'entrée standard du worker, événements JSON sur sa sortie
+standard. Les logs des bots partent vers le collecteur de l'API (log_pipeline.py),
+la sortie d'erreur ne reçoit plus que les print() et les erreurs fatales.
+
+Avec BOT_RUNNER=supervisor (supervisor.py), le worker est détaché de l'API et
+reçoit ses commandes sur un socket Unix : il survit au redémarrage de l'API.
+
+Usage (lancé par BotManager ou le superviseur) :
+    python bot_runner.py [--socket /chemin/worker.sock]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Set
+
+from log_pipeline import current_bot, install as install_log_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Nombre de processus workers pour les bots (BOT_RUNNER=worker)
+BOT_RUNNER_WORKERS = int(os.getenv("BOT_RUNNER_WORKERS", "1"))
+# Threads du worker pour les appels bloquants des bots (long-poll de config, dashboard...)
+BOT_RUNNER_THREADS = int(os.getenv("BOT_RUNNER_THREADS", "64"))
+# Attente de l'arrêt propre d'un bot avant annulation de sa tâche (secondes)
+BOT_STOP_TIMEOUT = float(os.getenv("BOT_STOP_TIMEOUT", "5"))
+
+
+# --- CÔTÉ WORKER ---
+class BotRunner:
+    def __init__(self, api_url: str, emit: Callable[[dict], None]):
+        """
+        Bots hébergés dans la boucle d'événements du worker
+
+        Args:
+            api_url: URL de l'API du dashboard
+            emit: Envoi d'un événement au BotManager
+        """
+        self.api_url = api_url
+        self.emit = emit
+        self.bots: Dict[int, object] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def start_bot(self, bot_id: int):
+        from trading_bot import KNOTradingBot
+
+        if bot_id in self.tasks:
+            logger.info(f"Bot {bot_id} déjà en cours d'exécution")
+            return
+        bot = KNOTradingBot(bot_id, self.api_url, shared_chain=True)
+        self.bots[bot_id] = bot
+        self.tasks[bot_id] = asyncio.create_task(self._run(bot), name=f"bot_{bot_id}")
+        self.emit({"event": "started", "bot_id": bot_id})
+
+    async def _run(self, bot):
+        # Logs de la tâche (et de ses asyncio.to_thread) attribués au bot
+        current_bot.set(bot.bot_id)
+        error = None
+        try:
+            await bot.start()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            # Isolation : seul ce bot s'arrête
+            error = str(e)
+            logger.exception(f"Bot {bot.bot_id} arrêté sur erreur")
+        finally:
+            self.bots.pop(bot.bot_id, None)
+            self.tasks.pop(bot.bot_id, None)
+            self.emit({"event": "stopped", "bot_id": bot.bot_id, "error": error})
+
+    async def stop_bot(self, bot_id: int, timeout: float = BOT_STOP_TIMEOUT):
+        """Demande l'arrêt du bot, puis annule sa tâche s'il ne s'arrête pas à temps"""
+        task = self.tasks.get(bot_id)
+        if task is None:
+            self.emit({"event": "stopped", "bot_id": bot_id, "error": None})
+            return
+        self.bots[bot_id].stop()
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        if not done:
+            # Long-poll de configuration en cours : on n'attend pas sa fin
+            task.cancel()
+            await asyncio.wait({task})
+
+    async def stop_all(self):
+        await asyncio.gather(*(self.stop_bot(bot_id) for bot_id in list(self.tasks)))
+
+    async def handle(self, command: dict):
+        action = command.get("cmd")
+        bot_id = command.get("bot_id")
+        try:
+            if action == "start":
+                self.start_bot(int(bot_id))
+            elif action == "stop":
+                await self.stop_bot(int(bot_id))
+            else:
+                logger.warning(f"Commande inconnue: {command}")
+        except Exception as e:
+            logger.exception(f"Commande {action} du bot {bot_id} échouée")
+            if bot_id is not None and int(bot_id) not in self.tasks:
+                self.emit({"event": "stopped", "bot_id": int(bot_id), "error": str(e)})
+
+
+async def serve_worker(api_url: str, events):
+    """Boucle du worker : lit les commandes sur stdin jusqu'à sa fermeture"""
+    from chain import close_shared_chains
+
+    loop = asyncio.get_running_loop()
+    # Chaque bot occupe un thread pendant son long-poll de configuration
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=BOT_RUNNER_THREADS))
+
+    def emit(event: dict):
+        events.write(json.dumps(event) + "\n")
+        events.flush()
+
+    runner = BotRunner(api_url, emit)
+    pending = set()
+    emit({"event": "ready", "pid": os.getpid()})
+    while True:
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            break  # BotManager arrêté ou stdin fermé
+        try:
+            command = json.loads(line)
+        except ValueError:
+            logger.warning(f"Commande illisible: {line.strip()}")
+            continue
+        # Un arrêt (jusqu'à BOT_STOP_TIMEOUT) ne bloque pas les autres commandes
+        task = asyncio.create_task(runner.handle(command))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    await runner.stop_all()
+    await close_shared_chains()
+
+
+async def serve_socket(api_url: str, path: str):
+    """
+    Worker détaché : une commande JSON par ligne sur le socket Unix, une réponse par ligne
+
+    Commandes : start, stop (bot_id), status, shutdown. Chaque réponse contient les bots en cours.
+    """
+    from chain import close_shared_chains
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=BOT_RUNNER_THREADS))
+    runner = BotRunner(api_url, lambda event: logger.info(f"Événement: {event}"))
+    stopping = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+
+    async def client(reader, writer):
+        try:
+            while line := await reader.readline():
+                command = json.loads(line)
+                if command.get("cmd") == "shutdown":
+                    stopping.set()
+                elif command.get("cmd") != "status":
+                    await runner.handle(command)
+                reply = {"pid": os.getpid(), "bots": sorted(runner.tasks)}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ValueError, ConnectionError) as e:
+            logger.warning(f"Connexion de contrôle interrompue: {e}")
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(client, path)
+    logger.info(f"Worker prêt sur {path} (PID {os.getpid()})")
+    await stopping.wait()
+
+    server.close()
+    await runner.stop_all()
+    await close_shared_chains()
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def worker_main():
+    parser = argparse.ArgumentParser(description="Worker hébergeant plusieurs bots")
+    parser.add_argument("--socket", help="Socket Unix de contrôle (mode superviseur)")
+    args = parser.parse_args()
+
+    api_url = os.getenv("API_URL", "http://127.0.0.1:3000")
+    if args.socket:
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        install_log_pipeline()
+        asyncio.run(serve_socket(api_url, args.socket))
+        return
+
+    # stdout est réservé aux événements : les print() des bots partent sur stderr
+    events = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    sys.stdout = sys.stderr
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    install_log_pipeline()
+    asyncio.run(serve_worker(api_url, events))
+
+
+# --- CÔTÉ BOTMANAGER ---
+class RunnerWorker:
+    def __init__(self, index: int, api_url: str):
+        """
+        Processus worker piloté par le BotManager
+
+        Args:
+            index: Numéro du worker (logs)
+            api_url: URL de l'API transmise aux bots
+        """
+        self.index = index
+        self.bot_ids: Set[int] = set()
+        self._stopped: Dict[int, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._closing = False
+
+        env = os.environ.copy()
+        env["API_URL"] = api_url
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=env,
+            text=True,
+            bufsize=1,
+        )
+        # Deux threads par worker (et non plus par bot) : événements et logs
+        threading.Thread(target=self._read_events, daemon=True).start()
+        threading.Thread(target=self._pump_logs, daemon=True).start()
+        logger.info(f"Worker de bots {index} démarré avec PID {self.process.pid}")
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _send(self, command: dict):
+        with self._lock:
+            self.process.stdin.write(json.dumps(command) + "\n")
+            self.process.stdin.flush()
+
+    def start_bot(self, bot_id: int):
+        self._stopped[bot_id] = threading.Event()
+        self.bot_ids.add(bot_id)
+        self._send({"cmd": "start", "bot_id": bot_id})
+
+    def stop_bot(self, bot_id: int, timeout: float = BOT_STOP_TIMEOUT + 5) -> bool:
+        """Arrête un bot et attend sa fin (bloquant : à appeler dans un thread)"""
+        stopped = self._stopped.setdefault(bot_id, threading.Event())
+        if self.alive():
+            self._send({"cmd": "stop", "bot_id": bot_id})
+            stopped.wait(timeout)
+        self.bot_ids.discard(bot_id)
+        return stopped.is_set() or not self.alive()
+
+    def close(self, timeout: float = BOT_STOP_TIMEOUT + 5):
+        """Ferme stdin : le worker arrête tous ses bots puis se termine"""
+        self._closing = True
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            logger.warning(f"Worker de bots {self.index} ne répond pas, kill forcé")
+            self.process.kill()
+            self.process.wait()
+        self.bot_ids.clear()
+
+    def _read_events(self):
+        for line in iter(self.process.stdout.readline, ''):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                logging.info(f"WORKER_{self.index}: {line.strip()}")
+                continue
+            if event.get("event") == "stopped":
+                bot_id = event["bot_id"]
+                self.bot_ids.discard(bot_id)
+                self._stopped.setdefault(bot_id, threading.Event()).set()
+                if event.get("error"):
+                    logger.error(f"Bot {bot_id} arrêté sur erreur: {event['error']}")
+        # Fin du processus : plus aucun bot ne tourne dans ce worker
+        for event in self._stopped.values():
+            event.set()
+        self.bot_ids.clear()
+        code = self.process.wait()
+        if not self._closing:
+            logger.warning(f"Worker de bots {self.index} terminé de façon inattendue (code {code})")
+
+    def _pump_logs(self):
+        try:
+            for line in iter(self.process.stderr.readline, ''):
+                if not line:
+                    continue
+                if "ERROR" in line:
+                    logger.error(f"WORKER_{self.index}: {line.strip()}")
+                else:
+                    logging.info(f"WORKER_{self.index}: {line.strip()}")
+        except Exception as e:
+            logger.error(f"Erreur lecture sortie worker {self.index}: {e}")
+
+
+class WorkerPool:
+    def __init__(self, api_url: str, size: int = BOT_RUNNER_WORKERS):
+        """
+        Workers de bots, démarrés au premier bot (et relancés s'ils meurent)
+
+        Args:
+            api_url: URL de l'API transmise aux bots
+            size: Nombre maximal de workers
+        """
+        self.api_url = api_url
+        self.workers: list = [None] * max(size, 1)
+        self.assignments: Dict[int, RunnerWorker] = {}
+
+    def _pick(self) -> RunnerWorker:
+        """Worker le moins chargé (un worker mort est relancé)"""
+        for index, worker in enumerate(self.workers):
+            if worker is None or not worker.alive():
+                self.workers[index] = RunnerWorker(index, self.api_url)
+        return min(self.workers, key=lambda worker: len(worker.bot_ids))
+
+    def start_bot(self, bot_id: int) -> RunnerWorker:
+        worker = self._pick()
+        worker.start_bot(bot_id)
+        self.assignments[bot_id] = worker
+        return worker
+
+    def stop_bot(self, bot_id: int) -> bool:
+        worker = self.assignments.pop(bot_id, None)
+        return worker.stop_bot(bot_id) if worker else True
+
+    def is_running(self, bot_id: int) -> bool:
+        worker = self.assignments.get(bot_id)
+        if worker is None:
+            return False
+        if worker.alive() and bot_id in worker.bot_ids:
+            return True
+        del self.assignments[bot_id]
+        return False
+
+    def close(self):
+        for worker in self.workers:
+            if worker is not None:
+                worker.close()
+        self.assignments.clear()
+
+
+if __name__ == "__main__":
+    worker_main()
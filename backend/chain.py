@@ -0,0 +1,333 @@
+"""Accès à la blockchain Polygon pour les bots de trading.
+
+Deux implémentations avec la même interface asynchrone :
+- AsyncChain : AsyncWeb3 + session aiohttp partagée (keep-alive). Les lectures
+  indépendantes peuvent être lancées en parallèle avec asyncio.gather.
+- SyncChain  : Web3 synchrone (requests.Session), chaque appel exécuté dans un
+  thread pour ne pas bloquer la boucle d'événements du bot.
+
+Le choix se fait avec WEB3_MODE=async|sync (async par défaut).
+
+Chaque requête passe par le limiteur de débit partagé de l'endpoint (rpc_limiter.py).
+Avec plusieurs endpoints, `create_chain` renvoie un pool (rpc_pool.py) qui répartit
+les appels entre eux. Un endpoint `paper://<nom>` donne un accès de trading papier
+sur le pool simulé en mémoire (amm_simulator.py).
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from eth_account import Account
+from web3 import AsyncHTTPProvider, AsyncWeb3, HTTPProvider, Web3
+from web3._utils.method_formatters import receipt_formatter  # formateur interne de web3 (>= 7)
+from web3.datastructures import AttributeDict
+from web3.exceptions import TransactionNotFound
+
+from rpc_limiter import READ, SEND, TokenBucket, get_limiter, is_rate_limit_error
+
+WEB3_MODE = os.getenv("WEB3_MODE", "async")
+POLYGON_RPC_URL = os.getenv("POLYGON_RPC_URL", "https://polygon-rpc.com")
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "30"))
+RPC_MAX_CONNECTIONS = int(os.getenv("RPC_MAX_CONNECTIONS", "10"))
+POLYGON_CHAIN_ID = int(os.getenv("POLYGON_CHAIN_ID", "137"))
+
+# --- ADRESSES FIXES (NE CHANGENT PAS) ---
+WPOL = Web3.to_checksum_address("0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270")
+KNO = Web3.to_checksum_address("0x236fbfAa3Ec9E0B9BA013Df370c098bAd85aD631")
+ROUTER = Web3.to_checksum_address("0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff")  # Quickswap
+KNO_WPOL_PAIR = Web3.to_checksum_address("0xdce471c5fc17879175966bea3c9fe0432f9b189e")  # paire Quickswap
+
+# --- ABIs ---
+erc20_abi = json.loads("""[
+    {"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"type":"function"},
+    {"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"success","type":"bool"}],"type":"function"},
+    {"constant":true,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"type":"function"},
+    {"constant":true,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"remaining","type":"uint256"}],"type":"function"},
+    {"constant":false,"inputs":[],"name":"deposit","outputs":[],"stateMutability":"payable","type":"function"},
+    {"constant":false,"inputs":[{"name":"wad","type":"uint256"}],"name":"withdraw","outputs":[],"stateMutability":"nonpayable","type":"function"}
+]""")
+router_abi = json.loads("""[
+    {
+        "name": "swapExactTokensForTokensSupportingFeeOnTransferTokens",
+        "type": "function",
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "amountOutMin", "type": "uint256"},
+            {"name": "path", "type": "address[]"},
+            {"name": "to", "type": "address"},
+            {"name": "deadline", "type": "uint256"}
+        ],
+        "outputs": [{"name": "amounts", "type": "uint256[]"}],
+        "stateMutability": "nonpayable"
+    },
+    {
+        "name": "getAmountsOut",
+        "type": "function",
+        "inputs": [
+            {"name": "amountIn", "type": "uint256"},
+            {"name": "path", "type": "address[]"}
+        ],
+        "outputs": [
+            {"name": "amounts", "type": "uint256[]"}
+        ],
+        "stateMutability": "view"
+    }
+]""")
+pair_abi = json.loads("""[
+    {"constant":true,"inputs":[],"name":"getReserves","outputs":[{"name":"_reserve0","type":"uint112"},{"name":"_reserve1","type":"uint112"},{"name":"_blockTimestampLast","type":"uint32"}],"type":"function"},
+    {"constant":true,"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"type":"function"},
+    {"constant":true,"inputs":[],"name":"token1","outputs":[{"name":"","type":"address"}],"type":"function"}
+]""")
+
+
+class BatchRequestError(RuntimeError):
+    """Requête groupée refusée en bloc par l'endpoint"""
+
+
+class BaseChain:
+    def __init__(self, w3, rpc_url: str, limiter: Optional[TokenBucket] = None):
+        """
+        Interface commune aux deux modes
+
+        Args:
+            w3: Instance Web3 ou AsyncWeb3
+            rpc_url: Endpoint RPC
+            limiter: Seau à jetons de l'endpoint (partagé entre bots par défaut)
+        """
+        self.w3 = w3
+        self.rpc_url = rpc_url
+        self.limiter = limiter or get_limiter(rpc_url)
+
+        self.wpol = self.token(WPOL)
+        self.kno = self.token(KNO)
+        self.router = w3.eth.contract(address=ROUTER, abi=router_abi)
+        self.pair = w3.eth.contract(address=KNO_WPOL_PAIR, abi=pair_abi)
+
+    def token(self, address: str):
+        return self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=erc20_abi)
+
+    async def _run(self, fn, *args):
+        """Exécute un appel web3 (synchrone ou coroutine selon le mode)"""
+        raise NotImplementedError
+
+    async def _rpc(self, fn, *args, priority: int = READ):
+        await self.limiter.acquire(priority)
+        try:
+            return await self._run(fn, *args)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                # Pause partagée : les autres bots de la machine ralentissent aussi
+                self.limiter.penalize()
+            raise
+
+    # --- LECTURES ---
+    async def call(self, contract_fn):
+        """Appel en lecture d'une fonction de contrat (ex: token.functions.balanceOf(addr))"""
+        return await self._rpc(contract_fn.call)
+
+    async def balance_of(self, token, owner: str) -> int:
+        return await self.call(token.functions.balanceOf(owner))
+
+    async def get_transaction_count(self, address: str, block: str = "pending") -> int:
+        return await self._rpc(self.w3.eth.get_transaction_count, address, block)
+
+    async def gas_price(self) -> int:
+        return await self._rpc(lambda: self.w3.eth.gas_price)
+
+    async def fee_history(self, block_count: int, percentiles: list) -> dict:
+        return await self._rpc(self.w3.eth.fee_history, block_count, "latest", percentiles)
+
+    async def estimate_gas(self, contract_fn, params: dict) -> int:
+        return await self._rpc(contract_fn.estimate_gas, params)
+
+    async def block_number(self) -> int:
+        return await self._rpc(lambda: self.w3.eth.block_number)
+
+    async def get_transaction_receipt(self, tx_hash):
+        try:
+            return await self._rpc(self.w3.eth.get_transaction_receipt, tx_hash)
+        except TransactionNotFound:
+            return None
+
+    async def batch_request(self, calls: list) -> list:
+        """
+        Envoie plusieurs appels JSON-RPC dans une seule requête HTTP (un seul jeton du limiteur)
+
+        Args:
+            calls: Liste de (méthode, paramètres)
+
+        Returns:
+            Résultats bruts dans l'ordre des appels (None en cas d'erreur)
+        """
+        if not calls:
+            return []
+        responses = await self._rpc(self.w3.provider.make_batch_request, calls)
+        if not isinstance(responses, list):
+            raise BatchRequestError(f"Requête groupée refusée: {responses.get('error')}")
+        return [response.get("result") for response in responses]
+
+    async def get_transaction_receipts(self, tx_hashes: list) -> list:
+        """Reçus de plusieurs transactions en une requête (None si pas encore minée)"""
+        results = await self.batch_request([("eth_getTransactionReceipt", [self.to_hex(h)]) for h in tx_hashes])
+        return [AttributeDict.recursive(receipt_formatter(result)) if result else None for result in results]
+
+    # --- TRANSACTIONS ---
+    async def build_transaction(self, contract_fn, params: dict) -> dict:
+        return await self._rpc(contract_fn.build_transaction, params)
+
+    def sign_transaction(self, tx: dict, private_key: str):
+        # Signature locale, aucun appel réseau
+        return Account.sign_transaction(tx, private_key)
+
+    async def send_raw_transaction(self, raw_transaction) -> bytes:
+        return await self._rpc(self.w3.eth.send_raw_transaction, raw_transaction, priority=SEND)
+
+    async def wait_for_receipt(self, tx_hash, timeout: float = 180, poll_interval: float = 5):
+        """Attend le reçu d'une transaction sans bloquer la boucle d'événements"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                receipt = await self.get_transaction_receipt(tx_hash)
+                if receipt:
+                    return receipt
+            except Exception:
+                pass
+            await asyncio.sleep(poll_interval)
+        return None
+
+    @staticmethod
+    def to_hex(value) -> str:
+        if isinstance(value, str):
+            return Web3.to_hex(hexstr=value)
+        return Web3.to_hex(value)
+
+    async def is_connected(self) -> bool:
+        raise NotImplementedError
+
+    def status(self) -> list:
+        """État des endpoints utilisés (ici un seul : son limiteur)"""
+        return [{"endpoint": self.rpc_url, "state": "closed", "limiter": self.limiter.snapshot()}]
+
+    async def close(self):
+        pass
+
+
+class AsyncChain(BaseChain):
+    def __init__(self, rpc_url: str = POLYGON_RPC_URL, limiter: Optional[TokenBucket] = None,
+                 timeout: float = RPC_TIMEOUT, max_connections: int = RPC_MAX_CONNECTIONS):
+        provider = AsyncHTTPProvider(rpc_url, request_kwargs={"timeout": timeout})
+        super().__init__(AsyncWeb3(provider), rpc_url, limiter)
+        self.provider = provider
+        self.max_connections = max_connections
+        self._session = None
+
+    async def _ensure_session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+            # Session unique (pool keep-alive) réutilisée par toutes les requêtes du bot
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT),
+            )
+            await self.provider.cache_async_session(self._session)
+
+    async def _run(self, fn, *args):
+        await self._ensure_session()
+        result = fn(*args)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    async def is_connected(self) -> bool:
+        await self._ensure_session()
+        return await self.w3.is_connected()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class SyncChain(BaseChain):
+    def __init__(self, rpc_url: str = POLYGON_RPC_URL, limiter: Optional[TokenBucket] = None,
+                 timeout: float = RPC_TIMEOUT, max_connections: int = RPC_MAX_CONNECTIONS):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        provider = HTTPProvider(rpc_url, request_kwargs={"timeout": timeout}, session=session)
+        super().__init__(Web3(provider), rpc_url, limiter)
+        self.session = session
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    async def is_connected(self) -> bool:
+        return await asyncio.to_thread(self.w3.is_connected)
+
+    async def close(self):
+        self.session.close()
+
+
+def create_chain(rpc_url: Optional[str] = None, mode: Optional[str] = None) -> BaseChain:
+    """
+    Crée l'accès blockchain selon WEB3_MODE
+
+    Args:
+        rpc_url: Endpoint(s) RPC séparés par des virgules, complétés par POLYGON_RPC_URLS
+                 (POLYGON_RPC_URL par défaut)
+        mode: "async" (AsyncWeb3) ou "sync" (Web3 dans un thread)
+
+    Returns:
+        Accès direct pour un seul endpoint, RpcPool pour plusieurs, PaperChain pour paper://
+    """
+    from rpc_pool import POLYGON_RPC_URLS, RpcPool, parse_endpoints
+
+    if (rpc_url or POLYGON_RPC_URL).strip().lower().startswith("paper://"):
+        # Trading papier : ni pool ni endpoints de secours, tout reste dans le processus
+        from amm_simulator import PaperChain
+        return PaperChain(parse_endpoints(rpc_url or POLYGON_RPC_URL)[0])
+    endpoints = parse_endpoints(rpc_url or POLYGON_RPC_URL, POLYGON_RPC_URLS)
+    if len(endpoints) > 1:
+        return RpcPool(endpoints, mode)
+    return create_member_chain(endpoints[0], mode)
+
+
+def create_member_chain(rpc_url: str, mode: Optional[str] = None) -> BaseChain:
+    """Accès direct à un endpoint"""
+    mode = (mode or WEB3_MODE).lower()
+    if mode == "sync":
+        return SyncChain(rpc_url)
+    if mode == "async":
+        return AsyncChain(rpc_url)
+    raise ValueError(f"WEB3_MODE inconnu: {mode}")
+
+
+# Accès partagés par les bots d'un même processus (runner en processus, bot_runner.py)
+_shared_chains: Dict[Tuple[str, str], BaseChain] = {}
+
+
+def get_shared_chain(rpc_url: Optional[str] = None, mode: Optional[str] = None) -> BaseChain:
+    """
+    Accès blockchain partagé par tous les bots du processus qui utilisent les mêmes endpoints
+    (sessions HTTP, santé du pool et oracle de gas communs)
+
+    Args:
+        rpc_url: Endpoint(s) RPC séparés par des virgules (POLYGON_RPC_URL par défaut)
+        mode: "async" ou "sync" (WEB3_MODE par défaut)
+    """
+    key = (rpc_url or "", (mode or WEB3_MODE).lower())
+    if key not in _shared_chains:
+        _shared_chains[key] = create_chain(rpc_url, mode)
+    return _shared_chains[key]
+
+
+async def close_shared_chains():
+    """Ferme les accès partagés (arrêt du processus)"""
+    chains = list(_shared_chains.values())
+    _shared_chains.clear()
+    await asyncio.gather(*(chain.close() for chain in chains), return_exceptions=True)
@@ -0,0 +1,143 @@
+"""Hub d'événements en mémoire pour le flux push du dashboard.
+
+Les routes publient les changements (transactions, état des bots, prix) une
+seule fois ; chaque client connecté à `/events` reçoit un instantané puis les
+deltas, au lieu d'interroger `/bots`, `/stats` et `/kno/price` en boucle.
+`ConfigWatcher` joue le même rôle pour les bots en long-poll sur leur configuration.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Taille de la file de chaque client connecté
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+
+# Événement interne : le client a pris trop de retard, lui renvoyer un instantané
+RESYNC = "resync"
+
+
+class EventHub:
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        """
+        Pub/sub asyncio, un abonné par connexion
+
+        Args:
+            queue_size: Nombre d'événements en attente par abonné avant resynchronisation
+        """
+        self.queue_size = queue_size
+        self._subscribers: Dict[asyncio.Queue, Optional[int]] = {}
+        self._sequence = itertools.count(1)
+        self._price_service = None
+        self._price_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: Optional[int] = None) -> asyncio.Queue:
+        """Abonne un client aux événements d'un utilisateur (et aux diffusions globales)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[queue] = user_id
+        self._start_price_relay()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+        if not self._subscribers:
+            self._stop_price_relay()
+
+    def has_subscribers(self, user_id: Optional[int] = None) -> bool:
+        if user_id is None:
+            return bool(self._subscribers)
+        return any(owner in (None, user_id) for owner in self._subscribers.values())
+
+    def publish(self, event_type: str, data, user_id: Optional[int] = None):
+        """
+        Publie un événement
+
+        Args:
+            event_type: Type d'événement (transaction, bot, stats, price...)
+            data: Contenu sérialisable en JSON
+            user_id: Destinataire, ou None pour tous les clients
+        """
+        event = {"id": next(self._sequence), "type": event_type, "data": data}
+        for queue, owner in list(self._subscribers.items()):
+            if user_id is not None and owner is not None and owner != user_id:
+                continue
+            if queue.full():
+                # Client trop lent : on vide sa file, il recevra un nouvel instantané
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"id": event["id"], "type": RESYNC, "data": None})
+                continue
+            queue.put_nowait(event)
+
+    # --- RELAIS DU PRIX ---
+    def attach_price_service(self, price_service):
+        """Relaie les mises à jour du service de prix tant qu'un client est connecté"""
+        self._price_service = price_service
+
+    def _start_price_relay(self):
+        if self._price_service is None:
+            return
+        if self._price_task is None or self._price_task.done():
+            self._price_task = asyncio.create_task(self._relay_prices())
+
+    def _stop_price_relay(self):
+        if self._price_task is not None:
+            self._price_task.cancel()
+            self._price_task = None
+
+    async def _relay_prices(self):
+        queue = self._price_service.subscribe()
+        try:
+            if not self._price_service.is_fresh:
+                asyncio.ensure_future(self._price_service.get_price())
+            while True:
+                price = await queue.get()
+                self.publish("price", price)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Erreur relais du prix: {e}")
+        finally:
+            self._price_service.unsubscribe(queue)
+
+    async def stop(self):
+        task = self._price_task
+        self._stop_price_relay()
+        if task is not None:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+class ConfigWatcher:
+    """Réveille les long-polls de /kno-config quand la configuration d'un bot change"""
+
+    def __init__(self):
+        self._changes: Dict[int, asyncio.Event] = {}
+
+    def watch(self, bot_id: int) -> asyncio.Event:
+        """Événement levé au prochain changement (à obtenir avant de lire la version en base)"""
+        return self._changes.setdefault(bot_id, asyncio.Event())
+
+    def notify(self, bot_id: int):
+        change = self._changes.pop(bot_id, None)
+        if change is not None:
+            change.set()
+
+    @staticmethod
+    async def wait(change: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(change.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+# Instances globales
+event_hub = EventHub()
+config_watcher = ConfigWatcher()
@@ -0,0 +1,100 @@
+"""Décodage des exécutions (fills) à partir des logs du reçu.
+
+Les montants réellement échangés sont lus dans les événements du reçu :
+`Transfer` ERC-20 (sortie du wallet / entrée sur le wallet) et, à défaut,
+`Swap` des paires Uniswap V2 (Quickswap). Plus besoin de lire `balanceOf`
+avant et après le swap, et le calcul reste juste si d'autres transferts
+arrivent sur le wallet pendant le trade.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from eth_abi import decode
+from eth_utils import keccak
+
+TRANSFER_TOPIC = keccak(text="Transfer(address,address,uint256)")
+SWAP_TOPIC = keccak(text="Swap(address,uint256,uint256,uint256,uint256,address)")
+
+
+@dataclass
+class Fill:
+    tx_hash: str
+    block_number: int
+    amount_in: int       # token vendu sorti du wallet (wei)
+    amount_out: int      # token acheté reçu par le wallet (wei)
+    gas_used: int
+    gas_price: int       # prix effectif du gas (wei)
+
+    @property
+    def gas_cost(self) -> int:
+        """Coût du gas en wei de POL"""
+        return self.gas_used * self.gas_price
+
+    @property
+    def price(self) -> Optional[float]:
+        """Prix effectif : token vendu par token acheté"""
+        return self.amount_in / self.amount_out if self.amount_out else None
+
+
+def _topic(value) -> bytes:
+    return bytes(value) if not isinstance(value, str) else bytes.fromhex(value.removeprefix("0x"))
+
+
+def _data(value) -> bytes:
+    return _topic(value) if value else b""
+
+
+def _address(topic) -> str:
+    return "0x" + _topic(topic)[-20:].hex()
+
+
+def decode_fill(receipt, wallet: str, token_in: str, token_out: str) -> Fill:
+    """
+    Montants échangés par un swap
+
+    Args:
+        receipt: Reçu de la transaction (AttributeDict web3)
+        wallet: Wallet qui a envoyé le swap
+        token_in: Token vendu
+        token_out: Token acheté
+
+    Returns:
+        Fill (amount_in / amount_out à 0 si aucun événement correspondant)
+    """
+    wallet, token_in, token_out = wallet.lower(), token_in.lower(), token_out.lower()
+    amount_in = amount_out = 0
+    swaps = []
+
+    for log in receipt["logs"]:
+        topics = [_topic(topic) for topic in log["topics"]]
+        if not topics:
+            continue
+        address = log["address"].lower()
+
+        if topics[0] == TRANSFER_TOPIC and len(topics) == 3:
+            (value,) = decode(["uint256"], _data(log["data"]))
+            if address == token_in and _address(topics[1]) == wallet:
+                amount_in += value
+            elif address == token_out and _address(topics[2]) == wallet:
+                amount_out += value
+        elif topics[0] == SWAP_TOPIC:
+            swaps.append(decode(["uint256", "uint256", "uint256", "uint256"], _data(log["data"])))
+
+    # Repli sur les événements Swap (ex : token reçu par un autre destinataire puis redistribué)
+    if swaps and not amount_in:
+        amount0_in, amount1_in, _, _ = swaps[0]
+        amount_in = max(amount0_in, amount1_in)
+    if swaps and not amount_out:
+        _, _, amount0_out, amount1_out = swaps[-1]
+        amount_out = max(amount0_out, amount1_out)
+
+    tx_hash = receipt["transactionHash"]
+    return Fill(
+        tx_hash=tx_hash if isinstance(tx_hash, str) else "0x" + bytes(tx_hash).hex(),
+        block_number=receipt["blockNumber"],
+        amount_in=amount_in,
+        amount_out=amount_out,
+        gas_used=receipt["gasUsed"],
+        gas_price=receipt.get("effectiveGasPrice") or 0,
+    )
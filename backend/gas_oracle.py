@@ -0,0 +1,187 @@
+"""Oracle de frais EIP-1559 à partir de `eth_feeHistory`.
+
+Un échantillonnage en tâche de fond garde à jour la base fee du prochain bloc
+et les pourboires (priority fees) payés aux percentiles d'urgence configurés :
+au moment du trade, `suggest()` répond depuis la mémoire, sans appel RPC.
+L'échantillonnage s'arrête quand l'oracle n'est plus sollicité (`warm()` le relance
+en début de cycle) pour ne pas consommer le budget RPC entre deux trades.
+
+Les estimations de gas (`estimate_gas`) sont mises en cache par clé (méthode,
+chemin du swap) et partagées par tous les bots du processus.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GWEI = 10**9
+
+# Intervalle d'échantillonnage et nombre de blocs analysés
+GAS_ORACLE_INTERVAL = float(os.getenv("GAS_ORACLE_INTERVAL", "15"))
+GAS_ORACLE_IDLE = float(os.getenv("GAS_ORACLE_IDLE", "120"))
+GAS_FEE_HISTORY_BLOCKS = int(os.getenv("GAS_FEE_HISTORY_BLOCKS", "20"))
+# Percentile des pourboires récents par niveau d'urgence : "low=25,normal=50,high=90"
+GAS_URGENCY_PERCENTILES = os.getenv("GAS_URGENCY_PERCENTILES", "low=25,normal=50,high=90")
+GAS_URGENCY = os.getenv("GAS_URGENCY", "normal")
+# Marge sur la base fee (2 = reste valable après plusieurs blocs pleins)
+GAS_BASE_FEE_MULTIPLIER = float(os.getenv("GAS_BASE_FEE_MULTIPLIER", "2"))
+# Cache des estimations de gas
+GAS_ESTIMATE_TTL = float(os.getenv("GAS_ESTIMATE_TTL", "3600"))
+GAS_ESTIMATE_MARGIN = float(os.getenv("GAS_ESTIMATE_MARGIN", "1.25"))
+
+
+def parse_percentiles(spec: str) -> Dict[str, float]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, percentile = item.partition("=")
+        levels[name.strip()] = float(percentile)
+    return levels
+
+
+# Estimations partagées par tous les bots du processus : clé -> (gas, horodatage)
+_estimate_cache: Dict[Tuple, Tuple[int, float]] = {}
+
+
+class GasOracle:
+    def __init__(self, chain, percentiles: Optional[Dict[str, float]] = None,
+                 interval: float = GAS_ORACLE_INTERVAL, blocks: int = GAS_FEE_HISTORY_BLOCKS):
+        """
+        Frais suggérés pour un endpoint RPC
+
+        Args:
+            chain: Accès blockchain (chain.BaseChain)
+            percentiles: Percentile des pourboires par niveau d'urgence
+            interval: Intervalle d'échantillonnage (secondes)
+            blocks: Nombre de blocs analysés par eth_feeHistory
+        """
+        self.chain = chain
+        self.percentiles = percentiles or parse_percentiles(GAS_URGENCY_PERCENTILES)
+        self.interval = interval
+        self.blocks = blocks
+        self.base_fee: Optional[int] = None       # base fee du prochain bloc
+        self.tips: Dict[str, int] = {}            # pourboire par niveau d'urgence
+        self.legacy_gas_price: Optional[int] = None  # repli si eth_feeHistory n'est pas supporté
+        self.updated = 0.0
+        self._last_used = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    # --- ÉCHANTILLONNAGE ---
+    def warm(self):
+        """Relance l'échantillonnage en fond (à appeler avant un éventuel trade)"""
+        self._last_used = time.monotonic()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sample_loop())
+
+    async def _sample_loop(self):
+        while time.monotonic() - self._last_used < GAS_ORACLE_IDLE:
+            await self.refresh()
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self):
+        """Un échantillon eth_feeHistory (ou eth_gasPrice en repli)"""
+        levels = sorted(self.percentiles.items(), key=lambda item: item[1])
+        try:
+            history = await self.chain.fee_history(self.blocks, [percentile for _, percentile in levels])
+            rewards = [block_rewards for block_rewards in history["reward"] if block_rewards]
+            self.base_fee = int(history["baseFeePerGas"][-1])
+            self.tips = {
+                name: self._median([int(block_rewards[i]) for block_rewards in rewards])
+                for i, (name, _) in enumerate(levels)
+            }
+            self.legacy_gas_price = None
+        except Exception as e:
+            logger.warning(f"eth_feeHistory indisponible ({e}), repli sur eth_gasPrice")
+            try:
+                self.legacy_gas_price = await self.chain.gas_price()
+            except Exception as e:
+                logger.error(f"Prix du gas indisponible: {e}")
+                return
+        self.updated = time.monotonic()
+
+    @staticmethod
+    def _median(values):
+        if not values:
+            return 0
+        values = sorted(values)
+        return values[len(values) // 2]
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- SUGGESTIONS ---
+    async def suggest(self, urgency: str = GAS_URGENCY, min_tip_gwei: float = 0) -> dict:
+        """
+        Paramètres de frais pour une transaction
+
+        Args:
+            urgency: Niveau d'urgence (low, normal, high...)
+            min_tip_gwei: Pourboire minimum (gwei)
+
+        Returns:
+            {"maxFeePerGas", "maxPriorityFeePerGas"} (type 2), ou {"gasPrice"} en repli
+        """
+        self.warm()
+        if not self.updated:
+            # Oracle froid : seul cas où le chemin du trade attend un appel RPC
+            await self.refresh()
+
+        min_tip = int(min_tip_gwei * GWEI)
+        if self.base_fee is None:
+            gas_price = self.legacy_gas_price or 0
+            return {"gasPrice": max(int(gas_price * 1.2), min_tip)}
+
+        tip = max(self.tips.get(urgency, self.tips.get("normal", 0)), min_tip)
+        return {
+            "maxFeePerGas": int(self.base_fee * GAS_BASE_FEE_MULTIPLIER) + tip,
+            "maxPriorityFeePerGas": tip,
+        }
+
+    async def estimate_gas(self, contract_fn, params: dict, key: Tuple, default: int) -> int:
+        """
+        Limite de gas estimée, en cache par clé (méthode, chemin) pour tout le processus
+
+        Args:
+            contract_fn: Fonction de contrat à envoyer
+            params: Paramètres de la transaction (from, value...)
+            key: Clé de cache, ex. ("swap", WPOL, KNO)
+            default: Limite utilisée si l'estimation échoue
+        """
+        cached = _estimate_cache.get(key)
+        if cached and time.monotonic() - cached[1] < GAS_ESTIMATE_TTL:
+            return cached[0]
+        try:
+            estimate = await self.chain.estimate_gas(contract_fn, params)
+        except Exception as e:
+            logger.warning(f"Estimation du gas impossible pour {key[0]} ({e}), limite par défaut {default}")
+            return default
+        gas = int(estimate * GAS_ESTIMATE_MARGIN)
+        _estimate_cache[key] = (gas, time.monotonic())
+        return gas
+
+
+# Par accès blockchain (instance) : un accès fermé puis recréé n'hérite pas d'un oracle orphelin
+_oracles: Dict[object, GasOracle] = {}
+
+
+def get_gas_oracle(chain) -> GasOracle:
+    """Oracle partagé par les bots du processus utilisant le même accès blockchain"""
+    if chain not in _oracles:
+        _oracles[chain] = GasOracle(chain)
+    return _oracles[chain]
+
+
+async def close_gas_oracle(chain):
+    """Arrête et oublie l'oracle d'un accès blockchain (avant sa fermeture)"""
+    oracle = _oracles.pop(chain, None)
+    if oracle is not None:
+        await oracle.stop()
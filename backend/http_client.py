@@ -0,0 +1,105 @@
+"""Client HTTP asynchrone partagé pour les appels sortants de l'API.
+
+Les routes FastAPI sont des coroutines : un appel `requests` bloque toute la
+boucle uvicorn. Ce module fournit un client httpx unique avec :
+- pool de connexions keep-alive,
+- limite de concurrence par hôte,
+- timeouts configurables par variables d'environnement.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "10"))
+
+
+class AsyncHTTPClient:
+    def __init__(
+        self,
+        timeout: float = HTTP_TIMEOUT,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_MAX_KEEPALIVE,
+        per_host_limit: int = HTTP_PER_HOST_LIMIT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Client HTTP asynchrone avec pool keep-alive et limites par hôte
+
+        Args:
+            timeout: Timeout global d'une requête (secondes)
+            connect_timeout: Timeout d'établissement de connexion (secondes)
+            max_connections: Nombre maximum de connexions ouvertes
+            max_keepalive: Nombre de connexions gardées ouvertes au repos
+            per_host_limit: Requêtes simultanées maximum vers un même hôte
+            transport: Transport httpx alternatif (tests, benchmarks)
+        """
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        )
+        self.per_host_limit = per_host_limit
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, int] = {}
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self.transport,
+            )
+        return self._client
+
+    def set_host_limit(self, host: str, limit: int):
+        """Définit une limite de concurrence spécifique pour un hôte"""
+        self._host_limits[host] = limit
+        self._host_semaphores.pop(host, None)
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._host_limits.get(host, self.per_host_limit))
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        async with self._semaphore(url):
+            return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get_json(self, url: str, **kwargs):
+        """GET puis décodage JSON, lève une exception sur statut HTTP d'erreur"""
+        response = await self.get(url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Instance globale
+http_client = AsyncHTTPClient()
@@ -0,0 +1,351 @@
+"""Acheminement structuré des logs des bots vers l'API.
+
+Côté bot (trading_bot.py, workers de bot_runner.py), `install()` remplace la sortie
+console par un `PipelineHandler` : chaque enregistrement devient une ligne JSON
+(bot, niveau, logger, message) placée dans une file bornée, sans jamais bloquer le
+bot ; un thread unique par processus l'envoie sur le socket Unix de l'API.
+
+Côté API, `LogCollector` reçoit toutes les connexions dans une file asyncio bornée et
+écrit par lots dans un `LogStore` (un fichier JSON lines par bot, avec rotation),
+lu par `/bots/{id}/logs`. Les logs perdus (file pleine, API arrêtée) sont comptés et
+signalés plutôt que de ralentir les bots.
+"""
+
+import asyncio
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_DIR = os.getenv("LOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot_logs"))
+LOG_PIPELINE_SOCKET = os.getenv("LOG_PIPELINE_SOCKET", os.path.join(LOG_DIR, "pipeline.sock"))
+# Rotation des fichiers de logs par bot
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "3"))
+# File de l'API (toutes connexions) et file de chaque processus de bots
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_CLIENT_QUEUE_SIZE = int(os.getenv("LOG_CLIENT_QUEUE_SIZE", "2000"))
+# Nombre maximal de lignes par écriture (côté API) ou par envoi (côté bot)
+LOG_BATCH = int(os.getenv("LOG_BATCH", "500"))
+# Délai avant de retenter la connexion à l'API (secondes)
+LOG_RECONNECT = float(os.getenv("LOG_RECONNECT", "1"))
+# Taille maximale d'une ligne (traceback compris)
+LOG_LINE_LIMIT = 1024 * 1024
+
+# Bot de la tâche asyncio (ou du thread lancé par asyncio.to_thread) en cours
+current_bot: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_bot", default=None)
+
+_BOT_LOGGER = re.compile(r"kno_bot_(\d+)$")
+
+
+# --- CÔTÉ BOT ---
+class PipelineHandler(logging.Handler):
+    def __init__(self, path: str, default_bot_id: Optional[int] = None, queue_size: int = LOG_CLIENT_QUEUE_SIZE):
+        """
+        Handler logging non bloquant vers le collecteur de l'API
+
+        Args:
+            path: Socket Unix du collecteur
+            default_bot_id: Bot attribué aux logs hors contexte (processus d'un seul bot)
+            queue_size: Enregistrements en attente avant abandon
+        """
+        super().__init__()
+        self.path = path
+        self.default_bot_id = default_bot_id
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._formatter = logging.Formatter()
+        threading.Thread(target=self._send_loop, name="log-pipeline", daemon=True).start()
+        atexit.register(self.flush_pending)
+
+    def _bot_id(self, record: logging.LogRecord) -> Optional[int]:
+        bot_id = current_bot.get()
+        if bot_id is not None:
+            return bot_id
+        match = _BOT_LOGGER.match(record.name)
+        return int(match.group(1)) if match else self.default_bot_id
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = {
+                "ts": record.created,
+                "bot_id": self._bot_id(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                "pid": record.process,
+            }
+            if record.exc_info:
+                entry["exc"] = self._formatter.formatException(record.exc_info)
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _send_loop(self):
+        sock = None
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < LOG_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self.dropped:
+                batch.append({
+                    "ts": time.time(), "bot_id": self.default_bot_id, "level": "WARNING",
+                    "logger": __name__, "message": f"{self.dropped} log(s) perdu(s)", "pid": os.getpid(),
+                })
+                self.dropped = 0
+            data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch).encode()
+            try:
+                if sock is None:
+                    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    sock.connect(self.path)
+                sock.sendall(data)
+            except OSError:
+                # API arrêtée ou redémarrée : lot perdu, nouvelle tentative plus tard
+                if sock is not None:
+                    sock.close()
+                    sock = None
+                self.dropped += len(batch)
+                time.sleep(LOG_RECONNECT)
+
+    def flush_pending(self, timeout: float = 1.0):
+        """Laisse partir les derniers logs à la sortie du processus"""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+def install(default_bot_id: Optional[int] = None) -> Optional[PipelineHandler]:
+    """
+    Envoie les logs du processus au collecteur de l'API
+
+    Actif seulement si l'API a exporté LOG_PIPELINE_SOCKET (processus lancé par le
+    BotManager) : un bot lancé à la main garde ses logs sur la console.
+
+    Args:
+        default_bot_id: Bot du processus (mode un processus par bot)
+
+    Returns:
+        Le handler installé, ou None
+    """
+    path = os.getenv("LOG_PIPELINE_SOCKET")
+    if not path or not hasattr(socket, "AF_UNIX"):
+        return None
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        # La console ne reçoit plus que les print() et les erreurs fatales
+        if type(handler) is logging.StreamHandler:
+            root.removeHandler(handler)
+    handler = PipelineHandler(path, default_bot_id)
+    root.addHandler(handler)
+    return handler
+
+
+# --- CÔTÉ API ---
+def _reverse_lines(path: str, block_size: int = 64 * 1024):
+    """Lignes d'un fichier, de la dernière à la première"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        rest = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if rest:
+            yield rest
+
+
+class LogStore:
+    def __init__(self, directory: str = LOG_DIR, max_bytes: int = LOG_MAX_BYTES, backups: int = LOG_BACKUPS):
+        """
+        Logs des bots sur disque : bot_<id>.jsonl (+ .1, .2... après rotation)
+
+        Args:
+            directory: Dossier des logs
+            max_bytes: Taille déclenchant la rotation
+            backups: Nombre d'anciens fichiers conservés
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def path(self, bot_id: Optional[int]) -> str:
+        name = f"bot_{bot_id}.jsonl" if bot_id is not None else "system.jsonl"
+        return os.path.join(self.directory, name)
+
+    def _rotate(self, path: str):
+        if self.backups <= 0:
+            open(path, "w").close()
+            return
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        os.replace(path, f"{path}.1")
+
+    def append(self, bot_id: Optional[int], lines: List[bytes]):
+        path = self.path(bot_id)
+        with open(path, "ab") as f:
+            f.writelines(lines)
+            size = f.tell()
+        if size >= self.max_bytes:
+            self._rotate(path)
+
+    def write_batch(self, lines: List[bytes]):
+        """Répartit un lot de lignes JSON reçues entre les fichiers des bots"""
+        by_bot: Dict[Optional[int], List[bytes]] = {}
+        for line in lines:
+            try:
+                bot_id = json.loads(line).get("bot_id")
+            except (ValueError, AttributeError):
+                continue
+            by_bot.setdefault(bot_id, []).append(line if line.endswith(b"\n") else line + b"\n")
+        os.makedirs(self.directory, exist_ok=True)
+        for bot_id, bot_lines in by_bot.items():
+            self.append(bot_id, bot_lines)
+
+    def tail(self, bot_id: Optional[int], limit: int = 200, level: Optional[str] = None,
+             since: Optional[datetime] = None) -> List[dict]:
+        """
+        Derniers logs d'un bot
+
+        Args:
+            bot_id: Bot (None : logs hors bot)
+            limit: Nombre maximal d'enregistrements
+            level: Niveau minimal (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+            since: Uniquement les logs postérieurs
+
+        Returns:
+            Enregistrements du plus ancien au plus récent
+        """
+        min_level = logging.getLevelName(level.upper()) if level else 0
+        since_ts = since.timestamp() if since else None
+        path = self.path(bot_id)
+        records = []
+        for index in range(self.backups + 1):
+            current = path if index == 0 else f"{path}.{index}"
+            if not os.path.exists(current):
+                break
+            for line in _reverse_lines(current):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if since_ts is not None and record.get("ts", 0) <= since_ts:
+                    records.reverse()
+                    return records
+                if logging.getLevelName(record.get("level", "INFO")) < min_level:
+                    continue
+                records.append(record)
+                if len(records) >= limit:
+                    records.reverse()
+                    return records
+        records.reverse()
+        return records
+
+
+class LogCollector:
+    def __init__(self, path: str = LOG_PIPELINE_SOCKET, store: Optional[LogStore] = None,
+                 queue_size: int = LOG_QUEUE_SIZE):
+        """
+        Réception des logs de tous les processus de bots
+
+        Args:
+            path: Socket Unix d'écoute
+            store: Stockage sur disque
+            queue_size: Lignes en attente d'écriture avant abandon
+        """
+        self.path = path
+        self.store = store or LogStore()
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._server = None
+        self._writer_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if not hasattr(socket, "AF_UNIX"):
+            logger.warning("Sockets Unix indisponibles : logs des bots sur leur sortie standard")
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._server = await asyncio.start_unix_server(self._client, self.path, limit=LOG_LINE_LIMIT)
+        self._writer_task = asyncio.create_task(self._writer())
+        # Transmis aux processus de bots lancés ensuite (voir install())
+        os.environ["LOG_PIPELINE_SOCKET"] = self.path
+        logger.info(f"Collecteur de logs sur {self.path}")
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    self._queue.put_nowait(line)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+        except (ValueError, ConnectionError) as e:
+            logger.warning(f"Connexion de logs interrompue: {e}")
+        finally:
+            writer.close()
+
+    async def _writer(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Les lignes arrivées pendant l'écriture précédente partent ensemble
+            while len(batch) < LOG_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if self.dropped:
+                logger.warning(f"{self.dropped} log(s) de bots perdu(s), file pleine")
+                self.dropped = 0
+            try:
+                await asyncio.to_thread(self.store.write_batch, batch)
+            except OSError as e:
+                logger.error(f"Écriture des logs impossible: {e}")
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        if pending:
+            await asyncio.to_thread(self.store.write_batch, pending)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = None
+
+    async def tail(self, bot_id: int, limit: int = 200, level: Optional[str] = None,
+                   since: Optional[datetime] = None) -> List[dict]:
+        return await asyncio.to_thread(self.store.tail, bot_id, limit, level, since)
+
+
+# Instance globale
+log_collector = LogCollector()
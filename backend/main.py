@@ -2,32 +2,52 @@
 Adapté pour le bot KNO sur Polygon.
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, select, true
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import uvicorn
 from datetime import datetime, timedelta, timezone
 import asyncio
 import json
 import logging
-import requests
+import os
+import time
 
 from utils import get_current_price
-from database import SessionLocal, engine, Base
-from models import Bot, Transaction, User
-from schemas import BotCreate, BotUpdate, BotResponse, TransactionResponse, TransactionCreate, UserCreate, UserResponse, KNOBotConfig, ReferencePriceUpdate, WalletConfig
+from database import AsyncSessionLocal, async_engine, engine, Base
+from models import Bot, BotDailyStats, OptimizationResult, OptimizationRun, Transaction, User
+from schemas import BotCreate, BotUpdate, BotResponse, TransactionResponse, TransactionCreate, UserCreate, UserResponse, KNOBotConfig, ReferencePriceUpdate, WalletConfig, OptimizeRequest, OptimizationResponse, OptimizationRunResponse
 from auth import create_access_token, verify_token, get_password_hash, verify_password
 from bot_manager import BotManager
 from wallet_security import wallet_security
+from migrate import run_migrations
+from rollups import apply_transaction
+from pagination import paginate_transactions, set_cursor_headers, NEXT_CURSOR_HEADER, LATEST_CURSOR_HEADER
+from price_service import price_service
+from events import config_watcher, event_hub, RESYNC
+from log_pipeline import log_collector
+from http_client import http_client
+from rpc_limiter import limiter_snapshot
+from chain import close_shared_chains
+from backtest import BacktestConfig, load_series
+from sweep import PRICE_HISTORY_DIR, RANKINGS, SWEEP_MAX_COMBINATIONS, SWEEP_PARAMS, grid_combinations, random_combinations, run_sweep
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Créer les tables
-Base.metadata.create_all(bind=engine)
+# Créer les tables et appliquer les migrations (index, nouvelles colonnes).
+# Pas dans les processus du pool de sweep.py (forkserver) : avec `python main.py`,
+# multiprocessing y réimporte ce fichier sous le nom __mp_main__
+if __name__ != "__mp_main__":
+    Base.metadata.create_all(bind=engine)
+    run_migrations()
 
 app = FastAPI(title="KNO Trading Bot API", version="2.0.0")
 
@@ -38,11 +58,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, LATEST_CURSOR_HEADER],
 )
 
 security = HTTPBearer()
 bot_manager = BotManager()
 
+# Attente maximale d'un long-poll sur /bots/{id}/kno-config (secondes)
+CONFIG_LONG_POLL_MAX = float(os.getenv("CONFIG_LONG_POLL_MAX", "60"))
+
+@app.on_event("startup")
+async def start_price_service():
+    price_service.start()
+    event_hub.attach_price_service(price_service)
+    # Avant les bots : ils héritent du socket du collecteur
+    await log_collector.start()
+    await bot_manager.start()
+
+@app.on_event("shutdown")
+async def stop_price_service():
+    await bot_manager.close()
+    for task in list(optimization_tasks):
+        task.cancel()
+    if optimization_tasks:
+        await asyncio.gather(*optimization_tasks, return_exceptions=True)
+    await log_collector.stop()
+    await event_hub.stop()
+    await price_service.stop()
+    await close_shared_chains()
+    await http_client.aclose()
+    await async_engine.dispose()
+
 # Route pour vérifier la connectivité réseau
 @app.get("/health")
 async def health_check():
@@ -52,24 +98,34 @@ async def health_check():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+# Budget RPC partagé par les bots de la machine (jetons, attentes, pauses rate limit)
+@app.get("/rpc/limits")
+async def rpc_limits():
+    return {"endpoints": limiter_snapshot()}
+
+@app.get("/bots/workers")
+async def bot_workers():
+    """Répartition des bots par worker (BOT_RUNNER=supervisor)"""
+    if bot_manager.supervisor is None:
+        return {"mode": bot_manager.mode, "workers": []}
+    return {"mode": bot_manager.mode, "workers": bot_manager.supervisor.status()}
+
 # Dependency pour la base de données
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Dependency pour l'authentification
-async def get_current_user(db: Session = Depends(get_db)):
+async def get_current_user(db: AsyncSession = Depends(get_db)):
     # Retourne toujours le premier utilisateur (pour les tests)
-    user = db.query(User).first()
+    result = await db.execute(select(User).limit(1))
+    user = result.scalars().first()
     if not user:
         # Crée un utilisateur par défaut si aucun n'existe
         user = User(email="test@example.com", hashed_password=get_password_hash("password123"))
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         print("✅ Utilisateur test créé automatiquement")
     return user
 
@@ -79,9 +135,10 @@ async def root():
 
 # Routes d'authentification
 @app.post("/auth/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Vérifier si l'utilisateur existe déjà
-    db_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).filter(User.email == user.email))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email déjà enregistré")
     
@@ -89,15 +146,16 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     hashed_password = get_password_hash(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return UserResponse(id=db_user.id, email=db_user.email, created_at=db_user.created_at)
 
 @app.post("/auth/login")
-async def login(user: UserCreate, db: Session = Depends(get_db)):
+async def login(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Vérifier les identifiants
-    db_user = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).filter(User.email == user.email))
+    db_user = result.scalars().first()
     if not db_user or not verify_password(user.password, db_user.hashed_password):
         raise HTTPException(status_code=401, detail="Email ou mot de passe incorrect")
     
@@ -105,70 +163,95 @@ async def login(user: UserCreate, db: Session = Depends(get_db)):
     access_token = create_access_token(data={"sub": str(db_user.id)})
     return {"access_token": access_token, "token_type": "bearer"}
 
+# Sérialisation et diffusion des changements
+def serialize_bot(bot: Bot) -> dict:
+    """Bot avec valeurs par défaut (réponse de /bots et événements du flux push)"""
+    return {
+        "id": bot.id,
+        "name": bot.name,
+        "token_pair": bot.token_pair or "KNO/WPOL",
+        "is_active": bot.is_active if bot.is_active is not None else False,
+        "status": bot.status or "paused",
+        
+        # Paramètres KNO avec valeurs par défaut
+        "volatility_percent": bot.volatility_percent if bot.volatility_percent is not None else 5.0,
+        "buy_amount": bot.buy_amount if bot.buy_amount is not None else 0.05,
+        "sell_amount": bot.sell_amount if bot.sell_amount is not None else 0.05,
+        "min_swap_amount": bot.min_swap_amount if bot.min_swap_amount is not None else 0.01,
+        "reference_price": bot.reference_price,
+        
+        # Trading
+        "random_trades_count": bot.random_trades_count if bot.random_trades_count is not None else 0,
+        "trading_duration_hours": bot.trading_duration_hours if bot.trading_duration_hours is not None else 24,
+        
+        # Wallet
+        "wallet_address": bot.wallet_address,
+        "rpc_endpoint": bot.rpc_endpoint or "https://polygon-rpc.com",
+        
+        # Adresses
+        "wpol_address": bot.wpol_address or "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270",
+        "kno_address": bot.kno_address or "0x236fbfAa3Ec9E0B9BA013Df370c098bAd85aD631",
+        "router_address": bot.router_address or "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff",
+        "quoter_address": bot.quoter_address,
+        
+        # Transaction
+        "slippage_tolerance": bot.slippage_tolerance if bot.slippage_tolerance is not None else 1.0,
+        "gas_limit": bot.gas_limit if bot.gas_limit is not None else 300000,
+        "gas_price": bot.gas_price if bot.gas_price is not None else 30,
+        
+        # Stats
+        "balance": bot.balance if bot.balance is not None else 0.0,
+        "total_profit": bot.total_profit if bot.total_profit is not None else 0.0,
+        "last_buy_price": bot.last_buy_price,
+        "last_sell_price": bot.last_sell_price,
+        
+        # Champs hérités
+        "buy_price_threshold": bot.buy_price_threshold if bot.buy_price_threshold is not None else 0.0,
+        "buy_percentage_drop": bot.buy_percentage_drop if bot.buy_percentage_drop is not None else 0.0,
+        "sell_price_threshold": bot.sell_price_threshold if bot.sell_price_threshold is not None else 0.0,
+        "sell_percentage_gain": bot.sell_percentage_gain if bot.sell_percentage_gain is not None else 0.0,
+        
+        # Timestamps
+        "created_at": bot.created_at,
+        "updated_at": bot.updated_at,
+        "last_heartbeat": bot.last_heartbeat,
+    }
+
+def publish_bot(bot: Bot):
+    event_hub.publish("bot", jsonable_encoder(serialize_bot(bot)), user_id=bot.user_id)
+
+async def publish_stats(db: AsyncSession, user_id: int):
+    # Recalculées une fois par changement, seulement si un client les écoute
+    if event_hub.has_subscribers(user_id):
+        event_hub.publish("stats", jsonable_encoder(await compute_stats(db, user_id)), user_id=user_id)
+
+def config_etag(bot: Bot) -> str:
+    return f'"{bot.id}-{bot.config_version}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def commit_config_change(db: AsyncSession, bot: Bot):
+    """Commit d'une modification de la configuration lue par le bot : nouvelle version, long-polls réveillés"""
+    bot.config_version = Bot.config_version + 1
+    await db.commit()
+    await db.refresh(bot)
+    config_watcher.notify(bot.id)
+
 # Routes pour les bots
 @app.get("/bots", response_model=List[BotResponse])
-async def get_bots(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    bots = db.query(Bot).filter(Bot.user_id == current_user.id).all()
+async def get_bots(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Bot).filter(Bot.user_id == current_user.id))
+    bots = result.scalars().all()
     
     # Traiter les bots pour assurer des valeurs par défaut
-    processed_bots = []
-    for bot in bots:
-        # Créer un dict avec des valeurs par défaut
-        bot_dict = {
-            "id": bot.id,
-            "name": bot.name,
-            "token_pair": bot.token_pair or "KNO/WPOL",
-            "is_active": bot.is_active if bot.is_active is not None else False,
-            "status": bot.status or "paused",
-            
-            # Paramètres KNO avec valeurs par défaut
-            "volatility_percent": bot.volatility_percent if bot.volatility_percent is not None else 5.0,
-            "buy_amount": bot.buy_amount if bot.buy_amount is not None else 0.05,
-            "sell_amount": bot.sell_amount if bot.sell_amount is not None else 0.05,
-            "min_swap_amount": bot.min_swap_amount if bot.min_swap_amount is not None else 0.01,
-            "reference_price": bot.reference_price,
-            
-            # Trading
-            "random_trades_count": bot.random_trades_count if bot.random_trades_count is not None else 0,
-            "trading_duration_hours": bot.trading_duration_hours if bot.trading_duration_hours is not None else 24,
-            
-            # Wallet
-            "wallet_address": bot.wallet_address,
-            "rpc_endpoint": bot.rpc_endpoint or "https://polygon-rpc.com",
-            
-            # Adresses
-            "wpol_address": bot.wpol_address or "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270",
-            "kno_address": bot.kno_address or "0x236fbfAa3Ec9E0B9BA013Df370c098bAd85aD631",
-            "router_address": bot.router_address or "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff",
-            "quoter_address": bot.quoter_address,
-            
-            # Transaction
-            "slippage_tolerance": bot.slippage_tolerance if bot.slippage_tolerance is not None else 1.0,
-            "gas_limit": bot.gas_limit if bot.gas_limit is not None else 300000,
-            "gas_price": bot.gas_price if bot.gas_price is not None else 30,
-            
-            # Stats
-            "balance": bot.balance if bot.balance is not None else 0.0,
-            "total_profit": bot.total_profit if bot.total_profit is not None else 0.0,
-            "last_buy_price": bot.last_buy_price,
-            "last_sell_price": bot.last_sell_price,
-            
-            # Champs hérités
-            "buy_price_threshold": bot.buy_price_threshold if bot.buy_price_threshold is not None else 0.0,
-            "buy_percentage_drop": bot.buy_percentage_drop if bot.buy_percentage_drop is not None else 0.0,
-            "sell_price_threshold": bot.sell_price_threshold if bot.sell_price_threshold is not None else 0.0,
-            "sell_percentage_gain": bot.sell_percentage_gain if bot.sell_percentage_gain is not None else 0.0,
-            
-            # Timestamps
-            "created_at": bot.created_at,
-            "updated_at": bot.updated_at,
-        }
-        processed_bots.append(bot_dict)
-    
-    return processed_bots
+    return [serialize_bot(bot) for bot in bots]
 
 @app.post("/bots", response_model=BotResponse)
-async def create_bot(bot: BotCreate, db: Session = Depends(get_db)):
+async def create_bot(bot: BotCreate, db: AsyncSession = Depends(get_db)):
     # Validation des données wallet si fournies
     if bot.wallet_address and not wallet_security.validate_wallet_address(bot.wallet_address):
         raise HTTPException(status_code=400, detail="Format d'adresse wallet invalide")
@@ -200,15 +283,17 @@ async def create_bot(bot: BotCreate, db: Session = Depends(get_db)):
     user = await get_current_user(db)
     db_bot = Bot(**bot_data, user_id=user.id)
     db.add(db_bot)
-    db.commit()
-    db.refresh(db_bot)
+    await db.commit()
+    await db.refresh(db_bot)
     
     logger.info(f"Bot KNO créé: {db_bot.name} (ID: {db_bot.id})")
+    publish_bot(db_bot)
     return db_bot
 
 @app.get("/bots/{bot_id}", response_model=BotResponse)
-async def get_bot(bot_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+async def get_bot(bot_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     return bot
@@ -216,22 +301,45 @@ async def get_bot(bot_id: int, current_user: User = Depends(get_current_user), d
 @app.get("/bots/{bot_id}/kno-config", response_model=KNOBotConfig)
 async def get_kno_bot_config(
     bot_id: int, 
+    response: Response,
+    wait: float = Query(0, ge=0, description="Long-poll : attendre jusqu'à `wait` secondes une nouvelle version (avec If-None-Match)"),
+    if_none_match: Optional[str] = Header(None),
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Retourne la configuration spécifique pour le bot KNO
     Utilisé par le bot distant pour récupérer sa configuration
+    
+    Versionnée par un ETag : avec If-None-Match, renvoie 304 si rien n'a changé
+    (sans déchiffrer la clé), après avoir attendu un changement pendant `wait` secondes.
     """
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
-    if not bot:
-        raise HTTPException(status_code=404, detail="Bot non trouvé")
+    deadline = time.monotonic() + min(wait, CONFIG_LONG_POLL_MAX)
+    while True:
+        change = config_watcher.watch(bot_id)
+        result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+        bot = result.scalars().first()
+        if not bot:
+            raise HTTPException(status_code=404, detail="Bot non trouvé")
+        
+        etag = config_etag(bot)
+        if not etag_matches(if_none_match, etag):
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        # Ne pas garder une connexion du pool pendant l'attente
+        await db.close()
+        await config_watcher.wait(change, remaining)
+    
+    response.headers["ETag"] = etag
     
     # Déchiffrer la clé privée
     private_key = ""
     if bot.wallet_private_key_encrypted:
         try:
-            private_key = wallet_security.decrypt_private_key(bot.wallet_private_key_encrypted)
+            private_key = wallet_security.decrypt_bot_private_key(bot.id, bot.wallet_private_key_encrypted)
         except Exception as e:
             logger.error(f"Erreur déchiffrement clé privée bot {bot_id}: {str(e)}")
             # Ne pas lever d'exception pour ne pas bloquer le bot
@@ -255,17 +363,19 @@ async def get_kno_bot_config(
         kno_address=bot.kno_address,
         router_address=bot.router_address,
         status=bot.status,
-        is_active=bot.is_active
+        is_active=bot.is_active,
+        config_version=bot.config_version
     )
 
 @app.get("/bots/{bot_id}/wallet-config")
 async def get_bot_wallet_config(
     bot_id: int, 
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Retourne la configuration wallet déchiffrée pour le bot distant"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
@@ -273,7 +383,7 @@ async def get_bot_wallet_config(
     private_key = ""
     if bot.wallet_private_key_encrypted:
         try:
-            private_key = wallet_security.decrypt_private_key(bot.wallet_private_key_encrypted)
+            private_key = wallet_security.decrypt_bot_private_key(bot.id, bot.wallet_private_key_encrypted)
         except Exception as e:
             logger.error(f"Erreur déchiffrement clé privée bot {bot_id}: {str(e)}")
     
@@ -299,9 +409,10 @@ async def update_bot(
     bot_id: int, 
     bot_update: BotUpdate, 
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
@@ -317,6 +428,7 @@ async def update_bot(
         try:
             encrypted_private_key = wallet_security.encrypt_private_key(bot_update.wallet_private_key)
             bot.wallet_private_key_encrypted = encrypted_private_key
+            wallet_security.forget_bot_key(bot.id)
         except Exception as e:
             raise HTTPException(status_code=500, detail="Erreur lors du chiffrement de la clé privée")
     
@@ -329,16 +441,17 @@ async def update_bot(
             setattr(bot, field, value)
     
     bot.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(bot)
+    await commit_config_change(db, bot)
     
     logger.info(f"Configuration du bot {bot_id} mise à jour")
+    publish_bot(bot)
     
     return bot
 
 @app.delete("/bots/{bot_id}")
-async def delete_bot(bot_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+async def delete_bot(bot_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
@@ -346,8 +459,12 @@ async def delete_bot(bot_id: int, current_user: User = Depends(get_current_user)
     if bot.is_active:
         await bot_manager.stop_bot(bot_id)
     
-    db.delete(bot)
-    db.commit()
+    await db.delete(bot)
+    await db.commit()
+    wallet_security.forget_bot_key(bot_id)
+    config_watcher.notify(bot_id)
+    event_hub.publish("bot_deleted", {"id": bot_id}, user_id=current_user.id)
+    await publish_stats(db, current_user.id)
     return {"message": "Bot supprimé avec succès"}
 
 @app.put("/bots/{bot_id}/reference-price")
@@ -355,10 +472,11 @@ async def update_reference_price(
     bot_id: int,
     price_data: ReferencePriceUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Vérifier que le bot appartient bien à l'utilisateur
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
 
@@ -366,14 +484,15 @@ async def update_reference_price(
     bot.reference_price = price_data.price
     bot.updated_at = datetime.now(timezone.utc)
 
-    db.commit()
-    db.refresh(bot)
+    await commit_config_change(db, bot)
 
     logger.info(f"Prix de référence du bot {bot_id} mis à jour : {bot.reference_price}")
+    publish_bot(bot)
 
     return {
         "bot_id": bot.id,
-        "reference_price": bot.reference_price
+        "reference_price": bot.reference_price,
+        "config_version": bot.config_version
     }
 
 @app.put("/bots/{bot_id}/wallet")
@@ -381,10 +500,11 @@ async def update_wallet(
     bot_id: int, 
     wallet: WalletConfig, 
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Met à jour la configuration wallet du bot"""
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
@@ -404,20 +524,23 @@ async def update_wallet(
     # Mettre à jour
     bot.wallet_address = wallet.wallet_address
     bot.wallet_private_key_encrypted = encrypted_private_key
+    wallet_security.forget_bot_key(bot.id)
     bot.rpc_endpoint = wallet.rpc_endpoint or bot.rpc_endpoint
     bot.wpol_address = wallet.wpol_address or bot.wpol_address
     bot.kno_address = wallet.kno_address or bot.kno_address
     bot.router_address = wallet.router_address or bot.router_address
     bot.updated_at = datetime.utcnow()
     
-    db.commit()
+    await commit_config_change(db, bot)
     
     logger.info(f"Wallet du bot {bot_id} mis à jour")
+    publish_bot(bot)
     return {"message": "Wallet mis à jour avec succès"}
 
 @app.post("/bots/{bot_id}/start")
-async def start_bot(bot_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+async def start_bot(bot_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
@@ -425,7 +548,7 @@ async def start_bot(bot_id: int, current_user: User = Depends(get_current_user),
     if not bot.reference_price or bot.reference_price == 0:
         try:
             # Tenter de récupérer le prix actuel de KNO
-            price_data = await get_kno_price()
+            price_data = await price_service.get_price()
             current_price = price_data.get("price_eur", 0)
             bot.reference_price = current_price
         except:
@@ -436,26 +559,29 @@ async def start_bot(bot_id: int, current_user: User = Depends(get_current_user),
     bot.status = "active"
     await bot_manager.start_bot(bot)
     bot.updated_at = datetime.utcnow()
-    db.commit()
+    await commit_config_change(db, bot)
     
     # Démarrer le bot via le bot manager
     await bot_manager.start_bot(bot)
+    publish_bot(bot)
     
     return {"message": "Bot démarré", "reference_price": bot.reference_price}
 
 @app.post("/bots/{bot_id}/stop")
-async def stop_bot(bot_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+async def stop_bot(bot_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
     bot.is_active = False
     bot.status = "paused"
     bot.updated_at = datetime.utcnow()
-    db.commit()
+    await commit_config_change(db, bot)
     
     # Arrêter le bot via le bot manager
     await bot_manager.stop_bot(bot_id)
+    publish_bot(bot)
     
     return {"message": "Bot arrêté"}
 
@@ -465,9 +591,10 @@ async def update_bot_status(
     bot_id: int, 
     status_data: dict, 
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
@@ -481,30 +608,34 @@ async def update_bot_status(
         bot.is_active = False
         # bot.last_error = status_data.get("error", None)
     bot.updated_at = datetime.utcnow()
-    db.commit()
+    await commit_config_change(db, bot)
+    publish_bot(bot)
     
     return {"message": f"Statut mis à jour: {bot.status}"}
 
 @app.get("/bots/{bot_id}/heartbeat")
-async def bot_heartbeat(bot_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+async def bot_heartbeat(bot_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
     # Mettre à jour le timestamp de dernière activité
     bot.last_heartbeat = datetime.utcnow()
     bot.updated_at = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    publish_bot(bot)
     
     return {"status": "alive", "timestamp": bot.last_heartbeat.isoformat()}
 
 # Routes pour les transactions
 @app.post("/transactions", response_model=TransactionResponse)
-async def create_transaction(transaction: TransactionCreate, db: Session = Depends(get_db)):
+async def create_transaction(transaction: TransactionCreate, db: AsyncSession = Depends(get_db)):
     """Crée une nouvelle transaction"""
     try:
         # Vérifier que le bot existe
-        bot = db.query(Bot).filter(Bot.id == transaction.bot_id).first()
+        result = await db.execute(select(Bot).filter(Bot.id == transaction.bot_id))
+        bot = result.scalars().first()
         if not bot:
             raise HTTPException(status_code=404, detail="Bot non trouvé")
         
@@ -515,14 +646,15 @@ async def create_transaction(transaction: TransactionCreate, db: Session = Depen
             amount=transaction.amount,
             price=transaction.price,
             profit=transaction.profit,
-            tx_hash=transaction.tx_hash
+            tx_hash=transaction.tx_hash,
+            gas_cost=transaction.gas_cost,
+            effective_price=transaction.effective_price
         )
         
         db.add(db_transaction)
-        db.commit()
-        db.refresh(db_transaction)
+        await db.flush()
         
-        # Mettre à jour les stats du bot
+        # Mettre à jour les stats du bot et ses cumuls journaliers (même transaction SQL)
         if transaction.type == 'buy':
             bot.last_buy_price = transaction.price
         elif transaction.type == 'sell':
@@ -532,142 +664,399 @@ async def create_transaction(transaction: TransactionCreate, db: Session = Depen
             bot.total_profit += transaction.profit
         
         bot.updated_at = datetime.utcnow()
-        db.commit()
+        await apply_transaction(db, db_transaction)
+        await db.commit()
         
         logger.info(f"Transaction enregistrée: {transaction.type} {transaction.amount} KNO à {transaction.price}€")
-        return db_transaction
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Erreur création transaction: {e}")
         raise HTTPException(status_code=500, detail="Erreur lors de la création de la transaction")
+    
+    # Diffusion aux dashboards connectés (après commit)
+    event_hub.publish(
+        "transaction",
+        jsonable_encoder(TransactionResponse.model_validate(db_transaction)),
+        user_id=bot.user_id,
+    )
+    publish_bot(bot)
+    await publish_stats(db, bot.user_id)
+    return db_transaction
+
+# Nombre maximal de lignes renvoyées par /bots/{id}/logs
+LOG_TAIL_MAX = int(os.getenv("LOG_TAIL_MAX", "2000"))
+
+@app.get("/bots/{bot_id}/logs")
+async def get_bot_logs(
+    bot_id: int,
+    limit: int = Query(200, ge=1, le=LOG_TAIL_MAX),
+    level: Optional[str] = Query(None, description="Niveau minimal (DEBUG, INFO, WARNING, ERROR)"),
+    since: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    if not result.scalars().first():
+        raise HTTPException(status_code=404, detail="Bot non trouvé")
+    if level and not isinstance(logging.getLevelName(level.upper()), int):
+        raise HTTPException(status_code=400, detail=f"Niveau de log inconnu: {level}")
+    return await log_collector.tail(bot_id, limit, level, since)
+
+# Recherches de paramètres en cours (références gardées jusqu'à la fin de la tâche)
+optimization_tasks = set()
+
+async def run_optimization(run_id: int, prices, timestamps, base: BacktestConfig, combinations: List[dict],
+                           request: OptimizeRequest):
+    """Exécute une recherche et enregistre les résultats au fil des lots terminés"""
+    base_params = {name: getattr(base, name) for name in SWEEP_PARAMS}
+
+    async def save(rows: List[dict]):
+        async with AsyncSessionLocal() as db:
+            db.add_all([
+                OptimizationResult(
+                    run_id=run_id, **{**base_params, **row["params"]},
+                    pnl=row["pnl"], max_drawdown=row["max_drawdown"], buys=row["buys"],
+                    sells=row["sells"], gas=row["gas"], score=row["score"],
+                )
+                for row in rows
+            ])
+            run = await db.get(OptimizationRun, run_id)
+            run.completed += len(rows)
+            best = max(row["score"] for row in rows)
+            if run.best_score is None or best > run.best_score:
+                run.best_score = best
+            await db.commit()
+
+    status_value, error = "done", None
+    try:
+        await run_sweep(prices, base, combinations, timestamps, request.tick_seconds,
+                        rank_by=request.rank_by, on_results=save)
+    except asyncio.CancelledError:
+        status_value, error = "error", "Interrompue par l'arrêt de l'API"
+    except Exception as e:
+        logger.exception(f"Recherche de paramètres {run_id} échouée")
+        status_value, error = "error", str(e)
+    async with AsyncSessionLocal() as db:
+        run = await db.get(OptimizationRun, run_id)
+        run.status, run.error, run.finished_at = status_value, error, datetime.now(timezone.utc)
+        await db.commit()
+
+@app.post("/bots/{bot_id}/optimize", response_model=OptimizationRunResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_optimization(
+    bot_id: int,
+    request: OptimizeRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot non trouvé")
+    unknown = set(request.space) - set(SWEEP_PARAMS)
+    if unknown or not request.space:
+        raise HTTPException(status_code=400, detail=f"Paramètres explorables: {', '.join(SWEEP_PARAMS)}")
+    if request.rank_by not in RANKINGS:
+        raise HTTPException(status_code=400, detail=f"Classement inconnu: {request.rank_by}")
+    try:
+        request.check_space()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Séries limitées aux fichiers .npy du dossier PRICE_HISTORY_DIR
+    series = os.path.basename(request.series)
+    if not series.endswith(".npy"):
+        raise HTTPException(status_code=400, detail="Série de prix attendue au format .npy")
+    path = os.path.join(PRICE_HISTORY_DIR, series)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail=f"Série de prix introuvable: {request.series}")
+
+    if request.samples:
+        combinations = random_combinations(request.space, min(request.samples, SWEEP_MAX_COMBINATIONS), request.seed)
+    else:
+        if any(isinstance(values, dict) for values in request.space.values()):
+            raise HTTPException(status_code=400, detail="Intervalles min/max réservés au tirage aléatoire (samples)")
+        combinations = grid_combinations(request.space)
+    if len(combinations) > SWEEP_MAX_COMBINATIONS:
+        raise HTTPException(status_code=400, detail=f"{len(combinations)} combinaisons (maximum {SWEEP_MAX_COMBINATIONS})")
+
+    # Valeurs actuelles du bot pour les paramètres non explorés
+    base = BacktestConfig(
+        volatility_percent=bot.volatility_percent, buy_amount=bot.buy_amount, sell_amount=bot.sell_amount,
+        min_swap_amount=bot.min_swap_amount, initial_quote=request.initial_quote, initial_kno=request.initial_kno,
+        slippage_percent=request.slippage_percent, gas_cost=request.gas_cost,
+    )
+    try:
+        prices, timestamps = load_series(path)
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Série de prix illisible: {e}")
+
+    run = OptimizationRun(bot_id=bot_id, status="running", series=os.path.basename(path),
+                          space=json.dumps(request.space), rank_by=request.rank_by, total=len(combinations))
+    db.add(run)
+    await db.commit()
+    await db.refresh(run)
+
+    task = asyncio.create_task(run_optimization(run.id, prices, timestamps, base, combinations, request))
+    optimization_tasks.add(task)
+    task.add_done_callback(optimization_tasks.discard)
+    return run
+
+@app.get("/bots/{bot_id}/optimize", response_model=OptimizationResponse)
+async def get_optimization(
+    bot_id: int,
+    run_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Classement d'une recherche (la plus récente par défaut), mis à jour pendant son exécution"""
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    if not result.scalars().first():
+        raise HTTPException(status_code=404, detail="Bot non trouvé")
+    query = select(OptimizationRun).filter(OptimizationRun.bot_id == bot_id)
+    if run_id is not None:
+        query = query.filter(OptimizationRun.id == run_id)
+    result = await db.execute(query.order_by(OptimizationRun.id.desc()).limit(1))
+    run = result.scalars().first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Aucune recherche de paramètres")
+    result = await db.execute(
+        select(OptimizationResult)
+        .filter(OptimizationResult.run_id == run.id)
+        .order_by(OptimizationResult.score.desc())
+        .limit(limit)
+    )
+    return {"run": run, "results": result.scalars().all()}
 
 @app.get("/bots/{bot_id}/transactions", response_model=List[TransactionResponse])
-async def get_transactions(bot_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_transactions(
+    bot_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Taille de page (plafonnée par TRANSACTIONS_MAX_PAGE_SIZE)"),
+    cursor: Optional[str] = Query(None, description="Page suivante (transactions plus anciennes)"),
+    after: Optional[str] = Query(None, description="Uniquement les transactions plus récentes que ce curseur"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     # Vérifier que le bot appartient à l'utilisateur
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
-    transactions = db.query(Transaction).filter(Transaction.bot_id == bot_id).order_by(Transaction.timestamp.desc()).all()
+    query, limit = paginate_transactions(
+        select(Transaction).filter(Transaction.bot_id == bot_id),
+        limit, cursor, after, since, until, type
+    )
+    result = await db.execute(query)
+    transactions = list(result.scalars().all())
+    if after:
+        transactions.reverse()
+    set_cursor_headers(response, transactions, limit, after)
     return transactions
 
 @app.get("/transactions", response_model=List[TransactionResponse])
-async def get_all_transactions(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    # Récupérer toutes les transactions des bots de l'utilisateur
-    transactions = db.query(Transaction).join(Bot).filter(Bot.user_id == current_user.id).order_by(Transaction.timestamp.desc()).all()
+async def get_all_transactions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="Taille de page (plafonnée par TRANSACTIONS_MAX_PAGE_SIZE)"),
+    cursor: Optional[str] = Query(None, description="Page suivante (transactions plus anciennes)"),
+    after: Optional[str] = Query(None, description="Uniquement les transactions plus récentes que ce curseur"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    type: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Récupérer les transactions des bots de l'utilisateur, page par page
+    query, limit = paginate_transactions(
+        select(Transaction).join(Bot).filter(Bot.user_id == current_user.id),
+        limit, cursor, after, since, until, type
+    )
+    result = await db.execute(query)
+    transactions = list(result.scalars().all())
+    if after:
+        transactions.reverse()
+    set_cursor_headers(response, transactions, limit, after)
     return transactions
 
 # Route pour les statistiques
-@app.get("/stats")
-async def get_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    bots = db.query(Bot).filter(Bot.user_id == current_user.id).all()
-    
-    total_balance = sum(bot.balance for bot in bots)
-    total_profit = sum(bot.total_profit for bot in bots)
-    active_bots = sum(1 for bot in bots if bot.is_active)
-    
-    # PnL du jour
+async def compute_stats(db: AsyncSession, user_id: int) -> dict:
     today = datetime.utcnow().date()
-    today_transactions = db.query(Transaction).join(Bot).filter(
-        Bot.user_id == current_user.id,
-        Transaction.timestamp >= today
-    ).all()
+    is_kno = Bot.token_pair.like("%KNO%")
     
-    today_pnl = sum(t.profit for t in today_transactions if t.profit)
+    # Compteurs lus dans les cumuls journaliers, pas dans l'historique des transactions
+    today_pnl = select(func.coalesce(func.sum(BotDailyStats.profit), 0)).join(Bot).filter(
+        Bot.user_id == user_id,
+        BotDailyStats.day == today
+    ).scalar_subquery()
+    total_kno_trades = select(func.coalesce(func.sum(BotDailyStats.trade_count), 0)).join(Bot).filter(
+        Bot.user_id == user_id,
+        is_kno
+    ).scalar_subquery()
     
-    # Statistiques KNO spécifiques
-    kno_bots = [b for b in bots if "KNO" in b.token_pair]
-    total_kno_trades = db.query(Transaction).join(Bot).filter(
-        Bot.user_id == current_user.id,
-        Bot.token_pair.like("%KNO%")
-    ).count()
+    result = await db.execute(select(
+        func.count(Bot.id).label("total_bots"),
+        func.coalesce(func.sum(Bot.balance), 0).label("total_balance"),
+        func.coalesce(func.sum(Bot.total_profit), 0).label("total_profit"),
+        func.coalesce(func.sum(case((Bot.is_active, 1), else_=0)), 0).label("active_bots"),
+        func.coalesce(func.sum(case((is_kno, 1), else_=0)), 0).label("kno_bots"),
+        func.coalesce(func.avg(Bot.volatility_percent), 0).label("avg_volatility"),
+        today_pnl.label("today_pnl"),
+        total_kno_trades.label("total_kno_trades"),
+    ).filter(Bot.user_id == user_id))
+    stats = result.one()
     
     return {
-        "total_balance": total_balance,
-        "total_profit": total_profit,
-        "active_bots": active_bots,
-        "total_bots": len(bots),
-        "today_pnl": today_pnl,
-        "kno_bots": len(kno_bots),
-        "total_kno_trades": total_kno_trades,
-        "avg_volatility": sum(b.volatility_percent for b in bots) / len(bots) if bots else 0
+        "total_balance": stats.total_balance,
+        "total_profit": stats.total_profit,
+        "active_bots": stats.active_bots,
+        "total_bots": stats.total_bots,
+        "today_pnl": stats.today_pnl,
+        "kno_bots": stats.kno_bots,
+        "total_kno_trades": stats.total_kno_trades,
+        "avg_volatility": stats.avg_volatility
     }
 
+@app.get("/stats")
+async def get_stats(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    return await compute_stats(db, current_user.id)
+
 # Routes KNO spécifiques
 @app.get("/kno/price")
 async def get_kno_price():
     """
-    Récupère le prix actuel de KNO en EUR via GeckoTerminal
+    Récupère le prix actuel de KNO en EUR via le service de prix partagé
+    (réserves de la paire on-chain, GeckoTerminal en secours ; cache TTL, une seule requête en vol)
     """
-    try:
-        GECKO_TERMINAL_URL = "https://api.geckoterminal.com/api/v2/networks/polygon_pos/pools/0xdce471c5fc17879175966bea3c9fe0432f9b189e"
-        
-        response = requests.get(GECKO_TERMINAL_URL, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        price_usd = float(data["data"]["attributes"]["base_token_price_usd"])
-        price_eur = price_usd * 0.87  # Conversion USD → EUR
-        
-        return {
-            "price_eur": price_eur,
-            "price_usd": price_usd,
-            "timestamp": datetime.utcnow().isoformat(),
-            "source": "GeckoTerminal"
-        }
-    except Exception as e:
-        logger.error(f"Erreur récupération prix KNO: {str(e)}")
-        # Retourner une valeur par défaut en cas d'erreur
-        return {
-            "price_eur": 0.001,
-            "price_usd": 0.00115,
-            "timestamp": datetime.utcnow().isoformat(),
-            "source": "fallback",
-            "error": str(e)
-        }
+    return await price_service.get_price()
+
+@app.get("/kno/price/stream")
+async def stream_kno_price():
+    """
+    Flux Server-Sent Events des mises à jour du prix KNO
+    """
+    queue = price_service.subscribe()
+    if not price_service.is_fresh:
+        # Premier abonné ou cache expiré : rafraîchir sans attendre la boucle
+        asyncio.ensure_future(price_service.get_price())
+
+    async def event_generator():
+        try:
+            while True:
+                try:
+                    price = await asyncio.wait_for(queue.get(), timeout=15)
+                    yield f"data: {json.dumps(price)}\n\n"
+                except asyncio.TimeoutError:
+                    # Commentaire SSE pour garder la connexion ouverte
+                    yield ": keep-alive\n\n"
+        finally:
+            price_service.unsubscribe(queue)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+async def build_snapshot(user_id: int) -> dict:
+    """État complet envoyé à la connexion (et après une resynchronisation)"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Bot).filter(Bot.user_id == user_id))
+        bots = [serialize_bot(bot) for bot in result.scalars().all()]
+        stats = await compute_stats(db, user_id)
+    return jsonable_encoder({
+        "bots": bots,
+        "stats": stats,
+        "price": await price_service.get_price(),
+    })
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+@app.get("/events")
+async def stream_events(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    """
+    Flux Server-Sent Events du dashboard : un événement `snapshot` (bots, stats, prix)
+    puis les deltas `transaction`, `bot`, `bot_deleted`, `stats` et `price`
+    """
+    user_id = current_user.id
+    # Ne pas garder une connexion du pool pendant toute la durée du flux
+    await db.close()
+    
+    # Abonnement avant l'instantané : aucun changement ne peut être manqué entre les deux
+    queue = event_hub.subscribe(user_id)
+    
+    async def event_generator():
+        try:
+            snapshot = await build_snapshot(user_id)
+            yield format_sse({"id": 0, "type": "snapshot", "data": snapshot})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Commentaire SSE pour garder la connexion ouverte
+                    yield ": keep-alive\n\n"
+                    continue
+                if event["type"] == RESYNC:
+                    event = {"id": event["id"], "type": "snapshot", "data": await build_snapshot(user_id)}
+                yield format_sse(event)
+        finally:
+            event_hub.unsubscribe(queue)
+    
+    # Désactive la mise en tampon des reverse proxies (nginx) pour un flux continu
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.get("/bots/{bot_id}/dashboard-stats")
 async def get_bot_dashboard_stats(
     bot_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Retourne les statistiques pour le dashboard spécifique au bot KNO
     """
-    bot = db.query(Bot).filter(Bot.id == bot_id, Bot.user_id == current_user.id).first()
-    if not bot:
-        raise HTTPException(status_code=404, detail="Bot non trouvé")
-    
-    # Récupérer les dernières transactions
-    transactions = db.query(Transaction).filter(
-        Transaction.bot_id == bot_id
-    ).order_by(Transaction.timestamp.desc()).limit(10).all()
-    
-    # Calculer les stats
     today = datetime.utcnow().date()
-    today_transactions = db.query(Transaction).filter(
-        Transaction.bot_id == bot_id,
-        Transaction.timestamp >= today
-    ).all()
     
-    today_trades = len(today_transactions)
-    today_profit = sum(t.profit or 0 for t in today_transactions)
+    # Compteurs lus dans les cumuls journaliers (une ligne par jour d'activité)
+    aggregates = select(
+        func.coalesce(func.sum(BotDailyStats.trade_count), 0).label("total_trades"),
+        func.coalesce(func.sum(BotDailyStats.buy_count), 0).label("buy_trades"),
+        func.coalesce(func.sum(BotDailyStats.sell_count), 0).label("sell_trades"),
+        func.coalesce(func.sum(case((BotDailyStats.day == today, BotDailyStats.trade_count), else_=0)), 0).label("today_trades"),
+        func.coalesce(func.sum(case((BotDailyStats.day == today, BotDailyStats.profit), else_=0)), 0).label("today_profit"),
+    ).filter(BotDailyStats.bot_id == bot_id).subquery()
     
-    # Total trades
-    total_trades = db.query(Transaction).filter(Transaction.bot_id == bot_id).count()
+    # Dernières transactions, servies par l'index (bot_id, timestamp)
+    recent = select(Transaction).filter(
+        Transaction.bot_id == bot_id
+    ).order_by(Transaction.timestamp.desc(), Transaction.id.desc()).limit(10).subquery()
+    RecentTransaction = aliased(Transaction, recent, name="recent_transaction")
     
-    # Performance
-    buy_trades = db.query(Transaction).filter(
-        Transaction.bot_id == bot_id,
-        Transaction.type == 'buy'
-    ).count()
+    # Un seul aller-retour : bot × agrégats × 0..10 dernières transactions
+    result = await db.execute(
+        select(Bot, aggregates, RecentTransaction)
+        .select_from(Bot)
+        .join(aggregates, true())
+        .outerjoin(RecentTransaction, true())
+        .filter(Bot.id == bot_id, Bot.user_id == current_user.id)
+        .order_by(recent.c.timestamp.desc(), recent.c.id.desc())
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Bot non trouvé")
     
-    sell_trades = db.query(Transaction).filter(
-        Transaction.bot_id == bot_id,
-        Transaction.type == 'sell'
-    ).count()
+    bot = rows[0].Bot
+    stats = rows[0]
+    transactions = [row.recent_transaction for row in rows if row.recent_transaction is not None]
+    total_trades = stats.total_trades
+    buy_trades = stats.buy_trades
+    sell_trades = stats.sell_trades
+    today_trades = stats.today_trades
+    today_profit = stats.today_profit
     
     # Calculer le seuil d'achat et de vente
     buy_threshold = None
@@ -724,17 +1113,18 @@ async def get_bot_dashboard_stats(
 
 # Endpoint pour tester la configuration KNO
 @app.get("/kno/test-config/{bot_id}")
-async def test_kno_config(bot_id: int, db: Session = Depends(get_db)):
+async def test_kno_config(bot_id: int, db: AsyncSession = Depends(get_db)):
     """
     Endpoint de test pour vérifier la configuration KNO
     (Pas besoin d'authentification pour les tests)
     """
-    bot = db.query(Bot).filter(Bot.id == bot_id).first()
+    result = await db.execute(select(Bot).filter(Bot.id == bot_id))
+    bot = result.scalars().first()
     if not bot:
         raise HTTPException(status_code=404, detail="Bot non trouvé")
     
     # Récupérer le prix KNO
-    price_data = await get_kno_price()
+    price_data = await price_service.get_price()
     
     # Calculer les seuils
     buy_threshold = None
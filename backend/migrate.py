@@ -0,0 +1,111 @@
+# migrate.py
+"""Migrations de schéma pour les bases existantes.
+
+`Base.metadata.create_all` crée les nouvelles tables mais ne modifie jamais une
+table existante (index, colonnes). Chaque migration est appliquée une seule fois
+et enregistrée dans la table `schema_migrations`.
+
+Usage :
+    python migrate.py
+"""
+
+import logging
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect, text
+
+from database import engine
+from models import Bot, BotDailyStats, OptimizationResult, OptimizationRun, Transaction
+from rollups import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(100), nullable=False),
+)
+
+
+def create_missing_indexes(conn, table, names):
+    """Crée les index du modèle listés dans `names` s'ils sont absents de la base"""
+    existing = {index["name"] for index in inspect(conn).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in names and index.name not in existing:
+            index.create(bind=conn)
+            logger.info(f"Index créé: {index.name}")
+
+
+def add_missing_column(conn, table, name):
+    """Ajoute une colonne du modèle absente de la base (valeur par défaut serveur requise si NOT NULL)"""
+    if name in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+        return
+    column = table.c[name]
+    ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+    logger.info(f"Colonne ajoutée: {table.name}.{column.name}")
+
+
+def migration_001_transactions_indexes(conn):
+    create_missing_indexes(conn, Transaction.__table__, {
+        "ix_transactions_bot_id_timestamp",
+        "ix_transactions_bot_id_type",
+    })
+    create_missing_indexes(conn, Bot.__table__, {"ix_bots_user_id"})
+
+
+def migration_002_bot_daily_stats(conn):
+    # Table des cumuls, initialisée à partir de l'historique existant
+    BotDailyStats.__table__.create(bind=conn, checkfirst=True)
+    rebuild_rollups(conn)
+
+
+def migration_003_bots_config_version(conn):
+    add_missing_column(conn, Bot.__table__, "config_version")
+
+
+def migration_004_transactions_fill(conn):
+    add_missing_column(conn, Transaction.__table__, "gas_cost")
+    add_missing_column(conn, Transaction.__table__, "effective_price")
+
+
+def migration_005_optimization(conn):
+    OptimizationRun.__table__.create(bind=conn, checkfirst=True)
+    OptimizationResult.__table__.create(bind=conn, checkfirst=True)
+
+
+# (version, nom, fonction) — ne jamais renuméroter une migration publiée
+MIGRATIONS = [
+    (1, "transactions_indexes", migration_001_transactions_indexes),
+    (2, "bot_daily_stats", migration_002_bot_daily_stats),
+    (3, "bots_config_version", migration_003_bots_config_version),
+    (4, "transactions_fill", migration_004_transactions_fill),
+    (5, "optimization", migration_005_optimization),
+]
+
+
+def run_migrations(bind=engine):
+    """Applique les migrations manquantes, dans l'ordre"""
+    schema_migrations.create(bind=bind, checkfirst=True)
+    with bind.begin() as conn:
+        applied = {row.version for row in conn.execute(schema_migrations.select())}
+
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with bind.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(version=version, name=name))
+        logger.info(f"Migration {version:03d} appliquée: {name}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    from database import Base
+    Base.metadata.create_all(bind=engine)
+    run_migrations()
+    print("✅ Migrations appliquées")
@@ -1,7 +1,8 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime
 from database import Base
 
 class User(Base):
@@ -42,10 +43,12 @@ class Bot(Base):
     last_sell_price = Column(Float, nullable=True)
     
     # Métadonnées
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_heartbeat = Column(DateTime(timezone=True), nullable=True)
+    # Incrémenté à chaque modification de la configuration lue par le bot (ETag de /kno-config)
+    config_version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Configuration Wallet (chiffrée)
     wallet_address = Column(String(100), nullable=True)
@@ -75,9 +78,17 @@ class Bot(Base):
     # Relations
     user = relationship("User", back_populates="bots")
     transactions = relationship("Transaction", back_populates="bot", cascade="all, delete-orphan")
+    daily_stats = relationship("BotDailyStats", back_populates="bot", cascade="all, delete-orphan")
+    optimization_runs = relationship("OptimizationRun", back_populates="bot", cascade="all, delete-orphan")
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Historique d'un bot trié par date (listes, stats du jour, dernières transactions)
+        Index("ix_transactions_bot_id_timestamp", "bot_id", "timestamp"),
+        # Comptages achat / vente par bot
+        Index("ix_transactions_bot_id_type", "bot_id", "type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False)
@@ -88,8 +99,80 @@ class Transaction(Base):
     profit = Column(Float, nullable=True)
     
     tx_hash = Column(String(255), nullable=True)
+    # Exécution lue dans le reçu : coût du gas (POL) et prix effectif (WPOL par KNO)
+    gas_cost = Column(Float, nullable=True)
+    effective_price = Column(Float, nullable=True)
     
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Horodatage fixé côté Python : même précision que les curseurs de pagination (SQLite)
+    timestamp = Column(DateTime(timezone=True), default=datetime.utcnow, server_default=func.now())
     
     # Relations
-    bot = relationship("Bot", back_populates="transactions")
\ No newline at end of file
+    bot = relationship("Bot", back_populates="transactions")
+
+class BotDailyStats(Base):
+    """Cumuls journaliers par bot, tenus à jour à chaque transaction (voir rollups.py)"""
+    __tablename__ = "bot_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("bot_id", "day", name="uq_bot_daily_stats_bot_id_day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    
+    trade_count = Column(Integer, nullable=False, default=0)
+    buy_count = Column(Integer, nullable=False, default=0)
+    sell_count = Column(Integer, nullable=False, default=0)
+    volume = Column(Float, nullable=False, default=0.0)  # somme des montants
+    profit = Column(Float, nullable=False, default=0.0)
+    
+    # Relations
+    bot = relationship("Bot", back_populates="daily_stats")
+
+class OptimizationRun(Base):
+    """Recherche de paramètres par backtests (voir sweep.py)"""
+    __tablename__ = "optimization_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="running")  # running, done, error
+    series = Column(String(255), nullable=False)  # fichier de PRICE_HISTORY_DIR
+    space = Column(Text, nullable=False)          # paramètres explorés (JSON)
+    rank_by = Column(String(20), nullable=False, default="pnl")
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    best_score = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relations
+    bot = relationship("Bot", back_populates="optimization_runs")
+    results = relationship("OptimizationResult", back_populates="run", cascade="all, delete-orphan")
+
+class OptimizationResult(Base):
+    """Résultat du backtest d'une combinaison de paramètres"""
+    __tablename__ = "optimization_results"
+    __table_args__ = (
+        # Classement d'une recherche
+        Index("ix_optimization_results_run_id_score", "run_id", "score"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("optimization_runs.id"), nullable=False)
+    
+    volatility_percent = Column(Float, nullable=False)
+    buy_amount = Column(Float, nullable=False)
+    sell_amount = Column(Float, nullable=False)
+    min_swap_amount = Column(Float, nullable=False)
+    trade_cooldown = Column(Float, nullable=False)
+    
+    pnl = Column(Float, nullable=False)
+    max_drawdown = Column(Float, nullable=False)
+    buys = Column(Integer, nullable=False)
+    sells = Column(Integer, nullable=False)
+    gas = Column(Float, nullable=False)
+    score = Column(Float, nullable=False)
+    
+    # Relations
+    run = relationship("OptimizationRun", back_populates="results")
@@ -0,0 +1,140 @@
+"""Regroupement des lectures on-chain d'un cycle de décision.
+
+Les lectures d'avant-trade (balances, allowance, getAmountsOut...)
+partent dans une seule requête HTTP :
+- les appels de contrats sont agrégés dans un `aggregate3` de Multicall3
+  (un seul eth_call, tous lus sur le même bloc),
+- les appels RPC bruts (eth_gasPrice...) l'accompagnent dans le même batch JSON-RPC.
+
+READ_BATCH_MODE=batch envoie plutôt un eth_call par contrat dans le batch JSON-RPC
+(pour les RPC où Multicall3 n'est pas déployé). Le repli est aussi automatique si
+l'appel Multicall3 échoue.
+"""
+
+import logging
+import os
+from typing import List, Set
+
+from eth_abi import decode, encode
+from eth_utils import keccak
+from web3 import Web3
+from web3.utils import get_abi_output_types
+
+logger = logging.getLogger(__name__)
+
+# Même adresse sur Polygon et la plupart des chaînes EVM
+MULTICALL3 = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+AGGREGATE3_SELECTOR = keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+
+READ_BATCH_MODE = os.getenv("READ_BATCH_MODE", "multicall")
+
+# Méthodes RPC dont le résultat est une quantité hexadécimale
+QUANTITY_METHODS = {"eth_gasPrice", "eth_blockNumber", "eth_getTransactionCount",
+                    "eth_getBalance", "eth_maxPriorityFeePerGas", "eth_estimateGas"}
+
+
+class ReadError(Exception):
+    pass
+
+
+class ReadBatch:
+    # Endpoints sur lesquels Multicall3 a échoué (repli sur le batch JSON-RPC)
+    _multicall_unsupported: Set[str] = set()
+
+    def __init__(self, chain, mode: str = READ_BATCH_MODE):
+        """
+        Lectures à envoyer ensemble
+
+        Args:
+            chain: Accès blockchain (chain.BaseChain)
+            mode: "multicall" (Multicall3 aggregate3) ou "batch" (un eth_call par lecture)
+        """
+        self.chain = chain
+        self.mode = mode
+        self._calls = []  # ("call", fonction de contrat) ou ("rpc", (méthode, paramètres))
+
+    def add(self, contract_fn) -> int:
+        """Ajoute une lecture de contrat (ex: token.functions.balanceOf(addr)), retourne son index"""
+        self._calls.append(("call", contract_fn))
+        return len(self._calls) - 1
+
+    def add_rpc(self, method: str, params=()) -> int:
+        """Ajoute un appel RPC brut (ex: "eth_gasPrice"), retourne son index"""
+        self._calls.append(("rpc", (method, list(params))))
+        return len(self._calls) - 1
+
+    def _use_multicall(self, contract_calls) -> bool:
+        return (self.mode == "multicall" and len(contract_calls) > 1
+                and self.chain.rpc_url not in self._multicall_unsupported)
+
+    async def execute(self) -> list:
+        """
+        Envoie toutes les lectures en une requête
+
+        Returns:
+            Résultats décodés dans l'ordre d'ajout (valeur seule pour les fonctions à une sortie)
+        """
+        contract_calls = [fn for kind, fn in self._calls if kind == "call"]
+        rpc_calls = [call for kind, call in self._calls if kind == "rpc"]
+
+        if self._use_multicall(contract_calls):
+            try:
+                return await self._execute(contract_calls, rpc_calls, multicall=True)
+            except ReadError:
+                raise
+            except Exception as e:
+                logger.warning(f"Multicall3 indisponible sur {self.chain.rpc_url} ({e}), repli sur le batch JSON-RPC")
+                self._multicall_unsupported.add(self.chain.rpc_url)
+        return await self._execute(contract_calls, rpc_calls, multicall=False)
+
+    async def _execute(self, contract_calls, rpc_calls, multicall: bool) -> list:
+        requests = []
+        if multicall:
+            payload = [(fn.address, True, bytes.fromhex(fn._encode_transaction_data()[2:])) for fn in contract_calls]
+            data = AGGREGATE3_SELECTOR + encode(["(address,bool,bytes)[]"], [payload])
+            requests.append(("eth_call", [{"to": MULTICALL3, "data": Web3.to_hex(data)}, "latest"]))
+        else:
+            requests.extend(
+                ("eth_call", [{"to": fn.address, "data": fn._encode_transaction_data()}, "latest"])
+                for fn in contract_calls
+            )
+        requests.extend(rpc_calls)
+
+        results = await self.chain.batch_request(requests)
+
+        if multicall:
+            (returned,) = decode(["(bool,bytes)[]"], bytes.fromhex(results[0][2:]))
+            raw_calls = [data if success else None for success, data in returned]
+            rpc_results = results[1:]
+        else:
+            raw_calls = [bytes.fromhex(result[2:]) if result else None for result in results[:len(contract_calls)]]
+            rpc_results = results[len(contract_calls):]
+
+        calls_iter = iter(zip(contract_calls, raw_calls))
+        rpc_iter = iter(zip(rpc_calls, rpc_results))
+        decoded = []
+        for kind, _ in self._calls:
+            if kind == "call":
+                fn, raw = next(calls_iter)
+                decoded.append(self._decode_call(fn, raw))
+            else:
+                (method, _), result = next(rpc_iter)
+                if result is None:
+                    raise ReadError(f"Appel {method} échoué")
+                decoded.append(int(result, 16) if method in QUANTITY_METHODS else result)
+        return decoded
+
+    @staticmethod
+    def _decode_call(fn, raw):
+        if not raw:
+            raise ReadError(f"Lecture {fn.fn_name} échouée sur {fn.address}")
+        values = decode(get_abi_output_types(fn.abi), raw)
+        return values[0] if len(values) == 1 else list(values)
+
+
+async def read_all(chain, *contract_fns) -> List:
+    """Raccourci : exécute plusieurs lectures de contrats en une requête"""
+    batch = ReadBatch(chain)
+    for fn in contract_fns:
+        batch.add(fn)
+    return await batch.execute()
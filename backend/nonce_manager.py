@@ -0,0 +1,198 @@
+"""Allocation locale des nonces par wallet.
+
+Le nonce est lu sur la chaîne une seule fois (au démarrage, ou après une erreur
+de nonce), puis incrémenté localement : plus d'appel `get_transaction_count`
+avant chaque transaction, et plusieurs transactions d'un même wallet peuvent
+être envoyées sans attendre les reçus précédents.
+
+Les transactions envoyées restent suivies jusqu'à leur reçu, ce qui permet de
+repérer les trous (nonce alloué mais jamais diffusé) et les transactions
+bloquées à remplacer.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Messages renvoyés par les nœuds quand le nonce local n'est plus valable
+NONCE_ERRORS = ("nonce too low", "nonce too high", "replacement transaction underpriced",
+                "already known", "known transaction", "invalid nonce")
+
+
+def is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(pattern in message for pattern in NONCE_ERRORS)
+
+
+@dataclass
+class InFlight:
+    nonce: int
+    tx_hash: str
+    sent_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class WalletNonces:
+    next_nonce: Optional[int] = None  # None : à resynchroniser
+    confirmed: int = 0                # nonce 'latest' connu de la chaîne
+    pending: int = 0                  # nonce 'pending' lors de la dernière synchronisation
+    in_flight: Dict[int, InFlight] = field(default_factory=dict)
+    reserved: Set[int] = field(default_factory=set)  # alloués, pas encore diffusés (transaction en préparation)
+    released: Set[int] = field(default_factory=set)  # refusés par failed() sans pouvoir reculer next_nonce
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class NonceManager:
+    def __init__(self, chain):
+        """
+        Nonces des wallets utilisant un accès blockchain (voir get_nonce_manager)
+
+        Args:
+            chain: Accès blockchain (chain.BaseChain)
+        """
+        self.chain = chain
+        self._wallets: Dict[str, WalletNonces] = {}
+        self._by_hash: Dict[str, Tuple[str, int]] = {}
+
+    def _wallet(self, address: str) -> WalletNonces:
+        return self._wallets.setdefault(address.lower(), WalletNonces())
+
+    async def _sync(self, address: str, state: WalletNonces) -> Tuple[int, int]:
+        latest, pending = await asyncio.gather(
+            self.chain.get_transaction_count(address, "latest"),
+            self.chain.get_transaction_count(address, "pending"),
+        )
+        state.confirmed = latest
+        state.pending = pending
+        for nonce in [n for n in state.in_flight if n < latest]:
+            self._forget(state.in_flight.pop(nonce))
+        state.released = {n for n in state.released if n >= latest}
+        # Ne jamais redescendre sous un nonce déjà diffusé par ce processus
+        highest_sent = max(state.in_flight, default=-1) + 1
+        state.next_nonce = max(pending, highest_sent)
+        if pending > latest and not state.in_flight:
+            logger.warning(f"{address}: {pending - latest} transaction(s) en attente d'un précédent lancement")
+        return latest, pending
+
+    async def sync(self, address: str) -> Tuple[int, int]:
+        """
+        Relit les nonces sur la chaîne
+
+        Args:
+            address: Wallet
+
+        Returns:
+            (nonce confirmé 'latest', nonce 'pending')
+        """
+        state = self._wallet(address)
+        async with state.lock:
+            return await self._sync(address, state)
+
+    async def allocate(self, address: str) -> int:
+        """Réserve le prochain nonce du wallet (lecture sur la chaîne seulement si nécessaire)"""
+        state = self._wallet(address)
+        async with state.lock:
+            if state.next_nonce is None:
+                await self._sync(address, state)
+            nonce = state.next_nonce
+            state.next_nonce += 1
+            state.reserved.add(nonce)
+            return nonce
+
+    def track(self, address: str, nonce: int, tx_hash):
+        """Enregistre une transaction diffusée (un remplacement écrase l'entrée du même nonce)"""
+        state = self._wallet(address)
+        tx_hash = self._hex(tx_hash)
+        state.reserved.discard(nonce)
+        state.released.discard(nonce)
+        previous = state.in_flight.get(nonce)
+        if previous is not None:
+            self._forget(previous)
+        state.in_flight[nonce] = InFlight(nonce, tx_hash)
+        self._by_hash[tx_hash] = (address.lower(), nonce)
+        if state.next_nonce is not None and state.next_nonce <= nonce:
+            state.next_nonce = nonce + 1
+
+    def confirm(self, tx_hash):
+        """Le reçu est arrivé : le nonce est consommé sur la chaîne"""
+        entry = self._by_hash.pop(self._hex(tx_hash), None)
+        if entry is None:
+            return
+        address, nonce = entry
+        state = self._wallet(address)
+        state.in_flight.pop(nonce, None)
+        state.confirmed = max(state.confirmed, nonce + 1)
+
+    def failed(self, address: str, nonce: int, error: Exception):
+        """
+        Envoi refusé par le nœud
+
+        Une erreur de nonce force une resynchronisation ; sinon le nonce est rendu
+        s'il était le dernier alloué (sinon un trou apparaîtra dans detect_gaps).
+        """
+        state = self._wallet(address)
+        state.reserved.discard(nonce)
+        if is_nonce_error(error):
+            logger.warning(f"{address}: erreur de nonce ({error}), resynchronisation")
+            state.next_nonce = None
+            state.released.discard(nonce)
+        elif nonce in state.in_flight:
+            # Remplacement refusé : la transaction d'origine reste diffusée
+            pass
+        elif state.next_nonce == nonce + 1:
+            state.next_nonce = nonce
+            state.released.discard(nonce)
+        else:
+            state.released.add(nonce)
+
+    def invalidate(self, address: str):
+        self._wallet(address).next_nonce = None
+
+    def detect_gaps(self, address: str) -> List[int]:
+        """
+        Nonces rendus par failed() sans pouvoir reculer next_nonce : jamais diffusés, ils
+        bloquent les transactions suivantes
+
+        Les nonces réservés (transaction en préparation, éventuellement par un autre bot
+        du processus sur le même wallet) n'en font jamais partie.
+        """
+        state = self._wallet(address)
+        if state.next_nonce is None:
+            return []
+        start = max(state.confirmed, state.pending)
+        return sorted(n for n in state.released
+                      if start <= n < state.next_nonce and n not in state.in_flight and n not in state.reserved)
+
+    def stale(self, address: str, max_age: float) -> List[InFlight]:
+        """Transactions diffusées sans reçu depuis plus de max_age secondes (à remplacer)"""
+        limit = time.time() - max_age
+        return sorted((tx for tx in self._wallet(address).in_flight.values() if tx.sent_at < limit),
+                      key=lambda tx: tx.nonce)
+
+    def _forget(self, entry: InFlight):
+        self._by_hash.pop(entry.tx_hash, None)
+
+    @staticmethod
+    def _hex(tx_hash) -> str:
+        return (tx_hash.hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)).lower().removeprefix("0x")
+
+
+# Par accès blockchain (instance), comme les oracles de gas : deux bots du même processus
+# qui signent avec le même wallet partagent ses nonces au lieu de se les disputer
+_managers: Dict[object, NonceManager] = {}
+
+
+def get_nonce_manager(chain) -> NonceManager:
+    """Nonces partagés par les bots du processus utilisant le même accès blockchain"""
+    if chain not in _managers:
+        _managers[chain] = NonceManager(chain)
+    return _managers[chain]
+
+
+def close_nonce_manager(chain):
+    """Oublie les nonces d'un accès blockchain (avant sa fermeture)"""
+    _managers.pop(chain, None)
@@ -0,0 +1,111 @@
+# pagination.py
+"""Pagination par curseur (keyset) des listes de transactions.
+
+Le curseur encode le couple (timestamp, id) de la dernière ligne renvoyée :
+la page suivante reprend juste après sans OFFSET, en s'appuyant sur l'index
+(bot_id, timestamp). Les transactions sont triées de la plus récente à la
+plus ancienne.
+"""
+
+import base64
+import os
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+from models import Transaction
+
+TRANSACTIONS_PAGE_SIZE = int(os.getenv("TRANSACTIONS_PAGE_SIZE", "100"))
+TRANSACTIONS_MAX_PAGE_SIZE = int(os.getenv("TRANSACTIONS_MAX_PAGE_SIZE", "500"))
+
+# En-têtes de réponse (exposés au frontend via CORS)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+LATEST_CURSOR_HEADER = "X-Latest-Cursor"
+
+
+def encode_cursor(transaction: Transaction) -> str:
+    raw = f"{transaction.timestamp.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        timestamp, transaction_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(transaction_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+
+
+def paginate_transactions(
+    query,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    type: Optional[str] = None,
+):
+    """
+    Applique filtres et keyset à une requête select(Transaction)
+
+    Args:
+        query: Requête de base (filtrée par bot ou par utilisateur)
+        limit: Taille de page (plafonnée à TRANSACTIONS_MAX_PAGE_SIZE)
+        cursor: Renvoie les transactions plus anciennes que ce curseur
+        after: Renvoie uniquement les transactions plus récentes que ce curseur
+        since: Borne basse incluse sur le timestamp
+        until: Borne haute exclue sur le timestamp
+        type: Filtre sur le type (buy, sell)
+
+    Returns:
+        (requête, taille de page effective)
+    """
+    limit = min(limit or TRANSACTIONS_PAGE_SIZE, TRANSACTIONS_MAX_PAGE_SIZE)
+
+    if type:
+        query = query.filter(Transaction.type == type)
+    if since:
+        query = query.filter(Transaction.timestamp >= since)
+    if until:
+        query = query.filter(Transaction.timestamp < until)
+
+    if after:
+        # Nouvelles lignes : ordre croissant pour ne pas sauter de transactions
+        # si plus de `limit` lignes sont arrivées depuis le dernier appel
+        timestamp, transaction_id = decode_cursor(after)
+        query = query.filter(or_(
+            Transaction.timestamp > timestamp,
+            and_(Transaction.timestamp == timestamp, Transaction.id > transaction_id),
+        )).order_by(Transaction.timestamp.asc(), Transaction.id.asc())
+    else:
+        if cursor:
+            timestamp, transaction_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                Transaction.timestamp < timestamp,
+                and_(Transaction.timestamp == timestamp, Transaction.id < transaction_id),
+            ))
+        query = query.order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+
+    return query.limit(limit), limit
+
+
+def set_cursor_headers(response: Response, transactions: Sequence[Transaction], limit: int, after: Optional[str] = None):
+    """
+    Ajoute les curseurs de la page à la réponse
+
+    - X-Latest-Cursor : transaction la plus récente de la page (à passer en `after`)
+    - X-Next-Cursor : page suivante, présent uniquement si la page est pleine
+      (plus anciennes pour une liste, plus récentes pour un appel `after`)
+    """
+    if not transactions:
+        if after:
+            response.headers[LATEST_CURSOR_HEADER] = after
+        return
+
+    newest, oldest = transactions[0], transactions[-1]
+    response.headers[LATEST_CURSOR_HEADER] = encode_cursor(newest)
+    if len(transactions) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(newest if after else oldest)
@@ -0,0 +1,341 @@
+"""Prix KNO lu directement dans la paire QuickSwap KNO/WPOL.
+
+- réserves initiales par `getReserves` (avec le numéro de bloc, une seule requête),
+- puis suivi bloc par bloc : eth_blockNumber à chaque intervalle, et à chaque
+  nouveau bloc les événements `Sync` de la paire (eth_getLogs), qui portent les
+  réserves après chaque swap,
+- prix moyen (WPOL par KNO) et profondeur calculés en mémoire : `quote()` répond
+  sans appel RPC tant que le suivi tourne,
+- conversion : POL/USD lu dans le flux Chainlink (POL_USD_TTL), USD/EUR en cache
+  (FX_RATE_TTL) ; GeckoTerminal ne sert que de secours.
+
+Comme l'oracle de gas, le suivi s'arrête quand le prix n'est plus demandé
+(POOL_PRICE_IDLE) pour ne pas consommer le budget RPC.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from eth_abi import decode
+from eth_utils import keccak
+from web3 import Web3
+
+from chain import KNO, KNO_WPOL_PAIR, WPOL
+from http_client import AsyncHTTPClient, http_client
+from multicall import ReadBatch
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de lecture du numéro de bloc (temps de bloc Polygon ~2 s)
+POOL_PRICE_INTERVAL = float(os.getenv("POOL_PRICE_INTERVAL", "2"))
+# Arrêt du suivi sans demande de prix pendant ce délai (secondes)
+POOL_PRICE_IDLE = float(os.getenv("POOL_PRICE_IDLE", "120"))
+# Au-delà, le prix du pool est considéré périmé (secondes sans lecture réussie)
+POOL_PRICE_MAX_AGE = float(os.getenv("POOL_PRICE_MAX_AGE", "30"))
+# Relecture complète de getReserves (secondes), rattrape un événement manqué ou une réorganisation
+POOL_PRICE_RESYNC = float(os.getenv("POOL_PRICE_RESYNC", "300"))
+# Retard maximal rattrapé par eth_getLogs (blocs), sinon relecture de getReserves
+POOL_LOG_MAX_BLOCKS = int(os.getenv("POOL_LOG_MAX_BLOCKS", "500"))
+# Variation de prix pour laquelle la profondeur est calculée (%)
+POOL_DEPTH_PERCENT = float(os.getenv("POOL_DEPTH_PERCENT", "2"))
+
+# Source du prix KNO : "pool" (réserves de la paire, GeckoTerminal en secours) ou "gecko"
+KNO_PRICE_SOURCE = os.getenv("KNO_PRICE_SOURCE", "pool")
+
+# Flux Chainlink POL/USD sur Polygon
+POL_USD_FEED = os.getenv("POL_USD_FEED", "0xAB594600376Ec9fD91F8e885dADF0CE036862dE0")
+POL_USD_TTL = float(os.getenv("POL_USD_TTL", "60"))
+# Taux de change USD → EUR (réponse {"rates": {"EUR": ...}})
+FX_RATE_URL = os.getenv("FX_RATE_URL", "https://api.frankfurter.app/latest?from=USD&to=EUR")
+FX_RATE_TTL = float(os.getenv("FX_RATE_TTL", "3600"))
+# Utilisé seulement tant qu'aucun taux n'a pu être lu
+USD_EUR_RATE = float(os.getenv("USD_EUR_RATE", "0.87"))
+
+GECKO_TERMINAL_POOL_URL = f"https://api.geckoterminal.com/api/v2/networks/polygon_pos/pools/{KNO_WPOL_PAIR.lower()}"
+
+SYNC_TOPIC = "0x" + keccak(text="Sync(uint112,uint112)").hex()
+
+aggregator_abi = json.loads("""[
+    {"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"stateMutability":"view","type":"function"},
+    {"inputs":[],"name":"latestRoundData","outputs":[{"name":"roundId","type":"uint80"},{"name":"answer","type":"int256"},{"name":"startedAt","type":"uint256"},{"name":"updatedAt","type":"uint256"},{"name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}
+]""")
+
+
+class FxRate:
+    def __init__(self, url: str = FX_RATE_URL, ttl: float = FX_RATE_TTL, default: float = USD_EUR_RATE):
+        """
+        Taux USD → EUR en cache pour tout le processus
+
+        Args:
+            url: API de taux de change
+            ttl: Durée de validité du taux (secondes)
+            default: Taux utilisé tant qu'aucune lecture n'a réussi
+        """
+        self.url = url
+        self.ttl = ttl
+        self.rate = default
+        self.updated = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def usd_eur(self) -> float:
+        """Taux courant ; en cas d'échec, dernier taux connu"""
+        if time.monotonic() - self.updated < self.ttl:
+            return self.rate
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if time.monotonic() - self.updated >= self.ttl:
+                try:
+                    data = await http_client.get_json(self.url)
+                    self.rate = float(data["rates"]["EUR"])
+                    self.updated = time.monotonic()
+                except Exception as e:
+                    logger.warning(f"Taux USD/EUR indisponible ({e}), dernier taux connu {self.rate}")
+                    # Nouvel essai dans une minute plutôt qu'à chaque demande de prix
+                    self.updated = time.monotonic() - self.ttl + min(60.0, self.ttl)
+        return self.rate
+
+
+# Taux partagé par tous les bots et l'API du processus
+fx_rate = FxRate()
+
+
+async def fetch_gecko_pool(client: AsyncHTTPClient = http_client, usd_eur: Optional[float] = None) -> dict:
+    """
+    Prix du pool selon GeckoTerminal (secours)
+
+    Args:
+        client: Client HTTP partagé
+        usd_eur: Taux USD → EUR (fx_rate par défaut)
+
+    Returns:
+        price_eur / price_usd / pol_usd / usd_eur / timestamp / source
+    """
+    data = await client.get_json(GECKO_TERMINAL_POOL_URL)
+    attributes = data["data"]["attributes"]
+    price_usd = float(attributes["base_token_price_usd"])
+    usd_eur = usd_eur or await fx_rate.usd_eur()
+    return {
+        "price_eur": price_usd * usd_eur,
+        "price_usd": price_usd,
+        "pol_usd": float(attributes["quote_token_price_usd"]),
+        "usd_eur": usd_eur,
+        "timestamp": datetime.utcnow().isoformat(),
+        "source": "GeckoTerminal",
+    }
+
+
+@dataclass
+class PoolState:
+    reserve_kno: int
+    reserve_wpol: int
+    block: int
+    updated: float  # time.monotonic() de la dernière lecture réussie
+
+    @property
+    def price_wpol(self) -> float:
+        """WPOL par KNO au prix moyen (sans frais ni impact)"""
+        return self.reserve_wpol / self.reserve_kno
+
+    def depth(self, percent: float = POOL_DEPTH_PERCENT, fee: float = 0.003) -> Dict[str, float]:
+        """
+        Montants qui déplacent le prix de `percent` % (x * y = k, frais du pool compris)
+
+        Returns:
+            buy_wpol : WPOL à dépenser pour monter le prix, sell_kno : KNO à vendre pour le baisser
+        """
+        move = percent / 100
+        buy = self.reserve_wpol * (math.sqrt(1 + move) - 1) / (1 - fee)
+        sell = self.reserve_kno * (1 / math.sqrt(1 - move) - 1) / (1 - fee)
+        return {"percent": percent, "buy_wpol": buy / 10**18, "sell_kno": sell / 10**18}
+
+
+class PoolPriceSource:
+    def __init__(self, chain, pair: str = KNO_WPOL_PAIR, interval: float = POOL_PRICE_INTERVAL):
+        """
+        Prix KNO suivi dans les réserves de la paire
+
+        Args:
+            chain: Accès blockchain (chain.BaseChain)
+            pair: Adresse de la paire KNO/WPOL
+            interval: Intervalle de lecture du numéro de bloc (secondes)
+        """
+        self.chain = chain
+        self.pair = Web3.to_checksum_address(pair)
+        self.interval = interval
+        self.state: Optional[PoolState] = None
+        # token0 = adresse la plus basse (UniswapV2Factory)
+        self.kno_is_token0 = KNO.lower() < WPOL.lower()
+        self.pol_usd: Optional[float] = None
+        self._pol_usd_updated = 0.0
+        self._feed_decimals: Optional[int] = None
+        self._resynced = 0.0
+        self._last_used = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[PoolState], None]] = []
+
+    # --- SUIVI DES BLOCS ---
+    def warm(self):
+        """Relance le suivi des blocs en fond"""
+        self._last_used = time.monotonic()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._follow_loop())
+
+    def add_listener(self, callback: Callable[[PoolState], None]):
+        """Appelé à chaque changement de réserves (nouvel événement Sync ou relecture)"""
+        self._listeners.append(callback)
+
+    async def _follow_loop(self):
+        while time.monotonic() - self._last_used < POOL_PRICE_IDLE:
+            try:
+                if self.state is None or time.monotonic() - self._resynced > POOL_PRICE_RESYNC:
+                    await self.sync_reserves()
+                else:
+                    await self.poll()
+            except Exception as e:
+                logger.warning(f"Suivi de la paire {self.pair} interrompu: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _update(self, reserve0: int, reserve1: int, block: int):
+        reserve_kno, reserve_wpol = (reserve0, reserve1) if self.kno_is_token0 else (reserve1, reserve0)
+        previous = self.state
+        self.state = PoolState(reserve_kno, reserve_wpol, block, time.monotonic())
+        if previous is None or (previous.reserve_kno, previous.reserve_wpol) != (reserve_kno, reserve_wpol):
+            for callback in self._listeners:
+                try:
+                    callback(self.state)
+                except Exception as e:
+                    logger.error(f"Erreur d'un abonné au prix du pool: {e}")
+
+    async def sync_reserves(self) -> PoolState:
+        """getReserves et numéro de bloc en une requête"""
+        reads = ReadBatch(self.chain)
+        reads.add(self.chain.pair.functions.getReserves())
+        reads.add_rpc("eth_blockNumber")
+        (reserve0, reserve1, _), block = await reads.execute()
+        self._resynced = time.monotonic()
+        self._update(reserve0, reserve1, block)
+        return self.state
+
+    async def poll(self):
+        """Nouveau bloc : réserves du dernier événement Sync de la paire, s'il y en a"""
+        block = await self.chain.block_number()
+        state = self.state
+        if block <= state.block:
+            state.updated = time.monotonic()
+            return
+        if block - state.block > POOL_LOG_MAX_BLOCKS:
+            await self.sync_reserves()
+            return
+        (logs,) = await self.chain.batch_request([("eth_getLogs", [{
+            "address": self.pair,
+            "topics": [SYNC_TOPIC],
+            "fromBlock": hex(state.block + 1),
+            "toBlock": hex(block),
+        }])])
+        if logs is None:
+            await self.sync_reserves()
+            return
+        logs = [log for log in logs if not log.get("removed")]
+        if logs:
+            last = max(logs, key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)))
+            reserve0, reserve1 = decode(["uint112", "uint112"], bytes.fromhex(last["data"][2:]))
+            self._update(reserve0, reserve1, block)
+        else:
+            state.block, state.updated = block, time.monotonic()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # --- PRIX ---
+    @property
+    def is_fresh(self) -> bool:
+        return self.state is not None and time.monotonic() - self.state.updated < POOL_PRICE_MAX_AGE
+
+    async def pol_usd_rate(self) -> Optional[float]:
+        """POL/USD du flux Chainlink (en cache POL_USD_TTL), GeckoTerminal en secours"""
+        if self.pol_usd is not None and time.monotonic() - self._pol_usd_updated < POL_USD_TTL:
+            return self.pol_usd
+        try:
+            feed = self.chain.w3.eth.contract(address=Web3.to_checksum_address(POL_USD_FEED), abi=aggregator_abi)
+            if self._feed_decimals is None:
+                self._feed_decimals = await self.chain.call(feed.functions.decimals())
+            _, answer, _, _, _ = await self.chain.call(feed.functions.latestRoundData())
+            self.pol_usd = answer / 10**self._feed_decimals
+        except Exception as e:
+            logger.warning(f"Flux POL/USD illisible ({e}), secours GeckoTerminal")
+            try:
+                self.pol_usd = (await fetch_gecko_pool())["pol_usd"]
+            except Exception as e:
+                logger.error(f"POL/USD indisponible: {e}")
+                if self.pol_usd is None:
+                    return None
+        self._pol_usd_updated = time.monotonic()
+        return self.pol_usd
+
+    async def quote(self) -> Optional[dict]:
+        """
+        Prix courant du pool
+
+        Returns:
+            price_eur / price_usd / price_wpol, réserves, profondeur, bloc ; None si le pool
+            est illisible (l'appelant passe alors à GeckoTerminal)
+        """
+        self.warm()
+        if not self.is_fresh:
+            # Suivi froid ou en retard : une lecture directe
+            try:
+                await self.sync_reserves()
+            except Exception as e:
+                logger.warning(f"getReserves impossible sur {self.pair}: {e}")
+                return None
+        state = self.state
+        if not state.reserve_kno or not state.reserve_wpol:
+            return None
+        pol_usd, usd_eur = await asyncio.gather(self.pol_usd_rate(), fx_rate.usd_eur())
+        if pol_usd is None:
+            return None
+        price_usd = state.price_wpol * pol_usd
+        return {
+            "price_eur": price_usd * usd_eur,
+            "price_usd": price_usd,
+            "price_wpol": state.price_wpol,
+            "pol_usd": pol_usd,
+            "usd_eur": usd_eur,
+            "reserves": {"kno": state.reserve_kno / 10**18, "wpol": state.reserve_wpol / 10**18},
+            "depth": state.depth(),
+            "block": state.block,
+            "timestamp": datetime.utcnow().isoformat(),
+            "source": "pool",
+        }
+
+
+# Par accès blockchain (instance), comme les oracles de gas
+_sources: Dict[object, PoolPriceSource] = {}
+
+
+def get_pool_price_source(chain) -> PoolPriceSource:
+    """Source partagée par les bots du processus utilisant le même accès blockchain"""
+    if chain not in _sources:
+        _sources[chain] = PoolPriceSource(chain)
+    return _sources[chain]
+
+
+async def close_pool_price_source(chain):
+    """Arrête et oublie la source d'un accès blockchain (avant sa fermeture)"""
+    source = _sources.pop(chain, None)
+    if source is not None:
+        await source.stop()
@@ -0,0 +1,170 @@
+"""Service de prix KNO partagé pour l'API.
+
+Un seul point d'accès au prix pour tout le backend :
+- source principale : réserves de la paire KNO/WPOL lues on-chain (pool_price.py),
+  GeckoTerminal en secours (ou seul avec KNO_PRICE_SOURCE=gecko),
+- cache TTL pour ne pas solliciter la source amont à chaque requête,
+- coalescence des requêtes concurrentes (une seule requête amont en vol),
+- flux push (abonnés asyncio) alimenté à chaque changement de réserves du pool
+  et par une boucle de rafraîchissement.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Set
+
+from http_client import http_client as default_http_client
+from pool_price import KNO_PRICE_SOURCE, PoolPriceSource, fetch_gecko_pool, get_pool_price_source
+
+logger = logging.getLogger(__name__)
+
+# Durée de validité du prix en cache (secondes)
+PRICE_TTL = float(os.getenv("KNO_PRICE_TTL", "15"))
+# Taille de la file de chaque abonné au flux push
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+class KNOPriceService:
+    def __init__(self, ttl: float = PRICE_TTL, fetcher: Optional[Callable[[], Awaitable[dict]]] = None):
+        """
+        Service de prix avec cache TTL et coalescence des requêtes
+
+        Args:
+            ttl: Durée de validité du prix en cache (secondes)
+            fetcher: Coroutine de récupération du prix (pool on-chain puis GeckoTerminal par défaut)
+        """
+        self.ttl = ttl
+        self.http_client = default_http_client
+        self.fetcher = fetcher or self._fetch_default
+        self.pool: Optional[PoolPriceSource] = None
+        self._price: Optional[dict] = None
+        self._fetched_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _pool_source(self) -> PoolPriceSource:
+        if self.pool is None:
+            from chain import get_shared_chain
+            self.pool = get_pool_price_source(get_shared_chain())
+            # Nouvelles réserves → nouveau prix poussé aux abonnés sans attendre le TTL
+            self.pool.add_listener(lambda _: asyncio.ensure_future(self.get_price(force=True)))
+        return self.pool
+
+    async def _fetch_default(self) -> dict:
+        if KNO_PRICE_SOURCE == "pool":
+            try:
+                price = await self._pool_source().quote()
+                if price:
+                    return price
+            except Exception as e:
+                logger.warning(f"Prix du pool indisponible, secours GeckoTerminal: {e}")
+        return await fetch_gecko_pool(self.http_client)
+
+    @property
+    def is_fresh(self) -> bool:
+        return self._price is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    async def get_price(self, force: bool = False) -> dict:
+        """
+        Retourne le prix KNO courant
+
+        Args:
+            force: Ignore le cache et force un rafraîchissement
+
+        Returns:
+            Dictionnaire price_eur / price_usd / timestamp / source, avec fetched_at
+            (epoch de la lecture amont) et age (secondes) ; stale=True si la source
+            amont a échoué et que la dernière valeur connue est servie
+        """
+        if not force and self.is_fresh:
+            return self._with_age(self._price)
+
+        # Un seul appel amont à la fois : les autres attendent le même résultat
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        try:
+            return self._with_age(await asyncio.shield(self._inflight))
+        except Exception as e:
+            logger.error(f"Erreur récupération prix KNO: {str(e)}")
+            if self._price is not None:
+                # Servir la dernière valeur connue plutôt qu'une valeur arbitraire
+                return {**self._with_age(self._price), "stale": True}
+            return {
+                "price_eur": 0.001,
+                "price_usd": 0.00115,
+                "timestamp": datetime.utcnow().isoformat(),
+                "source": "fallback",
+                "error": str(e)
+            }
+
+    async def _refresh(self) -> dict:
+        try:
+            price = {**await self.fetcher(), "fetched_at": time.time()}
+            previous = self._price
+            self._price = price
+            self._fetched_at = time.monotonic()
+            if previous is None or previous.get("price_eur") != price.get("price_eur"):
+                self._publish(price)
+            return price
+        finally:
+            self._inflight = None
+
+    @staticmethod
+    def _with_age(price: dict) -> dict:
+        # Âge calculé à chaque réponse : un consommateur peut refuser un prix trop ancien
+        return {**price, "age": round(max(time.time() - price["fetched_at"], 0.0), 3)}
+
+    # --- FLUX PUSH ---
+    def subscribe(self) -> asyncio.Queue:
+        """Abonne un consommateur aux mises à jour de prix"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if self._price is not None:
+            queue.put_nowait(self._price)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _publish(self, price: dict):
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Consommateur lent : on jette le plus ancien prix, seul le dernier compte
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(price)
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                if self._subscribers and not self.is_fresh:
+                    await self.get_price()
+            except Exception as e:
+                logger.error(f"Erreur boucle de rafraîchissement du prix: {e}")
+            await asyncio.sleep(self.ttl)
+
+    def start(self):
+        """Démarre la boucle de rafraîchissement (à appeler depuis la boucle d'événements)"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self.pool is not None:
+            await self.pool.stop()
+
+
+# Instance globale
+price_service = KNOPriceService()
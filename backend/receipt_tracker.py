@@ -0,0 +1,162 @@
+"""Suivi des reçus de transactions, bloc par bloc.
+
+Au lieu d'interroger `eth_getTransactionReceipt` toutes les 5 secondes pour
+chaque transaction, le tracker attend chaque nouveau bloc puis récupère les
+reçus de toutes les transactions en attente en une seule requête groupée.
+
+- nouveaux blocs via l'abonnement `newHeads` si POLYGON_WS_URL est défini,
+- sinon (ou si le websocket tombe) polling de `eth_blockNumber`, cadencé sur
+  le temps de bloc observé,
+- chaque transaction suivie est un futur asyncio que le bot peut attendre.
+
+La boucle ne tourne que tant qu'au moins une transaction est en attente.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Temps de bloc attendu (secondes), affiné ensuite avec les blocs observés
+RECEIPT_BLOCK_TIME = float(os.getenv("RECEIPT_BLOCK_TIME", "2"))
+# Endpoint websocket pour l'abonnement newHeads (optionnel)
+POLYGON_WS_URL = os.getenv("POLYGON_WS_URL", "")
+
+
+class ReceiptTracker:
+    def __init__(self, chain, block_time: float = RECEIPT_BLOCK_TIME, ws_url: str = POLYGON_WS_URL):
+        """
+        Reçus des transactions d'un bot
+
+        Args:
+            chain: Accès blockchain (chain.BaseChain)
+            block_time: Temps de bloc initial pour le polling (secondes)
+            ws_url: Endpoint websocket pour newHeads (vide : polling)
+        """
+        self.chain = chain
+        self.block_time = block_time
+        self.ws_url = ws_url
+        self.last_block: Optional[int] = None
+        self._last_block_at = 0.0
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, tx_hash) -> asyncio.Future:
+        """Futur résolu avec le reçu dès que la transaction est minée"""
+        key = self.chain.to_hex(tx_hash)
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._follow())
+        return future
+
+    async def wait(self, tx_hash, timeout: float = 180):
+        """
+        Attend le reçu d'une transaction
+
+        Args:
+            tx_hash: Hash de la transaction
+            timeout: Attente maximale (secondes)
+
+        Returns:
+            Reçu, ou None si la transaction n'est pas minée à temps
+        """
+        future = self.track(tx_hash)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pending = self._pending.pop(self.chain.to_hex(tx_hash), None)
+            if pending is not None:
+                pending.cancel()
+            return None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    # --- SUIVI DES BLOCS ---
+    async def _follow(self):
+        if self.ws_url:
+            try:
+                await self._follow_new_heads()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Abonnement newHeads indisponible ({e}), repli sur le polling")
+        await self._follow_polling()
+
+    async def _follow_new_heads(self):
+        from web3 import AsyncWeb3, WebSocketProvider
+
+        async with AsyncWeb3(WebSocketProvider(self.ws_url)) as w3:
+            await w3.eth.subscribe("newHeads")
+            # Transactions déjà minées avant l'abonnement
+            await self._resolve()
+            async for message in w3.socket.process_subscriptions():
+                if not self._pending:
+                    return
+                header = message.get("result") or {}
+                self.last_block = header.get("number", self.last_block)
+                await self._resolve()
+                if not self._pending:
+                    return
+
+    async def _follow_polling(self):
+        while self._pending:
+            try:
+                block = await self.chain.block_number()
+            except Exception as e:
+                logger.warning(f"Lecture du numéro de bloc impossible: {e}")
+                await asyncio.sleep(self.block_time)
+                continue
+
+            if block != self.last_block:
+                self._observe_block(block)
+                await self._resolve()
+                # Prochain bloc attendu dans ~block_time
+                delay = self.block_time * 0.9
+            else:
+                # Bloc en retard : on resserre les vérifications
+                delay = max(self.block_time / 4, 0.25)
+            if self._pending:
+                await asyncio.sleep(delay)
+
+    def _observe_block(self, block: int):
+        now = time.monotonic()
+        if self.last_block is not None and block > self.last_block:
+            observed = (now - self._last_block_at) / (block - self.last_block)
+            # Moyenne glissante du temps de bloc, bornée pour rester raisonnable
+            self.block_time = min(max(0.8 * self.block_time + 0.2 * observed, 0.2), 30.0)
+        self.last_block = block
+        self._last_block_at = now
+
+    async def _resolve(self):
+        """Une requête groupée pour les reçus de toutes les transactions en attente"""
+        tx_hashes = list(self._pending)
+        if not tx_hashes:
+            return
+        try:
+            receipts = await self.chain.get_transaction_receipts(tx_hashes)
+        except Exception as e:
+            logger.warning(f"Lecture groupée des reçus impossible: {e}")
+            return
+        for tx_hash, receipt in zip(tx_hashes, receipts):
+            if receipt is None:
+                continue
+            future = self._pending.pop(tx_hash, None)
+            if future is not None and not future.done():
+                future.set_result(receipt)
@@ -0,0 +1,121 @@
+# rollups.py
+"""Cumuls journaliers par bot (table `bot_daily_stats`).
+
+Chaque `POST /transactions` incrémente la ligne (bot, jour) dans la même
+transaction SQL que l'insertion : `/stats` et le dashboard lisent ces compteurs
+au lieu de parcourir l'historique des transactions.
+
+Usage (recalcul complet depuis l'historique brut) :
+    python rollups.py --rebuild
+"""
+
+import argparse
+import logging
+from datetime import date
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import engine
+from models import BotDailyStats, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _increments(transaction: Transaction) -> dict:
+    return {
+        "trade_count": 1,
+        "buy_count": 1 if transaction.type == "buy" else 0,
+        "sell_count": 1 if transaction.type == "sell" else 0,
+        "volume": transaction.amount or 0.0,
+        "profit": transaction.profit or 0.0,
+    }
+
+
+def _upsert_statement(dialect: str, bot_id: int, day: date, increments: dict):
+    """INSERT ... ON CONFLICT incrémental, ou None si le dialecte ne le supporte pas"""
+    table = BotDailyStats.__table__
+    values = {"bot_id": bot_id, "day": day, **increments}
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(**values)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.bot_id, table.c.day],
+            set_={name: table.c[name] + stmt.excluded[name] for name in increments},
+        )
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table).values(**values)
+        return stmt.on_duplicate_key_update(
+            {name: table.c[name] + stmt.inserted[name] for name in increments}
+        )
+
+    return None
+
+
+async def apply_transaction(db: AsyncSession, transaction: Transaction):
+    """
+    Ajoute une transaction aux cumuls de son bot (sans commit)
+
+    Args:
+        db: Session de la transaction en cours
+        transaction: Transaction insérée (timestamp déjà renseigné)
+    """
+    day = transaction.timestamp.date()
+    increments = _increments(transaction)
+
+    stmt = _upsert_statement(db.get_bind().dialect.name, transaction.bot_id, day, increments)
+    if stmt is not None:
+        await db.execute(stmt)
+        return
+
+    # Dialecte sans upsert : mise à jour, puis insertion si la ligne n'existe pas
+    table = BotDailyStats.__table__
+    result = await db.execute(
+        update(table)
+        .where(table.c.bot_id == transaction.bot_id, table.c.day == day)
+        .values({name: table.c[name] + value for name, value in increments.items()})
+    )
+    if result.rowcount == 0:
+        await db.execute(insert(table).values(bot_id=transaction.bot_id, day=day, **increments))
+
+
+def rebuild_rollups(conn):
+    """Recalcule tous les cumuls à partir de la table transactions"""
+    day = func.date(Transaction.timestamp)
+    history = select(
+        Transaction.bot_id,
+        day,
+        func.count(Transaction.id),
+        func.sum(case((Transaction.type == "buy", 1), else_=0)),
+        func.sum(case((Transaction.type == "sell", 1), else_=0)),
+        func.coalesce(func.sum(Transaction.amount), 0.0),
+        func.coalesce(func.sum(Transaction.profit), 0.0),
+    ).group_by(Transaction.bot_id, day)
+
+    conn.execute(delete(BotDailyStats.__table__))
+    result = conn.execute(insert(BotDailyStats.__table__).from_select(
+        ["bot_id", "day", "trade_count", "buy_count", "sell_count", "volume", "profit"],
+        history,
+    ))
+    logger.info(f"Cumuls recalculés: {result.rowcount} lignes (bot, jour)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cumuls journaliers par bot")
+    parser.add_argument("--rebuild", action="store_true", help="Recalcule les cumuls depuis l'historique")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+    else:
+        logging.basicConfig(level=logging.INFO)
+        from database import Base
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            rebuild_rollups(conn)
+        print("✅ Cumuls recalculés")
@@ -0,0 +1,274 @@
+"""Limiteur de débit RPC partagé par tous les bots d'une même machine.
+
+Un seau à jetons par endpoint RPC (nom d'hôte), stocké dans un petit fichier
+mappé en mémoire et protégé par flock : les sous-processus lancés par BotManager
+se partagent le même budget au lieu d'envoyer chacun 4 requêtes/s.
+
+- budget et rafale par endpoint (RPC_RATE / RPC_BURST, RPC_RATE_LIMITS pour surcharger),
+- les envois de transactions sont prioritaires : les lectures laissent
+  RPC_SEND_RESERVE jetons disponibles pour eux,
+- une erreur de rate limit (-32090, 429) bloque l'endpoint pour tous les bots
+  pendant RPC_RATE_LIMIT_PENALTY secondes,
+- les temps d'attente sont comptabilisés (voir `limiter_snapshot`, `GET /rpc/limits`).
+
+Sans fcntl (Windows), le seau est local au processus.
+"""
+
+import asyncio
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Requêtes/s et rafale par endpoint, tous bots confondus
+RPC_RATE = float(os.getenv("RPC_RATE", "8"))
+RPC_BURST = float(os.getenv("RPC_BURST", "16"))
+# Surcharges par hôte : "polygon-rpc.com=10:20,rpc.ankr.com=25:50"
+RPC_RATE_LIMITS = os.getenv("RPC_RATE_LIMITS", "")
+# Jetons que les lectures laissent aux envois de transactions
+RPC_SEND_RESERVE = float(os.getenv("RPC_SEND_RESERVE", "2"))
+# Pause imposée à tous les bots après une erreur de rate limit (secondes)
+RPC_RATE_LIMIT_PENALTY = float(os.getenv("RPC_RATE_LIMIT_PENALTY", "10"))
+RPC_LIMITER_DIR = os.getenv("RPC_LIMITER_DIR", os.path.join(tempfile.gettempdir(), "kno_rpc_limiter"))
+
+# Priorités
+READ = 0
+SEND = 1
+
+# jetons, mise à jour, bloqué jusqu'à, attente totale, attente max,
+# lectures, envois, acquisitions ayant attendu, pénalités
+_STATE = struct.Struct("<dddddQQQQ")
+_FIELDS = ("tokens", "updated", "blocked_until", "total_wait", "max_wait",
+           "reads", "sends", "waited", "penalties")
+
+
+def parse_rate_limits(spec: str) -> Dict[str, tuple]:
+    """Analyse RPC_RATE_LIMITS ("hôte=débit:rafale,...")"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, budget = item.partition("=")
+        rate, _, burst = budget.partition(":")
+        limits[host.strip().lower()] = (float(rate), float(burst or rate))
+    return limits
+
+
+def endpoint_key(rpc_url: str) -> str:
+    return (urlparse(rpc_url).hostname or rpc_url).lower()
+
+
+# "429" seul apparaît dans les hash, adresses et calldata des messages d'erreur :
+# uniquement comme statut HTTP explicite
+_HTTP_429 = re.compile(r"\bstatus(?:[ _]?code)?\W{0,3}429\b|\b429\W{0,3}client error\b")
+
+
+def _http_status(error: BaseException):
+    # requests/httpx : error.response.status_code ; aiohttp : error.status
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        status = getattr(error, "status", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    # Exception d'origine aussi (web3 enveloppe les erreurs HTTP)
+    cause, seen = error, set()
+    while cause is not None and id(cause) not in seen:
+        if _http_status(cause) == 429:
+            return True
+        seen.add(id(cause))
+        cause = cause.__cause__ or cause.__context__
+    message = str(error).lower()
+    return ("-32090" in message or "too many requests" in message or "rate limit" in message
+            or _HTTP_429.search(message) is not None)
+
+
+class _LocalState:
+    """État du seau en mémoire du processus (repli sans fcntl)"""
+
+    def __init__(self, burst: float):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(_FIELDS, 0)
+        self._values.update(tokens=burst, updated=time.time())
+
+    @contextmanager
+    def locked(self):
+        with self._lock:
+            yield self._values
+
+
+class _SharedState:
+    """État du seau dans un fichier mappé en mémoire, verrouillé avec flock"""
+
+    def __init__(self, path: str, burst: float):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < _STATE.size:
+                os.ftruncate(self._fd, _STATE.size)
+                initial = dict.fromkeys(_FIELDS, 0)
+                initial.update(tokens=burst, updated=time.time())
+                os.pwrite(self._fd, _STATE.pack(*(initial[name] for name in _FIELDS)), 0)
+            self._map = mmap.mmap(self._fd, _STATE.size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        # flock est par descripteur : le verrou de thread protège les appels
+        # concurrents du même processus (mode sync, asyncio.to_thread)
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def locked(self):
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                values = dict(zip(_FIELDS, _STATE.unpack_from(self._map, 0)))
+                yield values
+                _STATE.pack_into(self._map, 0, *(values[name] for name in _FIELDS))
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    def __init__(self, endpoint: str, rate: float = RPC_RATE, burst: float = RPC_BURST,
+                 send_reserve: float = RPC_SEND_RESERVE, shared: bool = True):
+        """
+        Seau à jetons d'un endpoint RPC
+
+        Args:
+            endpoint: Nom d'hôte de l'endpoint
+            rate: Jetons ajoutés par seconde
+            burst: Capacité du seau
+            send_reserve: Jetons que les lectures doivent laisser aux envois
+            shared: Partager l'état entre processus (fichier mappé)
+        """
+        self.endpoint = endpoint
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.send_reserve = min(send_reserve, self.burst - 1)
+        if shared and fcntl is not None:
+            file_name = re.sub(r"[^a-z0-9.-]", "_", endpoint) + ".bucket"
+            self._state = _SharedState(os.path.join(RPC_LIMITER_DIR, file_name), self.burst)
+        else:
+            self._state = _LocalState(self.burst)
+
+    def _refill(self, state: dict, now: float):
+        elapsed = max(now - state["updated"], 0.0)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+        state["updated"] = now
+
+    def _try_take(self, priority: int, waited: float) -> float:
+        """Prend un jeton si possible ; sinon retourne l'attente estimée (secondes)"""
+        with self._state.locked() as state:
+            now = time.time()
+            self._refill(state, now)
+            if now < state["blocked_until"]:
+                return state["blocked_until"] - now
+
+            needed = 1.0 if priority == SEND else 1.0 + self.send_reserve
+            if state["tokens"] < needed:
+                return (needed - state["tokens"]) / self.rate
+
+            state["tokens"] -= 1.0
+            state["sends" if priority == SEND else "reads"] += 1
+            if waited > 0:
+                state["waited"] += 1
+                state["total_wait"] += waited
+                state["max_wait"] = max(state["max_wait"], waited)
+            return 0.0
+
+    async def acquire(self, priority: int = READ) -> float:
+        """
+        Attend un jeton
+
+        Args:
+            priority: READ ou SEND (les envois passent avant les lectures)
+
+        Returns:
+            Temps d'attente (secondes)
+        """
+        start = time.monotonic()
+        waited = 0.0
+        while True:
+            wait = self._try_take(priority, waited)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited = time.monotonic() - start
+
+    def penalize(self, seconds: float = RPC_RATE_LIMIT_PENALTY):
+        """Bloque l'endpoint pour tous les bots après une erreur de rate limit"""
+        with self._state.locked() as state:
+            now = time.time()
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+            state["tokens"] = 0.0
+            state["updated"] = now
+            state["penalties"] += 1
+        logger.warning(f"Rate limit RPC sur {self.endpoint} → pause partagée de {seconds:.0f}s")
+
+    def blocked_for(self) -> float:
+        """Secondes restantes de pause après un rate limit (0 si l'endpoint est libre)"""
+        with self._state.locked() as state:
+            return max(state["blocked_until"] - time.time(), 0.0)
+
+    def snapshot(self) -> dict:
+        with self._state.locked() as state:
+            self._refill(state, time.time())
+            values = dict(state)
+        acquired = values["reads"] + values["sends"]
+        return {
+            "endpoint": self.endpoint,
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(values["tokens"], 2),
+            "blocked_for": round(max(values["blocked_until"] - time.time(), 0.0), 2),
+            "reads": values["reads"],
+            "sends": values["sends"],
+            "waited": values["waited"],
+            "penalties": values["penalties"],
+            "avg_wait": round(values["total_wait"] / acquired, 4) if acquired else 0.0,
+            "max_wait": round(values["max_wait"], 4),
+        }
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def _bucket(key: str) -> TokenBucket:
+    with _limiters_lock:
+        if key not in _limiters:
+            rate, burst = parse_rate_limits(RPC_RATE_LIMITS).get(key, (RPC_RATE, RPC_BURST))
+            _limiters[key] = TokenBucket(key, rate, burst)
+        return _limiters[key]
+
+
+def get_limiter(rpc_url: str) -> TokenBucket:
+    """Seau partagé de l'endpoint (un par hôte et par processus)"""
+    return _bucket(endpoint_key(rpc_url))
+
+
+def limiter_snapshot() -> list:
+    """État et métriques de tous les endpoints utilisés sur la machine"""
+    if fcntl is None or not os.path.isdir(RPC_LIMITER_DIR):
+        return [limiter.snapshot() for limiter in _limiters.values()]
+    return [
+        _bucket(file_name[:-len(".bucket")]).snapshot()
+        for file_name in sorted(os.listdir(RPC_LIMITER_DIR))
+        if file_name.endswith(".bucket")
+    ]
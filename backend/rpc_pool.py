@@ -0,0 +1,299 @@
+"""Pool d'endpoints RPC avec suivi de santé et basculement.
+
+Un bot peut utiliser plusieurs endpoints Polygon (champ `rpc_endpoint` du bot,
+séparé par des virgules, complété par POLYGON_RPC_URLS pour toute la machine) :
+
+- la latence et le taux d'erreur de chaque endpoint sont suivis (moyennes glissantes),
+- les lectures partent vers l'endpoint sain le plus rapide, et basculent sur le
+  suivant en cas d'erreur réseau, de timeout ou de rate limit,
+- les transactions signées sont diffusées à RPC_BROADCAST endpoints à la fois
+  (la première acceptation suffit),
+- un disjoncteur écarte un endpoint après RPC_BREAKER_FAILURES échecs consécutifs ;
+  il est retenté après RPC_BREAKER_COOLDOWN secondes (délai doublé à chaque
+  nouvel échec, plafonné à RPC_BREAKER_MAX_COOLDOWN).
+
+Si tous les endpoints sont écartés, le moins récemment écarté est quand même
+utilisé : une panne générale ralentit les bots sans les arrêter.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from web3 import Web3
+
+from chain import BaseChain, BatchRequestError, create_member_chain
+from rpc_limiter import is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+# Endpoints supplémentaires communs à tous les bots : "https://a,https://b"
+POLYGON_RPC_URLS = os.getenv("POLYGON_RPC_URLS", "")
+# Nombre d'endpoints qui reçoivent chaque transaction signée
+RPC_BROADCAST = int(os.getenv("RPC_BROADCAST", "3"))
+# Endpoints essayés au plus pour une lecture
+RPC_READ_ATTEMPTS = int(os.getenv("RPC_READ_ATTEMPTS", "3"))
+# Disjoncteur
+RPC_BREAKER_FAILURES = int(os.getenv("RPC_BREAKER_FAILURES", "3"))
+RPC_BREAKER_COOLDOWN = float(os.getenv("RPC_BREAKER_COOLDOWN", "30"))
+RPC_BREAKER_MAX_COOLDOWN = float(os.getenv("RPC_BREAKER_MAX_COOLDOWN", "600"))
+
+# Poids des mesures récentes dans les moyennes glissantes
+_ALPHA = 0.2
+# Pénalité de score par point de taux d'erreur
+_ERROR_WEIGHT = 4.0
+
+# Réponses d'un nœud en retard ou surchargé (l'endpoint est en cause, pas la requête)
+ENDPOINT_ERRORS = ("header not found", "missing trie node", "service unavailable",
+                   "bad gateway", "gateway timeout", "503", "502", "504")
+# Le nœud a déjà la transaction : diffusion réussie
+KNOWN_TX_ERRORS = ("already known", "known transaction")
+
+
+def parse_endpoints(*specs: Optional[str]) -> List[str]:
+    """Liste d'endpoints sans doublons à partir de chaînes séparées par des virgules"""
+    endpoints = []
+    for spec in specs:
+        for url in (spec or "").replace(";", ",").split(","):
+            url = url.strip().rstrip("/")
+            if url and url not in endpoints:
+                endpoints.append(url)
+    return endpoints
+
+
+def is_endpoint_error(error: Exception) -> bool:
+    """L'erreur vient de l'endpoint (réseau, timeout, rate limit) et pas de la requête elle-même"""
+    if is_rate_limit_error(error):
+        return True
+    if isinstance(error, (asyncio.TimeoutError, OSError, BatchRequestError)):
+        return True
+    if type(error).__module__.split(".")[0] in ("aiohttp", "requests", "urllib3"):
+        return True
+    message = str(error).lower()
+    return any(pattern in message for pattern in ENDPOINT_ERRORS)
+
+
+@dataclass
+class EndpointHealth:
+    url: str
+    latency: float = 0.0            # moyenne glissante (secondes), 0 tant que non mesurée
+    error_rate: float = 0.0         # moyenne glissante des échecs (0 à 1)
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    opened_until: float = 0.0       # disjoncteur ouvert jusqu'à (monotonic)
+    cooldown: float = RPC_BREAKER_COOLDOWN
+    trial: bool = False             # requête d'essai en cours (semi-ouvert)
+
+    @property
+    def state(self) -> str:
+        if not self.opened_until:
+            return "closed"
+        return "open" if time.monotonic() < self.opened_until else "half-open"
+
+    def available(self) -> bool:
+        state = self.state
+        return state == "closed" or (state == "half-open" and not self.trial)
+
+    def score(self, blocked_for: float = 0.0) -> float:
+        """Plus petit = meilleur ; un endpoint jamais mesuré passe en premier"""
+        return self.latency * (1 + _ERROR_WEIGHT * self.error_rate) + blocked_for
+
+    def record_success(self, elapsed: float):
+        self.requests += 1
+        self.latency = elapsed if not self.latency else (1 - _ALPHA) * self.latency + _ALPHA * elapsed
+        self.error_rate *= 1 - _ALPHA
+        self.consecutive_failures = 0
+        self.trial = False
+        if self.opened_until:
+            logger.info(f"Endpoint RPC {self.url} rétabli")
+            self.opened_until = 0.0
+            self.cooldown = RPC_BREAKER_COOLDOWN
+
+    def record_failure(self, error: Exception):
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = (1 - _ALPHA) * self.error_rate + _ALPHA
+        self.consecutive_failures += 1
+        was_trial, self.trial = self.trial, False
+        if was_trial or self.consecutive_failures >= RPC_BREAKER_FAILURES:
+            if was_trial:
+                self.cooldown = min(self.cooldown * 2, RPC_BREAKER_MAX_COOLDOWN)
+            self.opened_until = time.monotonic() + self.cooldown
+            logger.warning(f"Endpoint RPC {self.url} écarté pendant {self.cooldown:.0f}s ({error})")
+
+    def snapshot(self) -> dict:
+        return {
+            "endpoint": self.url,
+            "state": self.state,
+            "latency": round(self.latency, 4),
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class RpcPool(BaseChain):
+    def __init__(self, rpc_urls: Iterable[str], mode: Optional[str] = None):
+        """
+        Accès blockchain réparti sur plusieurs endpoints (même interface que BaseChain)
+
+        Args:
+            rpc_urls: Endpoints RPC, par ordre de préférence initial
+            mode: "async" ou "sync" pour les accès de chaque endpoint (WEB3_MODE par défaut)
+        """
+        rpc_urls = list(rpc_urls)
+        if not rpc_urls:
+            raise ValueError("Aucun endpoint RPC configuré")
+        self.members = [create_member_chain(url, mode) for url in rpc_urls]
+        self.health = [EndpointHealth(url) for url in rpc_urls]
+        # Contrats et limiteur de référence sur le premier endpoint ; les fonctions de
+        # contrat sont rattachées à l'endpoint choisi au moment de l'appel
+        super().__init__(self.members[0].w3, ",".join(rpc_urls), self.members[0].limiter)
+        self._contracts: Dict[tuple, object] = {}
+        self._background = set()
+
+    # --- ROUTAGE ---
+    def _ranked(self) -> List[int]:
+        """Index des endpoints utilisables, du meilleur au moins bon"""
+        scores = {
+            i: health.score(self.members[i].limiter.blocked_for())
+            for i, health in enumerate(self.health) if health.available()
+        }
+        if scores:
+            return sorted(scores, key=scores.get)
+        # Tous écartés : on retente quand même, le moins récemment écarté d'abord
+        return sorted(range(len(self.health)), key=lambda i: self.health[i].opened_until)
+
+    def _bind(self, index: int, contract_fn):
+        """Rattache une fonction de contrat au Web3 de l'endpoint choisi"""
+        member = self.members[index]
+        if contract_fn.w3 is member.w3:
+            return contract_fn
+        key = (index, contract_fn.address, contract_fn.fn_name)
+        if key not in self._contracts:
+            self._contracts[key] = member.w3.eth.contract(address=contract_fn.address, abi=contract_fn.contract_abi)
+        return self._contracts[key].functions[contract_fn.fn_name](*contract_fn.args, **contract_fn.kwargs)
+
+    async def _call_member(self, index: int, method: str, *args, bind: bool = False):
+        health = self.health[index]
+        if health.state == "half-open":
+            health.trial = True
+        if bind:
+            args = (self._bind(index, args[0]),) + args[1:]
+        start = time.monotonic()
+        try:
+            result = await getattr(self.members[index], method)(*args)
+        except Exception as e:
+            if is_endpoint_error(e):
+                health.record_failure(e)
+            else:
+                # Le nœud a répondu (revert, nonce...) : il est sain
+                health.record_success(time.monotonic() - start)
+            raise
+        health.record_success(time.monotonic() - start)
+        return result
+
+    async def _read(self, method: str, *args, bind: bool = False):
+        last_error = None
+        for index in self._ranked()[:max(RPC_READ_ATTEMPTS, 1)]:
+            try:
+                return await self._call_member(index, method, *args, bind=bind)
+            except Exception as e:
+                if not is_endpoint_error(e):
+                    raise
+                logger.warning(f"{method} échoué sur {self.health[index].url} ({e}), endpoint suivant")
+                last_error = e
+        raise last_error
+
+    # --- LECTURES ---
+    async def call(self, contract_fn):
+        return await self._read("call", contract_fn, bind=True)
+
+    async def get_transaction_count(self, address: str, block: str = "pending") -> int:
+        return await self._read("get_transaction_count", address, block)
+
+    async def gas_price(self) -> int:
+        return await self._read("gas_price")
+
+    async def fee_history(self, block_count: int, percentiles: list) -> dict:
+        return await self._read("fee_history", block_count, percentiles)
+
+    async def estimate_gas(self, contract_fn, params: dict) -> int:
+        return await self._read("estimate_gas", contract_fn, params, bind=True)
+
+    async def block_number(self) -> int:
+        return await self._read("block_number")
+
+    async def get_transaction_receipt(self, tx_hash):
+        return await self._read("get_transaction_receipt", tx_hash)
+
+    async def batch_request(self, calls: list) -> list:
+        if not calls:
+            return []
+        return await self._read("batch_request", calls)
+
+    # --- TRANSACTIONS ---
+    async def build_transaction(self, contract_fn, params: dict) -> dict:
+        return await self._read("build_transaction", contract_fn, params, bind=True)
+
+    async def send_raw_transaction(self, raw_transaction) -> bytes:
+        """
+        Diffuse la transaction signée sur les RPC_BROADCAST meilleurs endpoints
+
+        Returns:
+            Hash de la transaction dès la première acceptation
+
+        Raises:
+            L'erreur d'un nœud ayant refusé la transaction (nonce, fonds...) de préférence
+            à une erreur réseau, si aucun endpoint ne l'a acceptée
+        """
+        tx_hash = Web3.keccak(raw_transaction)
+        targets = self._ranked()[:max(RPC_BROADCAST, 1)]
+        tasks = [asyncio.create_task(self._call_member(index, "send_raw_transaction", raw_transaction))
+                 for index in targets]
+        for task in tasks:
+            # Les envois restants continuent après la première acceptation
+            self._background.add(task)
+            task.add_done_callback(self._forget_task)
+
+        errors = []
+        for done in asyncio.as_completed(tasks):
+            try:
+                return await done
+            except Exception as e:
+                if any(pattern in str(e).lower() for pattern in KNOWN_TX_ERRORS):
+                    return tx_hash
+                errors.append(e)
+        rejected = [e for e in errors if not is_endpoint_error(e)]
+        raise (rejected or errors)[0]
+
+    def _forget_task(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled():
+            # Erreur déjà prise en compte dans la santé de l'endpoint
+            task.exception()
+
+    # --- ÉTAT ---
+    async def is_connected(self) -> bool:
+        """Vrai si au moins un endpoint répond"""
+        results = await asyncio.gather(*(member.is_connected() for member in self.members),
+                                       return_exceptions=True)
+        for health, result in zip(self.health, results):
+            if result is not True:
+                health.record_failure(result if isinstance(result, Exception) else ConnectionError("injoignable"))
+        return any(result is True for result in results)
+
+    def status(self) -> list:
+        return [
+            {**health.snapshot(), "limiter": member.limiter.snapshot()}
+            for health, member in zip(self.health, self.members)
+        ]
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*(member.close() for member in self.members), return_exceptions=True)
@@ -1,6 +1,6 @@
 # schemas.py
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict, Union
 from datetime import datetime
 
 # Schémas pour les utilisateurs
@@ -155,6 +155,7 @@ class KNOBotConfig(BaseModel):
     router_address: str
     status: str
     is_active: bool
+    config_version: Optional[int] = None
 
 # Schéma pour mettre à jour le prix de référence
 class ReferencePriceUpdate(BaseModel):
@@ -177,6 +178,8 @@ class TransactionCreate(BaseModel):
     price: float
     profit: Optional[float] = None
     tx_hash: Optional[str] = None
+    gas_cost: Optional[float] = None
+    effective_price: Optional[float] = None
 
 class TransactionResponse(BaseModel):
     id: int
@@ -186,7 +189,75 @@ class TransactionResponse(BaseModel):
     price: float
     profit: Optional[float]
     tx_hash: Optional[str]
+    gas_cost: Optional[float] = None
+    effective_price: Optional[float] = None
     timestamp: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Schémas pour l'optimisation des paramètres (sweep.py)
+class OptimizeRequest(BaseModel):
+    series: str = "kno_wpol.npy"  # fichier .npy de PRICE_HISTORY_DIR
+    # Par paramètre : liste de valeurs, ou {"min": ..., "max": ...} en tirage aléatoire
+    space: Dict[str, Union[List[float], Dict[str, float]]]
+    samples: Optional[int] = Field(None, ge=1)  # tirage aléatoire de N combinaisons (grille sinon)
+    seed: Optional[int] = None
+    rank_by: str = "pnl"  # pnl, calmar
+    initial_quote: float = 100.0
+    initial_kno: float = 0.0
+    slippage_percent: float = 0.5
+    gas_cost: float = 0.01
+    tick_seconds: float = 60
+
+    def check_space(self):
+        """
+        Vérifie l'espace de recherche (l'API renvoie l'erreur en 400)
+
+        Raises:
+            ValueError: liste de valeurs vide, intervalle sans exactement min/max, ou min > max
+        """
+        for name, values in self.space.items():
+            if isinstance(values, dict):
+                if set(values) != {"min", "max"}:
+                    raise ValueError(f'{name}: intervalle attendu sous la forme {{"min": ..., "max": ...}}')
+                if values["min"] > values["max"]:
+                    raise ValueError(f"{name}: min supérieur à max")
+            elif not values:
+                raise ValueError(f"{name}: liste de valeurs vide")
+
+class OptimizationRunResponse(BaseModel):
+    id: int
+    bot_id: int
+    status: str
+    series: str
+    rank_by: str
+    total: int
+    completed: int
+    best_score: Optional[float] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class OptimizationResultResponse(BaseModel):
+    volatility_percent: float
+    buy_amount: float
+    sell_amount: float
+    min_swap_amount: float
+    trade_cooldown: float
+    pnl: float
+    max_drawdown: float
+    buys: int
+    sells: int
+    gas: float
+    score: float
+    
+    class Config:
+        from_attributes = True
+
+class OptimizationResponse(BaseModel):
+    run: OptimizationRunResponse
+    results: List[OptimizationResultResponse]
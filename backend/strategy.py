@@ -0,0 +1,46 @@
+"""Stratégie de bande autour du prix de référence.
+
+Utilisée telle quelle par le bot (KNOTradingBot.start) et par le backtest :
+achat quand le prix passe sous `référence * (1 - volatilité)`, vente quand il
+dépasse `référence * (1 + volatilité)`, puis la référence devient le prix du trade.
+"""
+
+from typing import Tuple
+
+BUY = 1
+SELL = -1
+HOLD = 0
+
+
+def band_limits(reference: float, volatility: float) -> Tuple[float, float]:
+    """
+    Bornes d'achat et de vente
+
+    Args:
+        reference: Prix de référence (dernier trade)
+        volatility: Largeur de la bande (0.05 pour 5 %)
+
+    Returns:
+        (prix d'achat maximal, prix de vente minimal)
+    """
+    return reference * (1 - volatility), reference * (1 + volatility)
+
+
+def band_signal(price: float, reference: float, volatility: float) -> int:
+    """
+    Décision de trading pour un prix
+
+    Args:
+        price: Prix actuel
+        reference: Prix de référence
+        volatility: Largeur de la bande (0.05 pour 5 %)
+
+    Returns:
+        BUY, SELL ou HOLD
+    """
+    low, high = band_limits(reference, volatility)
+    if price <= low:
+        return BUY
+    if price >= high:
+        return SELL
+    return HOLD
@@ -0,0 +1,467 @@
+"""Superviseur des workers de bots (BOT_RUNNER=supervisor).
+
+Les bots sont répartis entre BOT_SUPERVISOR_WORKERS processus workers (bot_runner.py,
+un par cœur par défaut, chacun épinglé sur son CPU) :
+
+- placement par hachage cohérent sur `bot_id` : ajouter, perdre ou relancer un
+  worker ne déplace que les bots de ce worker,
+- un worker mort voit ses bots redémarrés sur les workers suivants de l'anneau,
+  puis il est relancé avec un délai exponentiel (BOT_SUPERVISOR_BACKOFF, plafonné à
+  BOT_SUPERVISOR_MAX_BACKOFF) ; ses bots lui reviennent une fois relancé,
+- les workers sont détachés de l'API (socket Unix de contrôle, logs dans
+  BOT_SUPERVISOR_DIR) et les affectations sont persistées dans
+  BOT_SUPERVISOR_DIR/assignments.json : une API redémarrée se rattache aux workers
+  existants au lieu de relancer les bots en double.
+
+Arrêt complet des workers :
+    python supervisor.py stop
+"""
+
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+BOT_SUPERVISOR_DIR = os.getenv("BOT_SUPERVISOR_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot_supervisor"))
+# Nombre de workers (un par CPU disponible par défaut)
+BOT_SUPERVISOR_WORKERS = int(os.getenv("BOT_SUPERVISOR_WORKERS", "0")) or len(
+    os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else range(os.cpu_count() or 1)
+)
+# Épingler chaque worker sur un CPU (Linux)
+BOT_SUPERVISOR_PIN = os.getenv("BOT_SUPERVISOR_PIN", "true").lower() == "true"
+BOT_SUPERVISOR_VNODES = int(os.getenv("BOT_SUPERVISOR_VNODES", "64"))
+# Surveillance et relance des workers (secondes)
+BOT_SUPERVISOR_CHECK = float(os.getenv("BOT_SUPERVISOR_CHECK", "2"))
+BOT_SUPERVISOR_BACKOFF = float(os.getenv("BOT_SUPERVISOR_BACKOFF", "1"))
+BOT_SUPERVISOR_MAX_BACKOFF = float(os.getenv("BOT_SUPERVISOR_MAX_BACKOFF", "60"))
+# Un worker vivant depuis ce délai repart avec un délai de relance minimal
+BOT_SUPERVISOR_STABLE = float(os.getenv("BOT_SUPERVISOR_STABLE", "60"))
+# Attente des réponses d'un worker (un arrêt de bot peut prendre BOT_STOP_TIMEOUT)
+BOT_SUPERVISOR_TIMEOUT = float(os.getenv("BOT_SUPERVISOR_TIMEOUT", "15"))
+
+RUNNER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot_runner.py")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    def __init__(self, workers: List[int], vnodes: int = BOT_SUPERVISOR_VNODES):
+        """
+        Anneau de hachage cohérent
+
+        Args:
+            workers: Index des workers
+            vnodes: Points par worker sur l'anneau (répartition plus régulière)
+        """
+        points = sorted((_hash(f"worker-{worker}-{i}"), worker) for worker in workers for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def owner(self, bot_id: int, alive: Optional[Set[int]] = None) -> Optional[int]:
+        """Premier worker (vivant si `alive` est fourni) après le bot sur l'anneau"""
+        if not self._keys:
+            return None
+        start = bisect.bisect(self._keys, _hash(f"bot-{bot_id}"))
+        for offset in range(len(self._keys)):
+            worker = self._workers[(start + offset) % len(self._keys)]
+            if alive is None or worker in alive:
+                return worker
+        return None
+
+
+@dataclass
+class WorkerSlot:
+    index: int
+    socket: str
+    cpu: Optional[int] = None
+    pid: Optional[int] = None
+    process: Optional[subprocess.Popen] = None   # seulement si lancé par cette API
+    alive: bool = False
+    started_at: float = 0.0
+    failures: int = 0
+    next_restart: float = 0.0
+
+    def process_exists(self) -> bool:
+        if self.process is not None:
+            return self.process.poll() is None
+        if not self.pid:
+            return False
+        try:
+            os.kill(self.pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+
+class Supervisor:
+    def __init__(self, api_url: str, workers: int = BOT_SUPERVISOR_WORKERS, state_dir: str = BOT_SUPERVISOR_DIR):
+        """
+        Répartition des bots sur un pool de workers détachés
+
+        Args:
+            api_url: URL de l'API transmise aux bots
+            workers: Nombre de workers
+            state_dir: Sockets, logs et affectations persistées
+        """
+        self.api_url = api_url
+        self.state_dir = state_dir
+        self.state_file = os.path.join(state_dir, "assignments.json")
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        self.slots: Dict[int, WorkerSlot] = {
+            index: WorkerSlot(index, os.path.join(state_dir, f"worker_{index}.sock"),
+                              cpus[index % len(cpus)] if cpus and BOT_SUPERVISOR_PIN else None)
+            for index in range(max(workers, 1))
+        }
+        self.ring = HashRing(list(self.slots))
+        self.assignments: Dict[int, int] = {}   # bot_id -> worker
+        self._lock = asyncio.Lock()
+        self._monitor: Optional[asyncio.Task] = None
+
+    # --- PERSISTANCE ---
+    def _load(self) -> dict:
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        state = {
+            "workers": {str(slot.index): {"pid": slot.pid, "cpu": slot.cpu} for slot in self.slots.values()},
+            "bots": {str(bot_id): worker for bot_id, worker in self.assignments.items()},
+        }
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_file)
+
+    # --- COMMUNICATION AVEC LES WORKERS ---
+    async def _request(self, slot: WorkerSlot, command: dict, timeout: float = BOT_SUPERVISOR_TIMEOUT) -> dict:
+        reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(slot.socket), timeout)
+        try:
+            writer.write((json.dumps(command) + "\n").encode())
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), timeout)
+            if not line:
+                raise ConnectionError(f"Worker {slot.index} a fermé la connexion")
+            return json.loads(line)
+        finally:
+            writer.close()
+
+    async def _spawn(self, slot: WorkerSlot) -> bool:
+        os.makedirs(self.state_dir, exist_ok=True)
+        log = open(os.path.join(self.state_dir, f"worker_{slot.index}.log"), "a")
+        env = dict(os.environ, API_URL=self.api_url)
+        try:
+            slot.process = subprocess.Popen(
+                [sys.executable, RUNNER_SCRIPT, "--socket", slot.socket],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                cwd=os.path.dirname(RUNNER_SCRIPT), env=env,
+                start_new_session=True,  # survit à l'arrêt de l'API
+            )
+        finally:
+            log.close()
+        slot.pid = slot.process.pid
+        if slot.cpu is not None:
+            try:
+                os.sched_setaffinity(slot.pid, {slot.cpu})
+            except OSError as e:
+                logger.warning(f"Épinglage du worker {slot.index} sur le CPU {slot.cpu} impossible: {e}")
+
+        # Attente du socket de contrôle
+        deadline = time.monotonic() + BOT_SUPERVISOR_TIMEOUT
+        while time.monotonic() < deadline and slot.process_exists():
+            try:
+                await self._request(slot, {"cmd": "status"}, timeout=1)
+                slot.alive = True
+                slot.started_at = time.monotonic()
+                self._save()
+                logger.info(f"Worker {slot.index} démarré (PID {slot.pid}, CPU {slot.cpu})")
+                return True
+            except (OSError, asyncio.TimeoutError, ValueError):
+                await asyncio.sleep(0.1)
+        logger.error(f"Worker {slot.index} n'a pas démarré (voir worker_{slot.index}.log)")
+        await self._kill(slot)
+        return False
+
+    async def _kill(self, slot: WorkerSlot):
+        if slot.process_exists():
+            try:
+                os.kill(slot.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if slot.process is not None:
+            await asyncio.to_thread(slot.process.wait)
+        slot.alive = False
+
+    # --- CYCLE DE VIE ---
+    async def _attach_workers(self, state: dict) -> List[WorkerSlot]:
+        """
+        Rattachement aux workers enregistrés dans l'état persisté
+
+        Returns:
+            Emplacements dont le worker enregistré est mort (pid remis à None)
+        """
+        dead = []
+        for index, info in state.get("workers", {}).items():
+            slot = self.slots.get(int(index))
+            if slot is None or not info.get("pid"):
+                continue
+            slot.pid = info["pid"]
+            if slot.process_exists():
+                try:
+                    reply = await self._request(slot, {"cmd": "status"}, timeout=2)
+                    slot.alive = slot.pid == reply.get("pid")
+                except (OSError, asyncio.TimeoutError, ValueError):
+                    slot.alive = False
+            if slot.alive:
+                slot.started_at = time.monotonic()
+                logger.info(f"Rattaché au worker {slot.index} (PID {slot.pid})")
+            else:
+                # PID d'un autre processus peut-être : jamais signalé
+                slot.pid = None
+                dead.append(slot)
+        return dead
+
+    async def attach(self):
+        """Rattachement seul (`python supervisor.py stop`) : aucun worker relancé, aucun bot placé"""
+        async with self._lock:
+            await self._attach_workers(self._load())
+
+    async def start(self):
+        """Se rattache aux workers existants (API redémarrée) et lance la surveillance"""
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("BOT_RUNNER=supervisor nécessite les sockets Unix (Linux/macOS)")
+        os.makedirs(self.state_dir, exist_ok=True)
+        async with self._lock:
+            state = self._load()
+            for slot in await self._attach_workers(state):
+                # Mort pendant l'arrêt de l'API : relancé, ses bots lui reviennent ensuite
+                await self._spawn(slot)
+
+            wanted = {int(bot_id): worker for bot_id, worker in state.get("bots", {}).items()}
+            running = await self._running_bots()
+            for bot_id, worker in wanted.items():
+                if bot_id in running:
+                    self.assignments[bot_id] = running[bot_id]
+                else:
+                    # Worker disparu pendant l'arrêt de l'API : le bot est relancé
+                    await self._place(bot_id)
+            for slot in self.slots.values():
+                if slot.alive:
+                    await self._rebalance(slot.index)
+            self._save()
+        self._monitor = asyncio.create_task(self._monitor_loop())
+
+    async def detach(self):
+        """Arrêt de l'API : les workers et leurs bots continuent"""
+        if self._monitor is not None:
+            # Le verrou garantit qu'aucune vérification n'est interrompue en cours de route
+            async with self._lock:
+                self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+        logger.info("Superviseur détaché, les workers continuent")
+
+    async def shutdown(self):
+        """Arrête tous les workers et leurs bots"""
+        await self.detach()
+        async with self._lock:
+            for slot in self.slots.values():
+                if not slot.pid:
+                    continue
+                try:
+                    await self._request(slot, {"cmd": "shutdown"})
+                except (OSError, asyncio.TimeoutError, ValueError):
+                    pass
+                deadline = time.monotonic() + BOT_SUPERVISOR_TIMEOUT
+                while slot.process_exists() and time.monotonic() < deadline:
+                    await asyncio.sleep(0.1)
+                await self._kill(slot)
+                slot.pid = None
+            self.assignments.clear()
+            self._save()
+
+    # --- PLACEMENT ---
+    def _alive(self) -> Set[int]:
+        return {index for index, slot in self.slots.items() if slot.alive}
+
+    async def _running_bots(self) -> Dict[int, int]:
+        """bot_id -> worker, d'après les workers vivants"""
+        running = {}
+        for slot in self.slots.values():
+            if not slot.alive:
+                continue
+            try:
+                reply = await self._request(slot, {"cmd": "status"})
+            except (OSError, asyncio.TimeoutError, ValueError):
+                continue
+            running.update({bot_id: slot.index for bot_id in reply.get("bots", [])})
+        return running
+
+    async def _ensure_worker(self, index: int) -> bool:
+        slot = self.slots[index]
+        if slot.alive:
+            return True
+        if time.monotonic() < slot.next_restart:
+            return False
+        return await self._spawn(slot)
+
+    async def _place(self, bot_id: int) -> Optional[int]:
+        """Démarre le bot sur son worker (ou le suivant de l'anneau si indisponible)"""
+        candidates = set(self.slots)
+        while candidates:
+            index = self.ring.owner(bot_id, candidates)
+            if await self._ensure_worker(index):
+                try:
+                    await self._request(self.slots[index], {"cmd": "start", "bot_id": bot_id})
+                    self.assignments[bot_id] = index
+                    return index
+                except (OSError, asyncio.TimeoutError, ValueError) as e:
+                    logger.warning(f"Démarrage du bot {bot_id} sur le worker {index} impossible: {e}")
+            candidates.discard(index)
+        logger.error(f"Aucun worker disponible pour le bot {bot_id}")
+        self.assignments.pop(bot_id, None)
+        return None
+
+    async def start_bot(self, bot_id: int) -> Optional[WorkerSlot]:
+        async with self._lock:
+            if bot_id in self.assignments:
+                logger.info(f"Bot {bot_id} déjà affecté au worker {self.assignments[bot_id]}")
+                return self.slots[self.assignments[bot_id]]
+            index = await self._place(bot_id)
+            self._save()
+            return self.slots[index] if index is not None else None
+
+    async def stop_bot(self, bot_id: int) -> bool:
+        async with self._lock:
+            index = self.assignments.pop(bot_id, None)
+            self._save()
+            if index is None or not self.slots[index].alive:
+                return True
+            try:
+                await self._request(self.slots[index], {"cmd": "stop", "bot_id": bot_id})
+                return True
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning(f"Arrêt du bot {bot_id} sur le worker {index} non confirmé: {e}")
+                return False
+
+    def is_running(self, bot_id: int) -> bool:
+        return bot_id in self.assignments
+
+    def worker_of(self, bot_id: int) -> Optional[WorkerSlot]:
+        index = self.assignments.get(bot_id)
+        return self.slots[index] if index is not None else None
+
+    # --- SURVEILLANCE ---
+    async def _monitor_loop(self):
+        while True:
+            await asyncio.sleep(BOT_SUPERVISOR_CHECK)
+            try:
+                async with self._lock:
+                    await self._check()
+            except Exception as e:
+                logger.error(f"Erreur de supervision: {e}")
+
+    async def _check(self):
+        now = time.monotonic()
+        dead = []
+        for slot in self.slots.values():
+            if not slot.alive:
+                continue
+            try:
+                reply = await self._request(slot, {"cmd": "status"})
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                if slot.process_exists():
+                    logger.warning(f"Worker {slot.index} ne répond pas ({e})")
+                    continue
+                dead.append(slot)
+                continue
+            if slot.failures and now - slot.started_at > BOT_SUPERVISOR_STABLE:
+                slot.failures = 0
+            # Bots arrêtés d'eux-mêmes (erreur, arrêt demandé par le bot)
+            running = set(reply.get("bots", []))
+            for bot_id in [b for b, w in self.assignments.items() if w == slot.index and b not in running]:
+                logger.info(f"Bot {bot_id} n'est plus actif sur le worker {slot.index}")
+                del self.assignments[bot_id]
+
+        for slot in dead:
+            await self._kill(slot)
+            slot.failures += 1
+            delay = min(BOT_SUPERVISOR_BACKOFF * 2 ** (slot.failures - 1), BOT_SUPERVISOR_MAX_BACKOFF)
+            slot.next_restart = now + delay
+            orphans = [bot_id for bot_id, worker in self.assignments.items() if worker == slot.index]
+            logger.error(f"Worker {slot.index} mort, {len(orphans)} bot(s) redistribué(s), relance dans {delay:.0f}s")
+            for bot_id in orphans:
+                await self._place(bot_id)
+
+        # Relance des workers morts après leur délai, puis retour de leurs bots
+        for slot in self.slots.values():
+            if slot.alive or now < slot.next_restart or not slot.failures:
+                continue
+            if await self._spawn(slot):
+                await self._rebalance(slot.index)
+            else:
+                slot.failures += 1
+                slot.next_restart = now + min(BOT_SUPERVISOR_BACKOFF * 2 ** (slot.failures - 1),
+                                              BOT_SUPERVISOR_MAX_BACKOFF)
+        self._save()
+
+    async def _rebalance(self, index: int):
+        """Ramène sur le worker relancé les bots dont il est le propriétaire sur l'anneau"""
+        alive = self._alive()
+        for bot_id, current in list(self.assignments.items()):
+            if current == index or self.ring.owner(bot_id, alive) != index:
+                continue
+            try:
+                await self._request(self.slots[current], {"cmd": "stop", "bot_id": bot_id})
+                await self._request(self.slots[index], {"cmd": "start", "bot_id": bot_id})
+                self.assignments[bot_id] = index
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning(f"Déplacement du bot {bot_id} vers le worker {index} impossible: {e}")
+
+    def status(self) -> list:
+        return [
+            {
+                "worker": slot.index,
+                "pid": slot.pid,
+                "cpu": slot.cpu,
+                "alive": slot.alive,
+                "failures": slot.failures,
+                "bots": sorted(bot_id for bot_id, worker in self.assignments.items() if worker == slot.index),
+            }
+            for slot in self.slots.values()
+        ]
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["stop"]:
+        print("Usage : python supervisor.py stop")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+
+    async def _stop():
+        supervisor = Supervisor(os.getenv("API_URL_LOCAL") or "http://127.0.0.1:3000")
+        # Sans start() : il relancerait les workers morts et les bots arrêtés avant de tout stopper
+        await supervisor.attach()
+        await supervisor.shutdown()
+
+    asyncio.run(_stop())
@@ -0,0 +1,248 @@
+"""Optimisation des paramètres du bot par backtests parallèles.
+
+Chaque combinaison de `volatility_percent`, `buy_amount`, `sell_amount`,
+`min_swap_amount` et `trade_cooldown` (grille complète ou tirage aléatoire) est
+rejouée par backtest.py sur la même série de prix :
+- la série est copiée une seule fois dans un segment de mémoire partagée, les
+  processus du pool la lisent sans copie,
+- les combinaisons partent par lots de SWEEP_CHUNK et les résultats remontent au
+  fil de l'eau (callback `on_results`), puis sont classés par score.
+
+Usage :
+    python sweep.py prix.npy --grid volatility_percent=2,5,10 buy_amount=5,10 --top 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import shared_memory
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from backtest import BacktestConfig, load_series, run_backtest
+
+# Paramètres explorés (champs de BacktestConfig)
+SWEEP_PARAMS = ("volatility_percent", "buy_amount", "sell_amount", "min_swap_amount", "trade_cooldown")
+# Processus du pool (un par CPU par défaut)
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", "0")) or os.cpu_count() or 1
+# Combinaisons par tâche envoyée à un processus
+SWEEP_CHUNK = int(os.getenv("SWEEP_CHUNK", "32"))
+SWEEP_MAX_COMBINATIONS = int(os.getenv("SWEEP_MAX_COMBINATIONS", "100000"))
+# Séries de prix disponibles pour /bots/{id}/optimize (.npy)
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "price_history"))
+
+RANKINGS = ("pnl", "calmar")
+
+
+def grid_combinations(space: Dict[str, List[float]]) -> List[dict]:
+    """Produit cartésien des valeurs de chaque paramètre"""
+    names = [name for name in SWEEP_PARAMS if name in space]
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_combinations(space: Dict[str, list], count: int, seed: Optional[int] = None) -> List[dict]:
+    """
+    Tirage aléatoire de combinaisons
+
+    Args:
+        space: Par paramètre, une liste de valeurs (tirage parmi elles) ou [min, max] sous la
+            forme {"min": ..., "max": ...} (tirage uniforme)
+        count: Nombre de combinaisons
+        seed: Graine du tirage (reproductible)
+    """
+    rng = random.Random(seed)
+    combinations = []
+    for _ in range(count):
+        combination = {}
+        for name in SWEEP_PARAMS:
+            values = space.get(name)
+            if values is None:
+                continue
+            if isinstance(values, dict):
+                combination[name] = rng.uniform(values["min"], values["max"])
+            else:
+                combination[name] = rng.choice(values)
+        combinations.append(combination)
+    return combinations
+
+
+def score(summary: dict, rank_by: str = "pnl") -> float:
+    """Score de classement : PnL, ou PnL rapporté au drawdown maximal ("calmar")"""
+    if rank_by == "calmar":
+        return summary["pnl"] / max(-summary["max_drawdown"], 1e-9)
+    return summary["pnl"]
+
+
+# --- CÔTÉ PROCESSUS DU POOL ---
+_series: Dict[str, np.ndarray] = {}
+_segments: list = []
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    try:
+        # Python >= 3.13 : le processus parent reste seul responsable du segment
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Avant 3.13 : le suivi des ressources est celui du parent (spawn), qui libère le segment
+        return shared_memory.SharedMemory(name=name)
+
+
+def _attach(specs: Dict[str, tuple]):
+    """Initialisation d'un processus : vues NumPy sur les segments partagés"""
+    for key, (name, shape, dtype) in specs.items():
+        segment = _open_segment(name)
+        _segments.append(segment)
+        _series[key] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+
+def _run_chunk(base: dict, combinations: List[dict], tick_seconds: float) -> List[dict]:
+    results = []
+    for combination in combinations:
+        config = BacktestConfig(**{**base, **combination})
+        result = run_backtest(_series["prices"], config, _series.get("timestamps"), tick_seconds)
+        summary = result.summary()
+        del summary["reference_price"]
+        results.append({"params": combination, **summary})
+    return results
+
+
+# --- CÔTÉ APPELANT ---
+def _context():
+    """
+    forkserver si disponible : fork copierait le processus uvicorn et ses threads (verrous
+    tenus au moment du fork). Le serveur précharge ce module (NumPy, backtest) une fois ;
+    main.py, réimporté sous le nom __mp_main__, n'y applique pas les migrations.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["sweep"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class SharedSeries:
+    def __init__(self, **arrays: Optional[np.ndarray]):
+        """
+        Copie des séries dans des segments de mémoire partagée (libérés à la sortie du bloc)
+
+        Args:
+            arrays: Séries nommées (prices, timestamps), None ignoré
+        """
+        self.segments = []
+        self.specs: Dict[str, tuple] = {}
+        for key, array in arrays.items():
+            if array is None:
+                continue
+            array = np.ascontiguousarray(array, dtype=np.float64)
+            segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[:] = array
+            self.segments.append(segment)
+            self.specs[key] = (segment.name, array.shape, array.dtype.str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+
+
+async def run_sweep(prices: np.ndarray, base: BacktestConfig, combinations: List[dict],
+                    timestamps: Optional[np.ndarray] = None, tick_seconds: float = 60,
+                    workers: int = SWEEP_WORKERS, rank_by: str = "pnl",
+                    on_results: Optional[Callable[[List[dict]], Awaitable[None]]] = None) -> List[dict]:
+    """
+    Backteste toutes les combinaisons sur un pool de processus
+
+    Args:
+        prices: Série de prix
+        base: Paramètres communs (balances initiales, coûts, valeurs non explorées)
+        combinations: Paramètres de chaque backtest (voir grid_combinations / random_combinations)
+        timestamps: Horodatage des ticks (optionnel)
+        tick_seconds: Intervalle entre ticks sans timestamps
+        workers: Nombre de processus
+        rank_by: "pnl" ou "calmar"
+        on_results: Appelé avec chaque lot de résultats terminé
+
+    Returns:
+        Résultats classés du meilleur au moins bon
+    """
+    if len(combinations) > SWEEP_MAX_COMBINATIONS:
+        raise ValueError(f"{len(combinations)} combinaisons (maximum {SWEEP_MAX_COMBINATIONS})")
+    base_params = asdict(base)
+    chunks = [combinations[i:i + SWEEP_CHUNK] for i in range(0, len(combinations), SWEEP_CHUNK)]
+    results = []
+    with SharedSeries(prices=prices, timestamps=timestamps) as shared:
+        pool = ProcessPoolExecutor(max(1, min(workers, len(chunks))), mp_context=_context(),
+                                   initializer=_attach, initargs=(shared.specs,))
+        try:
+            futures = [asyncio.wrap_future(pool.submit(_run_chunk, base_params, chunk, tick_seconds))
+                       for chunk in chunks]
+            for future in asyncio.as_completed(futures):
+                rows = await future
+                for row in rows:
+                    row["score"] = score(row, rank_by)
+                results.extend(rows)
+                if on_results is not None:
+                    await on_results(rows)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    results.sort(key=lambda row: row["score"], reverse=True)
+    return results
+
+
+def _parse_space(items: List[str]) -> Dict[str, list]:
+    space = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if name not in SWEEP_PARAMS:
+            raise SystemExit(f"Paramètre inconnu: {name} (attendu: {', '.join(SWEEP_PARAMS)})")
+        if ":" in values:
+            low, high = values.split(":")
+            space[name] = {"min": float(low), "max": float(high)}
+        else:
+            space[name] = [float(value) for value in values.split(",")]
+    return space
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimisation des paramètres par backtests parallèles")
+    parser.add_argument("series", help=".npy (prix ou timestamp,prix) ou fichier float64 brut")
+    parser.add_argument("--grid", nargs="+", default=[], help="nom=v1,v2,... (grille) ou nom=min:max (aléatoire)")
+    parser.add_argument("--random", type=int, help="Nombre de combinaisons tirées au hasard")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--rank-by", choices=RANKINGS, default="pnl")
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    parser.add_argument("--quote", type=float, default=BacktestConfig.initial_quote)
+    parser.add_argument("--kno", type=float, default=BacktestConfig.initial_kno)
+    parser.add_argument("--tick-seconds", type=float, default=60)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    space = _parse_space(args.grid)
+    if args.random:
+        combinations = random_combinations(space, args.random, args.seed)
+    else:
+        combinations = grid_combinations(space)
+    prices, timestamps = load_series(args.series)
+    base = BacktestConfig(initial_quote=args.quote, initial_kno=args.kno)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_sweep(prices, base, combinations, timestamps, args.tick_seconds,
+                                    args.workers, args.rank_by))
+    print(f"{len(results)} combinaisons en {time.perf_counter() - start:.1f}s")
+    for row in results[:args.top]:
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
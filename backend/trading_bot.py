@@ -9,9 +9,22 @@ from datetime import datetime, timezone
 import requests
 import logging
 import asyncio
+import traceback
 import sys
+from typing import Optional
 print("PYTHON USED BY BOT:", sys.executable)
 
+from chain import create_chain, get_shared_chain, POLYGON_CHAIN_ID, WPOL, KNO, ROUTER
+from rpc_limiter import is_rate_limit_error
+from nonce_manager import close_nonce_manager, get_nonce_manager
+from receipt_tracker import ReceiptTracker
+from multicall import ReadBatch
+from fills import decode_fill
+from gas_oracle import GAS_URGENCY, close_gas_oracle, get_gas_oracle
+from pool_price import GECKO_TERMINAL_POOL_URL, KNO_PRICE_SOURCE, USD_EUR_RATE, close_pool_price_source, fx_rate, get_pool_price_source
+from log_pipeline import install as install_log_pipeline
+from strategy import BUY, SELL, band_signal
+
 # Configuration logging pour le dashboard
 logging.basicConfig(
     level=logging.INFO,
@@ -23,94 +36,119 @@ load_dotenv()
 bot_id = int(os.getenv("BOT_ID", "1"))  # ID du bot dans le dashboard
 API_URL = os.getenv("API_URL_LOCAL", "http://127.0.0.1:3000")  # FastAPI local
 
-# Initialisation Web3 (sans wallet pour l'instant)
-w3 = Web3(Web3.HTTPProvider("https://polygon-rpc.com"))
-if not w3.is_connected():
-    print(">>> Erreur de connexion à Polygon")
-    sys.exit(1)
-
-# --- ADRESSES FIXES (NE CHANGENT PAS) ---
-WPOL = w3.to_checksum_address("0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270")
-KNO  = w3.to_checksum_address("0x236fbfAa3Ec9E0B9BA013Df370c098bAd85aD631")
-ROUTER = w3.to_checksum_address("0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff")  # Quickswap
-
-# --- ABIs (gardez les mêmes) ---
-erc20_abi = json.loads("""[
-    {"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"type":"function"},
-    {"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"success","type":"bool"}],"type":"function"},
-    {"constant":true,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"type":"function"},
-    {"constant":true,"inputs":[{"name":"_owner","type":"address"},{"name":"_spender","type":"address"}],"name":"allowance","outputs":[{"name":"remaining","type":"uint256"}],"type":"function"},
-    {"constant":false,"inputs":[],"name":"deposit","outputs":[],"stateMutability":"payable","type":"function"},
-    {"constant":false,"inputs":[{"name":"wad","type":"uint256"}],"name":"withdraw","outputs":[],"stateMutability":"nonpayable","type":"function"}
-]""")
-router_abi = json.loads("""[
-    {
-        "name": "swapExactTokensForTokensSupportingFeeOnTransferTokens", 
-        "type": "function",
-        "inputs": [
-            {"name": "amountIn", "type": "uint256"},
-            {"name": "amountOutMin", "type": "uint256"},
-            {"name": "path", "type": "address[]"},
-            {"name": "to", "type": "address"},
-            {"name": "deadline", "type": "uint256"}
-        ],
-        "outputs": [{"name": "amounts", "type": "uint256[]"}],
-        "stateMutability": "nonpayable"
-    },
-    {
-        "name": "getAmountsOut",
-        "type": "function",
-        "inputs": [
-            {"name": "amountIn", "type": "uint256"},
-            {"name": "path", "type": "address[]"}
-        ],
-        "outputs": [
-            {"name": "amounts", "type": "uint256[]"}
-        ],
-        "stateMutability": "view"
-    }
-]""")
-
-# --- CONTRATS ---
-token_wpol = w3.eth.contract(address=WPOL, abi=erc20_abi)
-token_kno = w3.eth.contract(address=KNO, abi=erc20_abi)
-router = w3.eth.contract(address=ROUTER, abi=router_abi)
+# La connexion Polygon (AsyncWeb3 ou Web3 selon WEB3_MODE) est créée par le bot,
+# adresses et ABIs sont définis dans chain.py
 
 # --- CONSTANTES ---
-GECKO_TERMINAL_POOL_URL = "https://api.geckoterminal.com/api/v2/networks/polygon_pos/pools/0xdce471c5fc17879175966bea3c9fe0432f9b189e"
 PRICE_FILE = "last_price.txt"
 SELL_PRICE_FILE = "last_sell_price.txt"
+# Attente maximale d'un long-poll de configuration (plafonnée côté API par CONFIG_LONG_POLL_MAX)
+CONFIG_LONG_POLL = float(os.getenv("CONFIG_LONG_POLL", "55"))
+# Durée de validité du prix KNO du dashboard, partagé par les bots d'un même processus (secondes)
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "30"))
+# Âge maximal d'un prix servi par /kno/price ; au-delà (ou si stale), appel direct GeckoTerminal
+PRICE_MAX_AGE = float(os.getenv("PRICE_MAX_AGE", "60"))
+# Timeout des appels au dashboard
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+
+# Dernier prix lu par API : (prix, horodatage)
+_price_cache = {}
+_price_lock = asyncio.Lock()
 
 class KNOTradingBot:
-    def __init__(self, bot_id: int, api_url: str):
+    def __init__(self, bot_id: int, api_url: str, shared_chain: bool = False):
+        """
+        Args:
+            bot_id: ID du bot dans le dashboard
+            api_url: URL de l'API du dashboard
+            shared_chain: Partager l'accès blockchain avec les autres bots du processus
+                          (runner en processus) au lieu d'ouvrir ses propres connexions
+        """
         self.bot_id = bot_id
         self.api_url = api_url
         self.config = {}
+        self.base_config = {}
         self.wallet_address = None
         self.private_key = None
         self.is_running = False
         self.reference_price = None
         self.logger = logging.getLogger(f"kno_bot_{bot_id}")
-        self.last_rpc_call = 0
-        self.rpc_min_interval = 0.25  # max 4 req/s
+        self.shared_chain = shared_chain
+        # Accès blockchain créé une fois la configuration chargée (endpoint du bot), voir start()
+        self.chain = None
 
-        self.cached_gas_price = None
-        self.last_gas_update = 0
 
         self.last_trade_time = 0
         self.trade_cooldown = 300  # 5 min entre trades
 
-        self.allowance_checked = False
+        # Allowances déjà validées, par (wallet, token)
+        self.allowance_checked = {}
+
+        # ETag de la dernière configuration reçue (requêtes conditionnelles)
+        self.config_etag = None
 
         
 
         
-    async def load_config(self):
-        """Charge la configuration depuis le dashboard"""
+    def setup_chain(self, rpc_endpoint: Optional[str] = None):
+        """
+        Crée l'accès blockchain et les services qui en dépendent
+
+        Args:
+            rpc_endpoint: Endpoint(s) du bot séparés par des virgules (POLYGON_RPC_URL par défaut),
+                          complétés par POLYGON_RPC_URLS ; plusieurs endpoints → pool avec basculement
+        """
+        # AsyncWeb3 ou Web3 dans un thread selon WEB3_MODE (même interface asynchrone),
+        # débit limité par le seau à jetons partagé entre tous les bots de la machine
+        self.chain = get_shared_chain(rpc_endpoint) if self.shared_chain else create_chain(rpc_endpoint)
+        # Nonces alloués localement par wallet (synchronisés au démarrage et après erreur),
+        # partagés avec les autres bots du processus sur le même accès
+        self.nonces = get_nonce_manager(self.chain)
+        # Reçus suivis bloc par bloc (newHeads ou polling du numéro de bloc)
+        self.receipts = ReceiptTracker(self.chain)
+        # Frais EIP-1559 échantillonnés en fond (eth_feeHistory), estimations de gas en cache
+        self.gas = get_gas_oracle(self.chain)
+        # Prix KNO suivi bloc par bloc dans les réserves de la paire
+        self.pool_price = get_pool_price_source(self.chain)
+
+    async def close_chain(self):
+        """Arrête les services du bot et ferme son accès blockchain s'il lui est propre"""
+        if self.chain is None:
+            return
+        await self.receipts.stop()
+        if not self.shared_chain:
+            # Accès partagé : fermé par le runner, oracle de gas et prix du pool servent aux autres bots
+            close_nonce_manager(self.chain)
+            await asyncio.gather(close_gas_oracle(self.chain), close_pool_price_source(self.chain))
+            await self.chain.close()
+        self.chain = None
+
+    async def load_config(self, wait: float = 0):
+        """
+        Charge la configuration depuis le dashboard
+        
+        Requête conditionnelle (If-None-Match) : si la configuration n'a pas changé,
+        l'API répond 304 sans rien renvoyer ni déchiffrer.
+        
+        Args:
+            wait: Long-poll, attendre jusqu'à `wait` secondes un changement
+        """
         try:
-            response = requests.get(f"{self.api_url}/bots/{self.bot_id}/kno-config")
+            headers = {"If-None-Match": self.config_etag} if self.config_etag else {}
+            response = await asyncio.to_thread(
+                requests.get,
+                f"{self.api_url}/bots/{self.bot_id}/kno-config",
+                params={"wait": wait} if wait else None,
+                headers=headers,
+                timeout=wait + 30,
+            )
+            if response.status_code == 304:
+                # Repartir de la configuration reçue (sans les montants propres à un wallet)
+                self.config = dict(self.base_config)
+                return True
             if response.status_code == 200:
                 bot_data = response.json()
+                self.config_etag = response.headers.get("ETag")
                 
                 # Configuration KNO spécifique
                 self.config = {
@@ -121,13 +159,16 @@ class KNOTradingBot:
                     "reference_price": bot_data.get("reference_price"),
                     "slippage": bot_data.get("slippage_tolerance", 1),
                     "gas_limit": bot_data.get("gas_limit", 500000),
-                    "gas_price": bot_data.get("gas_price", 40)
+                    "gas_price": bot_data.get("gas_price", 40),
+                    "rpc_endpoint": bot_data.get("rpc_endpoint")
                 }
+                self.base_config = dict(self.config)
                 db_ref = bot_data.get("reference_price")
                 if db_ref:
                     self.reference_price = float(db_ref)
-                # Wallet
-                self.wallets = bot_data.get("wallets", [])  # liste de dict {wallet_address, private_key, buy_amount, sell_amount, thresholds}
+                # Wallets : /kno-config ne les renvoie pas, ils viennent de get_wallet_config() au démarrage
+                if bot_data.get("wallets"):
+                    self.wallets = bot_data["wallets"]  # liste de dict {wallet_address, private_key, buy_amount, sell_amount, thresholds}
                 
                 # Adresses des contrats
                 self.wpol_address = bot_data.get("wpol_address", "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270")
@@ -146,127 +187,200 @@ class KNOTradingBot:
             self.logger.error(f"Erreur chargement config KNO: {e}")
             return False
     
+    async def wait_for_next_cycle(self, seconds: float):
+        """
+        Pause entre deux cycles, en long-poll sur la configuration
+        
+        Les modifications faites dans le dashboard (montants, volatilité, prix de
+        référence, wallet) sont appliquées dès leur enregistrement.
+        """
+        deadline = time.monotonic() + seconds
+        while self.is_running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not await self.load_config(wait=min(remaining, CONFIG_LONG_POLL)):
+                # API indisponible : ne pas boucler sur l'erreur
+                await asyncio.sleep(min(remaining, CONFIG_LONG_POLL))
+    
     async def get_wallet_config(self):
-        """Récupère la configuration wallet sécurisée"""
+        """Récupère la configuration wallet sécurisée
+
+        Returns:
+            Liste de dict {wallet_address, private_key} (vide si aucun wallet
+            exploitable), ou None si l'API est indisponible
+        """
         try:
-            response = requests.get(f"{self.api_url}/bots/{self.bot_id}/wallet-config")
+            response = await asyncio.to_thread(
+                requests.get, f"{self.api_url}/bots/{self.bot_id}/wallet-config", timeout=API_TIMEOUT
+            )
             if response.status_code == 200:
-                return response.json()
+                data = response.json()
+                # /wallet-config renvoie la config du bot (un seul wallet, clé dans wallet_private_key)
+                entries = data if isinstance(data, list) else [data]
+                wallets = []
+                for entry in entries:
+                    address = entry.get("wallet_address")
+                    private_key = entry.get("private_key") or entry.get("wallet_private_key")
+                    if address and private_key:
+                        wallets.append({"wallet_address": address, "private_key": private_key})
+                return wallets
         except Exception as e:
             self.logger.error(f"Erreur récupération wallet: {e}")
         return None
     
     # --- OUTILS WEB3 ---
-    def wait_receipt_slow(self, tx_hash, timeout=180):
-        start = time.time()
-        while time.time() - start < timeout:
-            try:
-                self.rpc_sleep()
-                receipt = w3.eth.get_transaction_receipt(tx_hash)
-                if receipt:
-                    return receipt
-            except:
-                pass
-            time.sleep(5)  # 🔥 polling lent
-        return None
+    async def wait_receipt(self, tx_hash, timeout=180):
+        # Reçu résolu au bloc suivant (une requête groupée par bloc pour toutes les transactions)
+        receipt = await self.receipts.wait(tx_hash, timeout=timeout)
+        if receipt:
+            self.nonces.confirm(tx_hash)
+        return receipt
 
-    def rpc_sleep(self):
-        now = time.time()
-        diff = now - self.last_rpc_call
-        if diff < self.rpc_min_interval:
-            time.sleep(self.rpc_min_interval - diff)
-        self.last_rpc_call = time.time()
     def to_wei(self, amount, decimals):
         return int(float(amount) * 10**decimals)
 
     def from_wei(self, amount, decimals):
         return float(amount) / 10**decimals
 
-    def get_nonce(self):
+    async def get_nonce(self):
         if not self.wallet_address:
             raise Exception("Wallet non configuré")
         
-        # ⚠️ TRÈS IMPORTANT : Ajouter 'pending' pour voir les transactions en attente
-        return w3.eth.get_transaction_count(self.wallet_address, 'pending')
+        # Nonce local (lu sur la chaîne en 'pending' uniquement à la première allocation)
+        return await self.nonces.allocate(self.wallet_address)
+
+    async def prepare_transaction(self, contract_fn, params, gas_key=None):
+        """
+        Alloue le nonce, construit et signe la transaction (retourne (signed, nonce))
+
+        Avec gas_key, la limite de gas est estimée (en cache par clé) ; params["gas"]
+        sert alors de valeur de repli.
+        """
+        nonce, fees = await asyncio.gather(self.get_nonce(), self.get_fee_params())
+        try:
+            tx_params = {
+                "from": self.wallet_address,
+                "nonce": nonce,
+                "chainId": POLYGON_CHAIN_ID,  # évite un eth_chainId par transaction
+                **fees,
+                **params
+            }
+            if gas_key:
+                estimate_params = {"from": self.wallet_address, "value": params.get("value", 0)}
+                tx_params["gas"] = await self.gas.estimate_gas(contract_fn, estimate_params, gas_key, default=params["gas"])
+            tx = await self.chain.build_transaction(contract_fn, tx_params)
+            return self.chain.sign_transaction(tx, self.private_key), nonce
+        except Exception as e:
+            self.nonces.failed(self.wallet_address, nonce, e)
+            raise
 
-    def approve_token(self, token_contract, spender, amount, token_name="Token"):
+    async def send_signed(self, signed, nonce):
+        """Diffuse une transaction signée et la suit jusqu'à son reçu"""
+        try:
+            tx_hash = await self.chain.send_raw_transaction(signed.raw_transaction)
+        except Exception as e:
+            self.nonces.failed(self.wallet_address, nonce, e)
+            raise
+        self.nonces.track(self.wallet_address, nonce, tx_hash)
+        return tx_hash
+
+    async def read_pre_trade(self, token_in, token_out, amount_in_wei):
+        """
+        Lectures d'avant-trade en une seule requête (Multicall3 + batch JSON-RPC)
+
+        Returns:
+            dict: balance_in, balance_out, allowance (du router sur token_in) et amounts
+            (getAmountsOut)
+        """
+        chain = self.chain
+        contracts = {WPOL: chain.wpol, KNO: chain.kno}
+        reads = ReadBatch(chain)
+        reads.add(contracts[token_in].functions.balanceOf(self.wallet_address))
+        reads.add(contracts[token_out].functions.balanceOf(self.wallet_address))
+        reads.add(contracts[token_in].functions.allowance(self.wallet_address, ROUTER))
+        reads.add(chain.router.functions.getAmountsOut(amount_in_wei, [token_in, token_out]))
+
+        balance_in, balance_out, allowance, amounts = await reads.execute()
+        return {"balance_in": balance_in, "balance_out": balance_out, "allowance": allowance, "amounts": amounts}
+
+    async def approve_token(self, token_contract, spender, amount, token_name="Token", current_allowance=None):
         if not self.wallet_address or not self.private_key:
             self.logger.error("Wallet non configuré pour l'approval")
             return False
 
         # ✅ allowance déjà validée → on skip
-        if self.allowance_checked:
+        allowance_key = (self.wallet_address, token_contract.address)
+        if self.allowance_checked.get(allowance_key):
             return True
 
-        # 🔥 throttle RPC
-        self.rpc_sleep()
-        current_allowance = token_contract.functions.allowance(
-            self.wallet_address, spender
-        ).call()
+        if current_allowance is None:
+            current_allowance = await self.chain.call(token_contract.functions.allowance(
+                self.wallet_address, spender
+            ))
 
         self.logger.info(f"Allowance {token_name}: {current_allowance}")
 
         if current_allowance >= amount:
-            self.allowance_checked = True
+            self.allowance_checked[allowance_key] = True
             return True
 
         # 🔥 approve une seule fois (max)
-        self.rpc_sleep()
-        tx = token_contract.functions.approve(
+        signed, nonce = await self.prepare_transaction(token_contract.functions.approve(
             spender,
-            w3.to_wei(10**9, "ether")  # allowance quasi infinie
-        ).build_transaction({
-            "from": self.wallet_address,
-            "nonce": self.get_nonce(),
-            "gas": 200000,
-            "gasPrice": self.get_dynamic_gas_price()
-        })
+            Web3.to_wei(10**9, "ether")  # allowance quasi infinie
+        ), {"gas": 200000}, gas_key=("approve", token_contract.address))
+        tx_hash = await self.send_signed(signed, nonce)
 
-        signed = w3.eth.account.sign_transaction(tx, self.private_key)
-
-        self.rpc_sleep()
-        tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-
-        receipt = self.wait_receipt_slow(tx_hash)
+        receipt = await self.wait_receipt(tx_hash)
         if not receipt or receipt.status != 1:
             self.logger.error("Approval échouée")
             return False
 
-        self.allowance_checked = True
+        self.allowance_checked[allowance_key] = True
         self.logger.info("Approval réussie et mise en cache")
         return True
 
 
-    def cancel_pending_transactions(self):
-        """Annule toutes les transactions en attente en les écrasant avec un gas élevé"""
+    async def cancel_pending_transactions(self, nonces=None):
+        """Annule les transactions en attente (toutes, ou les nonces donnés) en les écrasant avec un gas élevé"""
         if not self.wallet_address or not self.private_key:
             self.logger.warning("Wallet non configuré - annulation impossible")
             return False
 
         try:
-            latest_nonce = w3.eth.get_transaction_count(self.wallet_address, 'latest')
-            pending_nonce = w3.eth.get_transaction_count(self.wallet_address, 'pending')
+            if nonces is None:
+                latest_nonce, pending_nonce = await self.nonces.sync(self.wallet_address)
+                nonces = range(latest_nonce, pending_nonce)
 
-            if pending_nonce <= latest_nonce:
+            if not nonces:
                 self.logger.info("Aucune transaction en attente")
                 return True
 
-            self.logger.info(f"{pending_nonce - latest_nonce} transaction(s) en attente détectée(s)")
+            self.logger.info(f"{len(nonces)} transaction(s) en attente détectée(s)")
 
-            for nonce in range(latest_nonce, pending_nonce):
+            # Frais "high" avec un plancher à 200 gwei pour remplacer à coup sûr
+            fees = await self.gas.suggest("high")
+            floor = Web3.to_wei(200, 'gwei')
+            if "gasPrice" in fees:
+                fees = {'gasPrice': max(fees["gasPrice"], floor)}
+            else:
+                tip = max(fees["maxPriorityFeePerGas"], floor)
+                fees = {'maxFeePerGas': max(fees["maxFeePerGas"], tip), 'maxPriorityFeePerGas': tip}
+            for nonce in nonces:
                 cancel_tx = {
                     'to': self.wallet_address,
                     'value': 0,
                     'gas': 21000,
-                    'gasPrice': max(self.get_dynamic_gas_price(), w3.to_wei(200, 'gwei')),
                     'nonce': nonce,
-                    'chainId': 137
+                    'chainId': POLYGON_CHAIN_ID,
+                    **fees
                 }
 
-                signed = w3.eth.account.sign_transaction(cancel_tx, self.private_key)
+                signed = self.chain.sign_transaction(cancel_tx, self.private_key)
                 try:
-                    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-                    self.logger.info(f"Transaction d'annulation envoyée pour nonce {nonce}: {w3.to_hex(tx_hash)}")
+                    tx_hash = await self.send_signed(signed, nonce)
+                    self.logger.info(f"Transaction d'annulation envoyée pour nonce {nonce}: {Web3.to_hex(tx_hash)}")
                 except Exception as e:
                     self.logger.warning(f"Impossible d'annuler la transaction nonce {nonce}: {e}")
 
@@ -275,6 +389,19 @@ class KNOTradingBot:
             self.logger.error(f"Erreur lors de l'annulation: {e}")
             return False
 
+    async def check_nonces(self, max_pending_age=600):
+        """Comble les trous de nonce et remplace les transactions bloquées du wallet courant"""
+        gaps = self.nonces.detect_gaps(self.wallet_address)
+        if gaps:
+            # Nonces alloués mais jamais diffusés : les transactions suivantes restent en file
+            self.logger.warning(f"Trous de nonce détectés: {gaps}")
+            await self.cancel_pending_transactions(gaps)
+
+        stale = self.nonces.stale(self.wallet_address, max_pending_age)
+        if stale:
+            self.logger.warning(f"{len(stale)} transaction(s) sans reçu depuis {max_pending_age}s, remplacement")
+            await self.cancel_pending_transactions([tx.nonce for tx in stale])
+
     # --- PRICE MANAGEMENT ---
     def read_price(self, file):
         try:
@@ -287,58 +414,91 @@ class KNOTradingBot:
         with open(file, "w") as f:
             f.write(str(float(price)))
 
-    def get_price_kno_eur(self):
+    async def get_price_kno_eur(self):
+        """
+        Prix KNO en EUR : réserves de la paire on-chain (en mémoire, à jour au dernier bloc),
+        sinon prix du dashboard lu au plus une fois par PRICE_CACHE_TTL pour tous les bots du processus
+        """
+        if KNO_PRICE_SOURCE == "pool":
+            try:
+                quote = await self.pool_price.quote()
+                if quote:
+                    return quote["price_eur"]
+            except Exception as e:
+                self.logger.warning(f"Prix du pool indisponible: {e}")
+        async with _price_lock:
+            cached = _price_cache.get(self.api_url)
+            if cached and time.monotonic() - cached[1] < PRICE_CACHE_TTL:
+                return cached[0]
+            usd_eur = await fx_rate.usd_eur()
+            price = await asyncio.to_thread(self.fetch_price_kno_eur, usd_eur)
+            if price:
+                _price_cache[self.api_url] = (price, time.monotonic())
+            return price
+
+    def fetch_price_kno_eur(self, usd_eur: float = USD_EUR_RATE):
+        """
+        Prix KNO en EUR lu depuis le service de prix partagé du dashboard
+
+        Args:
+            usd_eur: Taux USD → EUR pour le secours GeckoTerminal (fx_rate en cache)
+        """
+        try:
+            response = requests.get(f"{self.api_url}/kno/price", timeout=10)
+            response.raise_for_status()
+            data = response.json()
+            age = data.get("age")
+            if data.get("source") == "fallback":
+                self.logger.warning(f"Prix dashboard indisponible: {data.get('error')}")
+            elif data.get("stale") or (age is not None and age > PRICE_MAX_AGE):
+                self.logger.warning(f"Prix dashboard périmé (âge {age}s), appel direct GeckoTerminal")
+            else:
+                return float(data["price_eur"])
+        except Exception as e:
+            self.logger.warning(f"Dashboard injoignable pour le prix, appel direct GeckoTerminal: {e}")
+
+        # Secours : appel direct si le dashboard ne fournit pas de prix
         try:
-            response = requests.get(GECKO_TERMINAL_POOL_URL)
+            response = requests.get(GECKO_TERMINAL_POOL_URL, timeout=10)
             response.raise_for_status()
             data = response.json()
             price_usd = float(data["data"]["attributes"]["base_token_price_usd"])
-            return price_usd * 0.87
+            return price_usd * usd_eur
         except Exception as e:
             self.logger.error(f"Erreur récupération prix: {e}")
             return None
         
-    # --- GAS PRICE DYNAMIQUE SELON RÉSEAU ---
-    def get_dynamic_gas_price(self):
-        if time.time() - self.last_gas_update > 30:
-            self.rpc_sleep()
-            self.cached_gas_price = w3.eth.gas_price
-            self.last_gas_update = time.time()
-        return int(self.cached_gas_price * 1.2)
+    # --- FRAIS DYNAMIQUES SELON RÉSEAU ---
+    async def get_fee_params(self):
+        """Frais EIP-1559 suggérés par l'oracle ; gas_price (gwei) de la config sert de pourboire minimum"""
+        return await self.gas.suggest(
+            self.config.get("gas_urgency", GAS_URGENCY),
+            min_tip_gwei=self.config.get("gas_price") or 0,
+        )
 
     # --- WRAP/UNWRAP ---
-    def wrap_pol(self, amount_pol):
+    async def wrap_pol(self, amount_pol):
         if not self.wallet_address or not self.private_key:
             self.logger.error("Wallet non configuré pour wrap")
             return False
             
-        tx = token_wpol.functions.deposit().build_transaction({
-            "from": self.wallet_address,
-            "value": w3.to_wei(amount_pol, "ether"),
-            "nonce": self.get_nonce(),
-            "gas": 150000,
-            "gasPrice": self.get_dynamic_gas_price()
+        signed, nonce = await self.prepare_transaction(self.chain.wpol.functions.deposit(), {
+            "value": Web3.to_wei(amount_pol, "ether"),
+            "gas": 150000
         })
-        signed = w3.eth.account.sign_transaction(tx, self.private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-        receipt = self.wait_receipt_slow(tx_hash)
-        return receipt.status == 1
+        tx_hash = await self.send_signed(signed, nonce)
+        receipt = await self.wait_receipt(tx_hash)
+        return receipt is not None and receipt.status == 1
 
-    def unwrap_wpol(self, amount_wei):
+    async def unwrap_wpol(self, amount_wei):
         if not self.wallet_address or not self.private_key:
             self.logger.error("Wallet non configuré pour unwrap")
             return False
             
-        tx = token_wpol.functions.withdraw(amount_wei).build_transaction({
-            "from": self.wallet_address,
-            "nonce": self.get_nonce(),
-            "gas": 100000,
-            "gasPrice": self.get_dynamic_gas_price()
-        })
-        signed = w3.eth.account.sign_transaction(tx, self.private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-        receipt = self.wait_receipt_slow(tx_hash)
-        return receipt.status == 1
+        signed, nonce = await self.prepare_transaction(self.chain.wpol.functions.withdraw(amount_wei), {"gas": 100000})
+        tx_hash = await self.send_signed(signed, nonce)
+        receipt = await self.wait_receipt(tx_hash)
+        return receipt is not None and receipt.status == 1
     
     # --- SLIPPAGE DYNAMIQUE SELON VOLATILITÉ ---
     def get_dynamic_slippage(self, price, ref_price):
@@ -436,12 +596,10 @@ class KNOTradingBot:
     #         return False
 
     # --- BUY KNO MODIFIÉ ---
-    def buy_kno(self, current_price):
+    async def buy_kno(self, current_price):
         """Exécute un achat KNO avec protections et reporting"""
         if not hasattr(self, "wallet_last_trade"):
             self.wallet_last_trade = {}
-        if not hasattr(self, "allowance_checked"):
-            self.allowance_checked = {}  # dict wallet_address -> bool
 
         wallet_id = self.wallet_address
         last_trade = self.wallet_last_trade.get(wallet_id, 0)
@@ -460,63 +618,51 @@ class KNOTradingBot:
 
             amt = self.config.get("buy_amount", 0.05)
             amt_wei = self.to_wei(amt, 18)
+            chain = self.chain
+
+            # Balances, allowance, estimation de sortie et gas en une seule requête
+            reads = await self.read_pre_trade(WPOL, KNO, amt_wei)
+            wpol_balance_wei, amounts = reads["balance_in"], reads["amounts"]
 
             # Balance WPOL suffisante
-            self.rpc_sleep()
-            wpol_balance = self.from_wei(token_wpol.functions.balanceOf(self.wallet_address).call(), 18)
+            wpol_balance = self.from_wei(wpol_balance_wei, 18)
             self.logger.info(f"WPOL balance wallet {wallet_id}: {wpol_balance:.6f}")
             if wpol_balance < amt:
                 self.logger.warning(f"Balance WPOL insuffisante ({wpol_balance:.6f} < {amt})")
                 return False
 
             # Approval par wallet
-            if not self.allowance_checked.get(wallet_id, False):
-                if not self.approve_token(token_wpol, ROUTER, amt_wei, "WPOL"):
-                    return False
-                self.allowance_checked[wallet_id] = True
+            if not await self.approve_token(chain.wpol, ROUTER, amt_wei, "WPOL", reads["allowance"]):
+                return False
 
             # Estimation sortie
-            self.rpc_sleep()
-            amounts = router.functions.getAmountsOut(amt_wei, [WPOL, KNO]).call()
             slippage = max(self.get_dynamic_slippage(current_price, self.reference_price), 3)
             min_out = int(amounts[-1] * (1 - slippage / 100))
             self.logger.info(f"Slippage appliqué: {slippage:.2f}%, min_out: {self.from_wei(min_out, 18):.6f} KNO")
 
             deadline = int(time.time()) + 600
-            nonce = w3.eth.get_transaction_count(self.wallet_address, "pending")
-            self.logger.info(f"Nonce utilisé pour swap : {nonce}")
 
             # Build transaction
-            tx = router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
+            signed, nonce = await self.prepare_transaction(chain.router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
                 amt_wei, min_out, [WPOL, KNO], self.wallet_address, deadline
-            ).build_transaction({
-                "from": self.wallet_address,
-                "nonce": nonce,
-                "gas": self.config.get("gas_limit", 500000),
-                "gasPrice": self.get_dynamic_gas_price()
-            })
-
-            signed = w3.eth.account.sign_transaction(tx, self.private_key)
+            ), {"gas": self.config.get("gas_limit", 500000)}, gas_key=("swap", WPOL, KNO))
+            self.logger.info(f"Nonce utilisé pour swap : {nonce}")
 
             # Retry intelligent
             receipt = None
             for attempt in range(5):
                 try:
-                    self.rpc_sleep()
-                    old_balance_kno = token_kno.functions.balanceOf(self.wallet_address).call()
-                    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-                    self.logger.info(f"Swap WPOL → KNO envoyé: {w3.to_hex(tx_hash)}")
-                    receipt = self.wait_receipt_slow(tx_hash)
+                    tx_hash = await self.send_signed(signed, nonce)
+                    self.logger.info(f"Swap WPOL → KNO envoyé: {Web3.to_hex(tx_hash)}")
+                    receipt = await self.wait_receipt(tx_hash)
                     if receipt and receipt.status == 1:
                         break
                     else:
                         self.logger.warning("Transaction échouée, retry possible...")
                 except Exception as e:
-                    err_str = str(e).lower()
-                    if "-32090" in err_str or "rate" in err_str:
-                        delay = random.randint(10, 20)
-                        self.logger.warning(f"Rate limit RPC → pause {delay}s")
-                        time.sleep(delay)
+                    if is_rate_limit_error(e):
+                        # Le limiteur partagé impose la pause avant le prochain envoi
+                        self.logger.warning("Rate limit RPC → nouvel essai après la pause du limiteur")
                     else:
                         self.logger.error(traceback.format_exc())
                         return False
@@ -525,14 +671,14 @@ class KNOTradingBot:
                 self.logger.error("Achat échoué après retries")
                 return False
 
-            # Calcul quantité reçue
-            self.rpc_sleep()
-            new_balance_kno = token_kno.functions.balanceOf(self.wallet_address).call()
-            received_kno = self.from_wei(new_balance_kno - old_balance_kno, 18)
-            self.logger.info(f"Achat réussi → {received_kno:.6f} KNO")
+            # Quantités exactes lues dans les logs du reçu (Transfer / Swap)
+            fill = decode_fill(receipt, self.wallet_address, WPOL, KNO)
+            received_kno = self.from_wei(fill.amount_out, 18)
+            self.logger.info(f"Achat réussi → {received_kno:.6f} KNO pour {self.from_wei(fill.amount_in, 18):.6f} WPOL "
+                             f"(prix effectif {fill.price or 0:.8f} WPOL/KNO, gas {self.from_wei(fill.gas_cost, 18):.6f} POL)")
 
             # Report
-            self.report_trade("buy", received_kno, current_price)
+            await self.report_trade("buy", received_kno, current_price, fill=fill)
             self.wallet_last_trade[wallet_id] = time.time()
 
             return True
@@ -637,7 +783,7 @@ class KNOTradingBot:
     #                 self.rpc_sleep()
     #                 tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
     #                 self.logger.info(f"Swap KNO → WPOL envoyé: {w3.to_hex(tx_hash)}")
-    #                 receipt = self.wait_receipt_slow(tx_hash)
+    #                 receipt = self.wait_receipt(tx_hash)
     #                 if receipt.status == 1:
     #                     break
     #                 else:
@@ -682,7 +828,7 @@ class KNOTradingBot:
     #         self.logger.error(f"Erreur lors de la vente KNO: {e}")
     #         return False
 
-    def sell_kno(self, current_price):
+    async def sell_kno(self, current_price):
         """Exécute une vente KNO avec protections et unwrap automatique"""
         ref_price = self.reference_price
 
@@ -704,10 +850,12 @@ class KNOTradingBot:
 
             sell_amount = self.config.get("sell_amount", 0.01)
             min_swap_amount = self.config.get("min_swap_amount", 0.01)
+            chain = self.chain
 
-            # Balance KNO
-            self.rpc_sleep()
-            balance_kno = self.from_wei(token_kno.functions.balanceOf(self.wallet_address).call(), 18)
+            # Balances, allowance, estimation de sortie et gas en une seule requête
+            reads = await self.read_pre_trade(KNO, WPOL, self.to_wei(sell_amount, 18))
+            balance_kno_wei, amounts = reads["balance_in"], reads["amounts"]
+            balance_kno = self.from_wei(balance_kno_wei, 18)
             if balance_kno < min_swap_amount:
                 self.logger.warning("Balance KNO insuffisante pour vendre")
                 return False
@@ -715,51 +863,38 @@ class KNOTradingBot:
             amt_decimal = min(sell_amount, balance_kno)
             amt_wei = self.to_wei(amt_decimal, 18)
             self.logger.info(f"Vente de {amt_decimal:.6f} KNO")
+            if amt_decimal < sell_amount:
+                # Balance inférieure au montant prévu : nouvelle estimation sur le montant réel
+                amounts = await chain.call(chain.router.functions.getAmountsOut(amt_wei, [KNO, WPOL]))
 
-            # Approval
-            if not self.approve_token(token_kno, ROUTER, amt_wei, "KNO"):
+            if not await self.approve_token(chain.kno, ROUTER, amt_wei, "KNO", reads["allowance"]):
                 return False
 
-            # Estimation sortie
-            self.rpc_sleep()
-            amounts = router.functions.getAmountsOut(amt_wei, [KNO, WPOL]).call()
             slippage = max(self.get_dynamic_slippage(current_price, ref_price), 3)
             min_out = int(amounts[-1] * (1 - slippage / 100))
 
             deadline = int(time.time()) + 600
-            nonce = w3.eth.get_transaction_count(self.wallet_address, "pending")
 
             # Build transaction swap
-            tx = router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
+            signed, nonce = await self.prepare_transaction(chain.router.functions.swapExactTokensForTokensSupportingFeeOnTransferTokens(
                 amt_wei, min_out, [KNO, WPOL], self.wallet_address, deadline
-            ).build_transaction({
-                "from": self.wallet_address,
-                "nonce": nonce,
-                "gas": self.config["gas_limit"],
-                "gasPrice": self.get_dynamic_gas_price()
-            })
-
-            signed = w3.eth.account.sign_transaction(tx, self.private_key)
+            ), {"gas": self.config["gas_limit"]}, gas_key=("swap", KNO, WPOL))
 
             # Retry intelligent sur RPC limit
             receipt = None
             for attempt in range(5):
                 try:
-                    self.rpc_sleep()
-                    old_balance_wpol = token_wpol.functions.balanceOf(self.wallet_address).call()
-                    tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-                    self.logger.info(f"Swap KNO → WPOL envoyé: {w3.to_hex(tx_hash)}")
-                    receipt = self.wait_receipt_slow(tx_hash)
+                    tx_hash = await self.send_signed(signed, nonce)
+                    self.logger.info(f"Swap KNO → WPOL envoyé: {Web3.to_hex(tx_hash)}")
+                    receipt = await self.wait_receipt(tx_hash)
                     if receipt and receipt.status == 1:
                         break
                     else:
                         self.logger.warning("Transaction échouée, retry possible...")
                 except Exception as e:
-                    err_str = str(e).lower()
-                    if "-32090" in err_str or "rate" in err_str:
-                        delay = random.randint(10, 20)
-                        self.logger.warning(f"Rate limit RPC → pause {delay}s")
-                        time.sleep(delay)
+                    if is_rate_limit_error(e):
+                        # Le limiteur partagé impose la pause avant le prochain envoi
+                        self.logger.warning("Rate limit RPC → nouvel essai après la pause du limiteur")
                     else:
                         raise
 
@@ -767,23 +902,23 @@ class KNOTradingBot:
                 self.logger.error("Vente échouée après retries")
                 return False
 
-            # Balance WPOL après swap
-            self.rpc_sleep()
-            new_balance_wpol = token_wpol.functions.balanceOf(self.wallet_address).call()
-            gained_wpol = self.from_wei(new_balance_wpol - old_balance_wpol, 18)
+            # Quantités exactes lues dans les logs du reçu (Transfer / Swap)
+            fill = decode_fill(receipt, self.wallet_address, KNO, WPOL)
+            sold_kno = self.from_wei(fill.amount_in, 18)
+            gained_wpol = self.from_wei(fill.amount_out, 18)
 
-            self.logger.info(f"Vente réussie → {gained_wpol:.6f} WPOL")
+            self.logger.info(f"Vente réussie → {sold_kno:.6f} KNO contre {gained_wpol:.6f} WPOL "
+                             f"(gas {self.from_wei(fill.gas_cost, 18):.6f} POL)")
 
             # Unwrap automatique
-            if gained_wpol > 0:
-                amt_wei = self.to_wei(gained_wpol, 18)
-                if self.unwrap_wpol(amt_wei):
+            if fill.amount_out > 0:
+                if await self.unwrap_wpol(fill.amount_out):
                     self.logger.info(f"Unwrap réussi → {gained_wpol:.6f} POL")
                 else:
                     self.logger.warning("Unwrap échoué")
 
             # Report au dashboard
-            self.report_trade("sell", gained_wpol, current_price)
+            await self.report_trade("sell", sold_kno, current_price, fill=fill)
 
             # Update cooldown
             self.wallet_last_trade[wallet_id] = time.time()
@@ -799,7 +934,7 @@ class KNOTradingBot:
 
 
     # --- DASHBOARD COMMUNICATION ---
-    def report_trade(self, action, amount, price, profit=None):
+    async def report_trade(self, action, amount, price, profit=None, fill=None):
         try:
             data = {
                 "bot_id": self.bot_id,
@@ -807,11 +942,19 @@ class KNOTradingBot:
                 "amount": amount,
                 "price": price,
                 "profit": profit,
-                "tx_hash": f"real_{int(time.time())}"
+                "tx_hash": fill.tx_hash if fill else f"real_{int(time.time())}"
             }
+            if fill:
+                data["gas_cost"] = self.from_wei(fill.gas_cost, 18)
+                # Prix effectif en WPOL par KNO, quel que soit le sens du swap
+                if fill.amount_in and fill.amount_out:
+                    data["effective_price"] = (fill.amount_in / fill.amount_out if action == "buy"
+                                               else fill.amount_out / fill.amount_in)
 
             self.logger.info(f"Envoi transaction: {action} {amount} KNO à {price}€")
-            response = requests.post(f"{self.api_url}/transactions", json=data)
+            response = await asyncio.to_thread(
+                requests.post, f"{self.api_url}/transactions", json=data, timeout=API_TIMEOUT
+            )
             
             if response.status_code in [200, 201]:
                 self.logger.info("Transaction enregistrée dans le dashboard")
@@ -823,18 +966,25 @@ class KNOTradingBot:
             self.logger.error(f"Impossible d'envoyer la transaction: {e}")
             return False
 
-    def update_status(self, status):
+    async def update_status(self, status):
         try:
-            requests.put(f"{self.api_url}/bots/{self.bot_id}/status", json={"status": status})
+            await asyncio.to_thread(
+                requests.put, f"{self.api_url}/bots/{self.bot_id}/status", json={"status": status}, timeout=API_TIMEOUT
+            )
         except Exception as e:
             self.logger.error(f"Erreur mise à jour statut: {e}")
 
-    def send_heartbeat(self):
+    async def send_heartbeat(self):
         try:
-            requests.get(f"{self.api_url}/bots/{self.bot_id}/heartbeat")
+            await asyncio.to_thread(requests.get, f"{self.api_url}/bots/{self.bot_id}/heartbeat", timeout=API_TIMEOUT)
         except:
             pass
 
+    async def put_reference_price(self, price):
+        await asyncio.to_thread(
+            requests.put, f"{self.api_url}/bots/{self.bot_id}/reference-price", json={"price": price}, timeout=API_TIMEOUT
+        )
+
     # --- MAIN LOOP ---
     async def start(self):
         """Démarre le bot de trading multi-wallets"""
@@ -845,22 +995,47 @@ class KNOTradingBot:
             self.logger.error("Impossible de charger la configuration")
             return
 
+        # Endpoints RPC du bot (pool si plusieurs)
+        self.setup_chain(self.config.get("rpc_endpoint"))
+
+        # Une panne RPC met le bot en attente au lieu de l'arrêter
+        while not await self.chain.is_connected():
+            self.logger.error(f">>> Erreur de connexion à Polygon ({self.chain.rpc_url}), nouvel essai dans 30s")
+            await asyncio.sleep(30)
+            if not self.is_running:
+                await self.close_chain()
+                return
+
         # Charger les wallets depuis le dashboard
         self.wallets = await self.get_wallet_config()
         if not self.wallets:
             self.logger.warning("Aucun wallet configuré, utilisation du wallet unique")
             self.wallets = [{"wallet_address": self.wallet_address, "private_key": self.private_key}]
+        self.wallets = [w for w in self.wallets if w.get("wallet_address") and w.get("private_key")]
+        if not self.wallets:
+            self.logger.error("Aucun wallet avec clé privée, arrêt du bot")
+            await self.close_chain()
+            return
+
+        # Synchronisation initiale des nonces (ensuite alloués localement)
+        wallet_addresses = [w["wallet_address"] for w in self.wallets if w.get("wallet_address")]
+        try:
+            await asyncio.gather(*(self.nonces.sync(address) for address in wallet_addresses))
+        except Exception as e:
+            self.logger.warning(f"Synchronisation des nonces impossible, reportée au premier envoi: {e}")
 
-        self.update_status("active")
+        await self.update_status("active")
         self.logger.info(f"Bot trading KNO démarré avec {len(self.wallets)} wallet(s)")
 
         try:
             while self.is_running:
                 # Recharger config pour avoir les derniers montants
                 await self.load_config()
+                # Échantillonnage des frais en fond pendant la préparation du cycle
+                self.gas.warm()
 
                 # Récupérer prix actuel
-                price = self.get_price_kno_eur() or 1.23
+                price = await self.get_price_kno_eur()
                 if not price:
                     self.logger.warning("Impossible de récupérer le prix, attente 1 min...")
                     await asyncio.sleep(60)
@@ -871,7 +1046,7 @@ class KNOTradingBot:
                     self.logger.info("Aucune référence définie, initialisation avec le prix actuel")
                     self.reference_price = price
                     try:
-                        requests.put(f"{self.api_url}/bots/{self.bot_id}/reference-price", json={"price": price})
+                        await self.put_reference_price(price)
                     except Exception as e:
                         self.logger.warning(f"Impossible d'initialiser reference_price: {e}")
 
@@ -895,46 +1070,41 @@ class KNOTradingBot:
                     if "sell_amount" in wallet:
                         self.config["sell_amount"] = wallet["sell_amount"]
 
-                    # Conditions trading
-                    # buy_condition = price <= ref_price * (1 - volatility)
-                    # sell_condition = price >= ref_price * (1 + volatility)
-                    buy_condition = True
-                    sell_condition = False
+                    await self.check_nonces()
 
-                    for wallet in self.wallets:
-                        self.wallet_address = wallet["wallet_address"]
-                        self.private_key = wallet["private_key"]
-
-                        if "buy_amount" in wallet:
-                            self.config["buy_amount"] = wallet["buy_amount"]
-                        if "sell_amount" in wallet:
-                            self.config["sell_amount"] = wallet["sell_amount"]
-
-                        self.logger.info(f"Wallet prêt pour trading: {self.wallet_address}")
-                        wpol_balance = self.from_wei(token_wpol.functions.balanceOf(self.wallet_address).call(), 18)
-                        kno_balance = self.from_wei(token_kno.functions.balanceOf(self.wallet_address).call(), 18)
-                        self.logger.info(f"Balances: WPOL={wpol_balance:.6f}, KNO={kno_balance:.6f}")
+                    # Conditions trading (stratégie partagée avec le backtest, voir strategy.py)
+                    signal = band_signal(price, ref_price, volatility)
+                    buy_condition = signal == BUY
+                    sell_condition = signal == SELL
 
+                    self.logger.info(f"Wallet prêt pour trading: {self.wallet_address}")
+                    wpol_balance_wei, kno_balance_wei = await asyncio.gather(
+                        self.chain.balance_of(self.chain.wpol, self.wallet_address),
+                        self.chain.balance_of(self.chain.kno, self.wallet_address),
+                    )
+                    wpol_balance = self.from_wei(wpol_balance_wei, 18)
+                    kno_balance = self.from_wei(kno_balance_wei, 18)
+                    self.logger.info(f"Balances: WPOL={wpol_balance:.6f}, KNO={kno_balance:.6f}")
 
                     # --- Achat ---
                     if buy_condition:
                         self.logger.info(f"Achat pour wallet {wallet_address}")
-                        if self.buy_kno(price):
+                        if await self.buy_kno(price):
                             # Mise à jour référence après achat
                             self.reference_price = price
                             try:
-                                requests.put(f"{self.api_url}/bots/{self.bot_id}/reference-price", json={"price": price})
+                                await self.put_reference_price(price)
                             except Exception as e:
                                 self.logger.warning(f"Impossible de mettre à jour reference_price: {e}")
 
                     # --- Vente ---
                     elif sell_condition:
                         self.logger.info(f"Vente pour wallet {wallet_address}")
-                        if self.sell_kno(price):
+                        if await self.sell_kno(price):
                             # Mise à jour référence après vente
                             self.reference_price = price
                             try:
-                                requests.put(f"{self.api_url}/bots/{self.bot_id}/reference-price", json={"price": price})
+                                await self.put_reference_price(price)
                             except Exception as e:
                                 self.logger.warning(f"Impossible de mettre à jour reference_price: {e}")
 
@@ -942,19 +1112,27 @@ class KNOTradingBot:
                 self.write_price("last_price.txt", price)
 
                 # Envoyer heartbeat au dashboard
-                self.send_heartbeat()
+                await self.send_heartbeat()
+
+                for status in self.chain.status():
+                    limits = status["limiter"]
+                    self.logger.info(
+                        f"RPC {status['endpoint']} ({status['state']}): attente moyenne {limits['avg_wait']:.3f}s, "
+                        f"max {limits['max_wait']:.3f}s, {limits['penalties']} pause(s) rate limit"
+                    )
 
                 # Pause avant prochain cycle (5 à 10 minutes aléatoire)
                 delay = random.randint(5, 10)
                 self.logger.info(f"Prochain cycle dans {delay} minutes...")
-                await asyncio.sleep(delay * 60)
+                await self.wait_for_next_cycle(delay * 60)
 
         except KeyboardInterrupt:
             self.logger.info("Arrêt demandé par l'utilisateur")
         except Exception as e:
             self.logger.error(f"Erreur boucle principale: {e}")
         finally:
-            self.update_status("offline")
+            await self.update_status("offline")
+            await self.close_chain()
             self.logger.info("Bot KNO multi-wallet arrêté")
 
 
@@ -967,6 +1145,7 @@ async def main():
     bot_id = int(os.getenv('BOT_ID', '1'))
     API_URL = os.getenv("API_URL", "http://127.0.0.1:3000")
     api_url = API_URL
+    install_log_pipeline(default_bot_id=bot_id)
     
     bot = KNOTradingBot(bot_id, api_url)
     bot.logger.info(f"Démarrage du bot KNO avec ID {bot_id} et API_URL {api_url}")
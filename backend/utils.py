@@ -1,10 +1,11 @@
 # backend/utils.py
-import requests
 import logging
 
+from http_client import http_client
+
 logger = logging.getLogger(__name__)
 
-def get_current_price(token_pair: str) -> float:
+async def get_current_price(token_pair: str) -> float:
     """
     Retourne le prix actuel de la paire token_pair en euros.
     token_pair doit être au format "KNO/WMATIC".
@@ -12,8 +13,7 @@ def get_current_price(token_pair: str) -> float:
     base, quote = token_pair.split("/")
     url = f"https://api.coingecko.com/api/v3/simple/price?ids={base.lower()}&vs_currencies={quote.lower()}"
     try:
-        response = requests.get(url)
-        data = response.json()
+        data = await http_client.get_json(url)
         price = data[base.lower()][quote.lower()]
         return float(price)
     except Exception as e:
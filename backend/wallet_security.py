@@ -1,34 +1,69 @@
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 import os
-from typing import Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Durée de conservation en mémoire d'une clé privée déchiffrée (secondes, 0 = pas de cache)
+WALLET_KEY_CACHE_TTL = float(os.getenv("WALLET_KEY_CACHE_TTL", "60"))
+
 class WalletSecurity:
-    def __init__(self, master_password: Optional[str] = None):
+    def __init__(
+        self,
+        master_password: Optional[str] = None,
+        old_passwords: Optional[List[str]] = None,
+        cache_ttl: float = WALLET_KEY_CACHE_TTL,
+    ):
         """
         Gestionnaire de sécurité pour les clés privées des wallets
         
         Args:
             master_password: Mot de passe maître pour le chiffrement
+            old_passwords: Anciens mots de passe maîtres, acceptés en déchiffrement
+                (rotation, WALLET_MASTER_PASSWORD_OLD séparés par des virgules)
+            cache_ttl: Durée de vie des clés déchiffrées en cache (secondes)
         """
         self.master_password = master_password or os.getenv("WALLET_MASTER_PASSWORD", "default-change-this")
+        if old_passwords is None:
+            old_passwords = [p for p in os.getenv("WALLET_MASTER_PASSWORD_OLD", "").split(",") if p]
+        self.old_passwords = old_passwords
         self.salt = b'stable_salt_for_wallets'  # En production, utilisez un salt unique par utilisateur
+        self.cache_ttl = cache_ttl
         
-    def _get_encryption_key(self) -> bytes:
-        """Génère une clé de chiffrement à partir du mot de passe maître"""
+        # PBKDF2 (100 000 itérations) n'est exécuté qu'une fois par processus
+        self._fernet: Optional[MultiFernet] = None
+        # bot_id -> (clé chiffrée, clé déchiffrée, expiration, minuteur d'effacement)
+        self._key_cache: Dict[int, Tuple[str, bytearray, float, threading.Timer]] = {}
+        # Le minuteur efface depuis son propre thread
+        self._key_lock = threading.Lock()
+        
+    def _derive_key(self, password: str) -> bytes:
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
             salt=self.salt,
             iterations=100000,
         )
-        key = base64.urlsafe_b64encode(kdf.derive(self.master_password.encode()))
-        return key
+        return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+    
+    def _get_encryption_key(self) -> bytes:
+        """Génère une clé de chiffrement à partir du mot de passe maître"""
+        return self._derive_key(self.master_password)
+    
+    @property
+    def fernet(self) -> MultiFernet:
+        """Chiffreur réutilisable : chiffre avec le mot de passe courant, déchiffre aussi avec les anciens"""
+        if self._fernet is None:
+            keys = [self._get_encryption_key()]
+            keys += [self._derive_key(password) for password in self.old_passwords]
+            self._fernet = MultiFernet([Fernet(key) for key in keys])
+        return self._fernet
     
     def encrypt_private_key(self, private_key: str) -> str:
         """
@@ -44,11 +79,8 @@ class WalletSecurity:
             return ""
             
         try:
-            key = self._get_encryption_key()
-            fernet = Fernet(key)
-            
             # Chiffrer la clé privée
-            encrypted_key = fernet.encrypt(private_key.encode())
+            encrypted_key = self.fernet.encrypt(private_key.encode())
             
             # Encoder en base64 pour stockage
             return base64.urlsafe_b64encode(encrypted_key).decode()
@@ -71,14 +103,11 @@ class WalletSecurity:
             return ""
             
         try:
-            key = self._get_encryption_key()
-            fernet = Fernet(key)
-            
             # Décoder depuis base64
             encrypted_data = base64.urlsafe_b64decode(encrypted_private_key.encode())
             
             # Déchiffrer
-            decrypted_key = fernet.decrypt(encrypted_data)
+            decrypted_key = self.fernet.decrypt(encrypted_data)
             
             return decrypted_key.decode()
             
@@ -86,6 +115,87 @@ class WalletSecurity:
             logger.error(f"Erreur lors du déchiffrement de la clé privée: {str(e)}")
             raise Exception("Erreur de déchiffrement")
     
+    def rotate_private_key(self, encrypted_private_key: str) -> str:
+        """Rechiffre une clé privée avec le mot de passe maître courant"""
+        if not encrypted_private_key:
+            return ""
+        encrypted_data = base64.urlsafe_b64decode(encrypted_private_key.encode())
+        return base64.urlsafe_b64encode(self.fernet.rotate(encrypted_data)).decode()
+    
+    # --- CACHE DES CLÉS DÉCHIFFRÉES ---
+    def decrypt_bot_private_key(self, bot_id: int, encrypted_private_key: str) -> str:
+        """
+        Déchiffre la clé privée d'un bot, avec cache mémoire de courte durée
+        
+        Les bots relisent leur configuration à chaque cycle : la clé déchiffrée est
+        conservée `cache_ttl` secondes puis effacée par un minuteur, même sans nouvel
+        appel. Une clé chiffrée différente (wallet modifié) invalide l'entrée.
+        
+        Seul le tampon du cache est écrasé : la str renvoyée (une copie par appel, immuable)
+        reste en mémoire jusqu'à sa libération par le ramasse-miettes.
+        
+        Args:
+            bot_id: Identifiant du bot
+            encrypted_private_key: Clé privée chiffrée (base64)
+            
+        Returns:
+            Clé privée en clair
+        """
+        if not encrypted_private_key:
+            return ""
+        
+        now = time.monotonic()
+        with self._key_lock:
+            # Secours si un minuteur n'a pas encore tourné
+            self._purge_expired(now)
+            entry = self._key_cache.get(bot_id)
+            if entry is not None and entry[0] == encrypted_private_key:
+                return entry[1].decode()
+        
+        private_key = self.decrypt_private_key(encrypted_private_key)
+        if self.cache_ttl > 0:
+            buffer = bytearray(private_key, "utf-8")
+            timer = threading.Timer(self.cache_ttl, self._expire, (bot_id, buffer))
+            timer.daemon = True
+            with self._key_lock:
+                self._forget(bot_id)
+                self._key_cache[bot_id] = (encrypted_private_key, buffer, now + self.cache_ttl, timer)
+            timer.start()
+        return private_key
+    
+    def forget_bot_key(self, bot_id: int):
+        """Efface la clé en cache d'un bot (wallet modifié, bot supprimé)"""
+        with self._key_lock:
+            self._forget(bot_id)
+    
+    def clear_key_cache(self):
+        with self._key_lock:
+            for bot_id in list(self._key_cache):
+                self._forget(bot_id)
+    
+    def _expire(self, bot_id: int, buffer: bytearray):
+        # Minuteur : n'efface que l'entrée qu'il a armée (pas une clé remise en cache depuis)
+        with self._key_lock:
+            entry = self._key_cache.get(bot_id)
+            if entry is not None and entry[1] is buffer:
+                self._forget(bot_id)
+    
+    def _forget(self, bot_id: int):
+        entry = self._key_cache.pop(bot_id, None)
+        if entry is not None:
+            entry[3].cancel()
+            self._zeroize(entry[1])
+    
+    def _purge_expired(self, now: float):
+        for bot_id, (_, _, expires_at, _) in list(self._key_cache.items()):
+            if expires_at <= now:
+                self._forget(bot_id)
+    
+    @staticmethod
+    def _zeroize(buffer: bytearray):
+        # Écrase le tampon en place (les copies str déjà renvoyées ne peuvent pas l'être)
+        buffer[:] = bytes(len(buffer))
+    
     def validate_wallet_address(self, address: str) -> bool:
         """Valide le format d'une adresse de wallet"""
         if not address:
@@ -31,6 +31,7 @@ function BotConfig() {
     updateBotConfig,
     updateBotReferencePrice,
     getKnoPrice,
+    knoPrice: streamedKnoPrice,
     loading: contextLoading,
   } = useBotContext();
 
@@ -102,9 +103,14 @@ function BotConfig() {
     };
 
     fetchKnoPrice();
-    const interval = setInterval(fetchKnoPrice, 30000);
-    return () => clearInterval(interval);
-  }, [getKnoPrice]);
+  }, []);
+
+  // Mises à jour du prix poussées par le flux /events
+  useEffect(() => {
+    if (streamedKnoPrice !== null) {
+      setKnoPrice(streamedKnoPrice);
+    }
+  }, [streamedKnoPrice]);
 
   // Validation
   const validate = () => {
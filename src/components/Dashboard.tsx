@@ -31,20 +31,18 @@ function Dashboard() {
     toggleBot,
     selectBot,
     getKnoPrice,
+    knoPrice: streamedKnoPrice,
   } = useBotContext();
 
   const [knoPrice, setKnoPrice] = useState<number | null>(null);
   const [knoPriceLoading, setKnoPriceLoading] = useState(false);
 
-  // Rafraîchissement automatique
+  // Prix poussé par le flux /events (plus de rafraîchissement périodique)
   useEffect(() => {
-    const interval = setInterval(() => {
-      refreshData();
-      fetchKnoPrice();
-    }, 30000);
-
-    return () => clearInterval(interval);
-  }, [refreshData]);
+    if (streamedKnoPrice !== null) {
+      setKnoPrice(streamedKnoPrice);
+    }
+  }, [streamedKnoPrice]);
 
   // Récupérer le prix KNO
   const fetchKnoPrice = async () => {
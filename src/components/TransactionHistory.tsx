@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState } from "react";
 import { useBotContext } from "../context/BotContext";
 import {
   History,
@@ -13,15 +13,6 @@ function TransactionHistory() {
   const { transactions, selectedBot, loading, refreshData } = useBotContext();
   const [filter, setFilter] = useState("all");
 
-  // Rafraîchissement automatique
-  useEffect(() => {
-    const interval = setInterval(() => {
-      refreshData();
-    }, 30000);
-
-    return () => clearInterval(interval);
-  }, [refreshData]);
-
   const filteredTransactions =
     filter === "all"
       ? transactions
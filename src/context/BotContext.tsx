@@ -1,7 +1,15 @@
-import React, { createContext, useContext, useState, useEffect } from "react";
+import React, {
+  createContext,
+  useContext,
+  useState,
+  useEffect,
+  useRef,
+} from "react";
 import {
   apiService,
   BotConfig as ApiBotConfig,
+  DashboardSnapshot,
+  DashboardStats,
   Transaction as ApiTransaction,
 } from "../services/api";
 
@@ -87,8 +95,14 @@ interface BotContextType {
   refreshData: () => void;
   updateBotReferencePrice: (botId: string, price: number) => Promise<void>;
   getKnoPrice: () => Promise<number | null>;
+  // Valeurs poussées par le flux /events
+  knoPrice: number | null;
+  stats: DashboardStats | null;
 }
 
+// Taille des pages au chargement initial (plafond serveur TRANSACTIONS_MAX_PAGE_SIZE)
+const TRANSACTIONS_PAGE_LIMIT = 500;
+
 const BotContext = createContext<BotContextType | undefined>(undefined);
 
 export function BotProvider({ children }: { children: React.ReactNode }) {
@@ -97,12 +111,69 @@ export function BotProvider({ children }: { children: React.ReactNode }) {
   const [selectedBotId, setSelectedBotId] = useState<string>("");
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [loading, setLoading] = useState(true);
+  const [knoPrice, setKnoPrice] = useState<number | null>(null);
+  const [stats, setStats] = useState<DashboardStats | null>(null);
+  // Curseur de la transaction la plus récente : les rafraîchissements ne
+  // téléchargent que les nouvelles lignes
+  const latestCursorRef = useRef<string | null>(null);
 
   // Charger les données au démarrage
   useEffect(() => {
     loadAllData();
   }, []);
 
+  // Flux push : instantané à la connexion puis deltas, sans polling
+  useEffect(() => {
+    const source = apiService.openEventStream();
+    const parse = (event: Event) => JSON.parse((event as MessageEvent).data);
+
+    source.addEventListener("snapshot", (event) => {
+      const snapshot: DashboardSnapshot = parse(event);
+      const snapshotBots = snapshot.bots.map(formatBot);
+      setBots(snapshotBots);
+      if (snapshotBots.length > 0) {
+        setSelectedBotId((current) => current || snapshotBots[0].id);
+      }
+      setStats(snapshot.stats);
+      setKnoPrice(snapshot.price?.price_eur ?? null);
+      // Reconnexion : rattraper les transactions manquées pendant la coupure
+      if (latestCursorRef.current) {
+        loadNewTransactions();
+      }
+    });
+
+    source.addEventListener("bot", (event) => {
+      const bot = formatBot(parse(event));
+      setBots((previous) =>
+        previous.some((b) => b.id === bot.id)
+          ? previous.map((b) => (b.id === bot.id ? bot : b))
+          : [...previous, bot],
+      );
+    });
+
+    source.addEventListener("bot_deleted", (event) => {
+      const { id } = parse(event);
+      setBots((previous) => previous.filter((b) => b.id !== id.toString()));
+    });
+
+    source.addEventListener("transaction", (event) => {
+      const transaction = formatTransaction(parse(event));
+      setTransactions((previous) =>
+        previous.some((t) => t.id === transaction.id)
+          ? previous
+          : [transaction, ...previous],
+      );
+    });
+
+    source.addEventListener("stats", (event) => setStats(parse(event)));
+
+    source.addEventListener("price", (event) => {
+      setKnoPrice(parse(event).price_eur ?? null);
+    });
+
+    return () => source.close();
+  }, []);
+
   // Mettre à jour activeBots quand les bots changent
   useEffect(() => {
     const activeIds = bots.filter((bot) => bot.isActive).map((bot) => bot.id);
@@ -120,98 +191,140 @@ export function BotProvider({ children }: { children: React.ReactNode }) {
     }
   };
 
+  const formatBot = (apiBot: ApiBotConfig): BotConfig => ({
+    id: apiBot.id.toString(),
+    name: apiBot.name,
+    token_pair: apiBot.token_pair || "KNO/WPOL",
+    isActive: apiBot.is_active,
+    status: apiBot.status,
+
+    // Paramètres KNO spécifiques
+    volatility_percent: apiBot.volatility_percent ?? 5,
+    buy_amount: apiBot.buy_amount ?? 0.05,
+    sell_amount: apiBot.sell_amount ?? 0.05,
+    min_swap_amount: apiBot.swap_amount ?? 0.01,
+    reference_price: apiBot.reference_price,
+
+    // Paramètres optionnels
+    random_trades_count: apiBot.random_trades_count ?? 0,
+    trading_duration_hours: apiBot.trading_duration_hours ?? 24,
+    swap_amount: apiBot.swap_amount || 0.1,
+
+    // Configuration Wallet
+    wallet_address: apiBot.wallet_address || null,
+    wallet_private_key: apiBot.wallet_private_key || "",
+    rpc_endpoint: apiBot.rpc_endpoint || "https://polygon-rpc.com",
+
+    // Adresses des contrats
+    wpol_address:
+      apiBot.wpol_address || "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270",
+    kno_address:
+      apiBot.kno_address || "0x236fbfAa3Ec9E0B9BA013Df370c098bAd85aD631",
+    router_address:
+      apiBot.router_address || "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff",
+    quoter_address: apiBot.quoter_address || "",
+
+    // Paramètres de transaction
+    slippage_tolerance: apiBot.slippage_tolerance || 1,
+    gas_limit: apiBot.gas_limit || 300000,
+    gas_price: apiBot.gas_price || 30,
+
+    // Statistiques
+    balance: apiBot.balance || 0,
+    total_profit: apiBot.total_profit || 0,
+    last_buy_price: apiBot.last_buy_price,
+    last_sell_price: apiBot.last_sell_price,
+
+    // Champs hérités
+    buy_price_threshold: apiBot.buy_price_threshold,
+    buy_percentage_drop: apiBot.buy_percentage_drop,
+    sell_price_threshold: apiBot.sell_price_threshold,
+    sell_percentage_gain: apiBot.sell_percentage_gain,
+
+    // Timestamps
+    created_at: apiBot.created_at,
+    updated_at: apiBot.updated_at,
+    last_heartbeat: apiBot.last_heartbeat,
+  });
+
   const loadBots = async () => {
     try {
       const apiBots = await apiService.getBots();
 
-      const formattedBots: BotConfig[] = apiBots.map((apiBot) => ({
-        id: apiBot.id.toString(),
-        name: apiBot.name,
-        token_pair: apiBot.token_pair || "KNO/WPOL",
-        isActive: apiBot.is_active,
-        status: apiBot.status,
-
-        // Paramètres KNO spécifiques
-        volatility_percent: apiBot.volatility_percent ?? 5,
-        buy_amount: apiBot.buy_amount ?? 0.05,
-        sell_amount: apiBot.sell_amount ?? 0.05,
-        min_swap_amount: apiBot.swap_amount ?? 0.01,
-        reference_price: apiBot.reference_price,
-
-        // Paramètres optionnels
-        random_trades_count: apiBot.random_trades_count ?? 0,
-        trading_duration_hours: apiBot.trading_duration_hours ?? 24,
-        swap_amount: apiBot.swap_amount || 0.1,
-
-        // Configuration Wallet
-        wallet_address: apiBot.wallet_address || null,
-        wallet_private_key: apiBot.wallet_private_key || "",
-        rpc_endpoint: apiBot.rpc_endpoint || "https://polygon-rpc.com",
-
-        // Adresses des contrats
-        wpol_address:
-          apiBot.wpol_address || "0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270",
-        kno_address:
-          apiBot.kno_address || "0x236fbfAa3Ec9E0B9BA013Df370c098bAd85aD631",
-        router_address:
-          apiBot.router_address || "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff",
-        quoter_address: apiBot.quoter_address || "",
-
-        // Paramètres de transaction
-        slippage_tolerance: apiBot.slippage_tolerance || 1,
-        gas_limit: apiBot.gas_limit || 300000,
-        gas_price: apiBot.gas_price || 30,
-
-        // Statistiques
-        balance: apiBot.balance || 0,
-        total_profit: apiBot.total_profit || 0,
-        last_buy_price: apiBot.last_buy_price,
-        last_sell_price: apiBot.last_sell_price,
-
-        // Champs hérités
-        buy_price_threshold: apiBot.buy_price_threshold,
-        buy_percentage_drop: apiBot.buy_percentage_drop,
-        sell_price_threshold: apiBot.sell_price_threshold,
-        sell_percentage_gain: apiBot.sell_percentage_gain,
-
-        // Timestamps
-        created_at: apiBot.created_at,
-        updated_at: apiBot.updated_at,
-        last_heartbeat: apiBot.last_heartbeat,
-      }));
+      const formattedBots: BotConfig[] = apiBots.map(formatBot);
 
       setBots(formattedBots);
-      if (formattedBots.length > 0 && !selectedBotId) {
-        setSelectedBotId(formattedBots[0].id);
+      if (formattedBots.length > 0) {
+        setSelectedBotId((current) => current || formattedBots[0].id);
       }
     } catch (error) {
       console.error("Erreur chargement bots:", error);
     }
   };
 
+  const formatTransaction = (apiTx: ApiTransaction): Transaction => ({
+    id: apiTx.id.toString(),
+    type: apiTx.type as "buy" | "sell",
+    amount: apiTx.amount,
+    price: apiTx.price,
+    timestamp: apiTx.timestamp,
+    profit: apiTx.profit,
+    botId: apiTx.bot_id?.toString(),
+    tx_hash: apiTx.tx_hash,
+  });
+
   const loadTransactions = async () => {
     try {
-      const apiTransactions = await apiService.getTransactions();
-
-      const formattedTransactions: Transaction[] = apiTransactions.map(
-        (apiTx) => ({
-          id: apiTx.id.toString(),
-          type: apiTx.type as "buy" | "sell",
-          amount: apiTx.amount,
-          price: apiTx.price,
-          timestamp: apiTx.timestamp,
-          profit: apiTx.profit,
-          botId: apiTx.bot_id?.toString(),
-          tx_hash: apiTx.tx_hash,
-        }),
-      );
+      // Historique complet : les totaux de TransactionHistory portent sur toutes les pages
+      let page = await apiService.getTransactionsPage({ limit: TRANSACTIONS_PAGE_LIMIT });
+      const latestCursor = page.latestCursor;
+      const allTransactions = page.items.map(formatTransaction);
+
+      while (page.nextCursor) {
+        page = await apiService.getTransactionsPage({
+          limit: TRANSACTIONS_PAGE_LIMIT,
+          cursor: page.nextCursor,
+        });
+        allTransactions.push(...page.items.map(formatTransaction));
+      }
 
-      setTransactions(formattedTransactions);
+      setTransactions(allTransactions);
+      latestCursorRef.current = latestCursor;
     } catch (error) {
       console.error("Erreur chargement transactions:", error);
     }
   };
 
+  const loadNewTransactions = async () => {
+    if (!latestCursorRef.current) {
+      return loadTransactions();
+    }
+    try {
+      let after: string | null = latestCursorRef.current;
+      const newTransactions: Transaction[] = [];
+
+      // Parcourt les pages tant que le serveur en signale d'autres
+      while (after) {
+        const page = await apiService.getTransactionsPage({ after });
+        newTransactions.unshift(...page.items.map(formatTransaction));
+        latestCursorRef.current = page.latestCursor ?? latestCursorRef.current;
+        after = page.nextCursor;
+      }
+
+      if (newTransactions.length) {
+        setTransactions((previous) => {
+          const known = new Set(previous.map((t) => t.id));
+          return [
+            ...newTransactions.filter((t) => !known.has(t.id)),
+            ...previous,
+          ];
+        });
+      }
+    } catch (error) {
+      console.error("Erreur chargement nouvelles transactions:", error);
+    }
+  };
+
   const selectedBot =
     bots.find((bot) => bot.id === selectedBotId) || bots[0] || getDefaultBot();
 
@@ -258,7 +371,8 @@ export function BotProvider({ children }: { children: React.ReactNode }) {
   }
 
   const refreshData = () => {
-    loadAllData();
+    loadBots();
+    loadNewTransactions();
   };
 
   const addBot = async (botData: Omit<BotConfig, "id">) => {
@@ -478,6 +592,8 @@ export function BotProvider({ children }: { children: React.ReactNode }) {
         refreshData,
         updateBotReferencePrice,
         getKnoPrice,
+        knoPrice,
+        stats,
       }}
     >
       {children}
@@ -200,6 +200,40 @@ export interface Transaction {
   timestamp: string;
   profit?: number;
   tx_hash?: string;
+  gas_cost?: number; // POL
+  effective_price?: number; // WPOL par KNO
+}
+
+export interface TransactionQuery {
+  limit?: number;
+  cursor?: string; // page suivante (transactions plus anciennes)
+  after?: string; // uniquement les transactions plus récentes
+  since?: string;
+  until?: string;
+  type?: 'buy' | 'sell';
+}
+
+export interface TransactionPage {
+  items: Transaction[];
+  nextCursor: string | null;
+  latestCursor: string | null;
+}
+
+export interface DashboardStats {
+  total_balance: number;
+  total_profit: number;
+  active_bots: number;
+  total_bots: number;
+  today_pnl: number;
+  kno_bots: number;
+  total_kno_trades: number;
+  avg_volatility: number;
+}
+
+export interface DashboardSnapshot {
+  bots: BotConfig[];
+  stats: DashboardStats;
+  price: { price_eur: number; price_usd: number; source: string } | null;
 }
 
 class ApiService {
@@ -330,10 +364,39 @@ class ApiService {
     return this.request(endpoint);
   }
 
+  // Transactions paginées par curseur (en-têtes X-Next-Cursor / X-Latest-Cursor)
+  async getTransactionsPage(query: TransactionQuery = {}, botId?: string): Promise<TransactionPage> {
+    const endpoint = botId ? `/bots/${botId}/transactions` : '/transactions';
+    const params = new URLSearchParams();
+    Object.entries(query).forEach(([key, value]) => {
+      if (value !== undefined && value !== null) params.append(key, String(value));
+    });
+    const search = params.toString();
+
+    const response = await fetch(`${API_BASE_URL}${endpoint}${search ? `?${search}` : ''}`, {
+      headers: { 'Content-Type': 'application/json' },
+    });
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`API Error: ${response.status} - ${errorText}`);
+    }
+
+    return {
+      items: await response.json(),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+      latestCursor: response.headers.get('X-Latest-Cursor'),
+    };
+  }
+
   // Statistiques
   async getStats() {
     return this.request('/stats');
   }
+
+  // Flux push : événement `snapshot` puis deltas (transaction, bot, bot_deleted, stats, price)
+  openEventStream(): EventSource {
+    return new EventSource(`${API_BASE_URL}/events`);
+  }
 }
 
 export const apiService = new ApiService();
\ No newline at end of file